@@ -1,11 +1,22 @@
 import os
+import json
 import time
+import hashlib
+import math
+import sqlite3
+import tempfile
 import random
 import re
+import queue
+import shutil
+import signal
+import threading
 import requests
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutTimeout
+from urllib.parse import quote, urljoin
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
 from supabase.client import ClientOptions
+from postgrest.exceptions import APIError
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -17,6 +28,9 @@ from selenium.webdriver.common.action_chains import ActionChains
 from dotenv import load_dotenv
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree, html as lxml_html
 
 load_dotenv()
 
@@ -30,6 +44,58 @@ supabase: Client = create_client(
 
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 
+
+def _env_int(name, default):
+    """Lê um inteiro de variável de ambiente, caindo no default se ausente ou inválido."""
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name, default):
+    """Lê um float de variável de ambiente, caindo no default se ausente ou inválido."""
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_flag(name, default=False):
+    """Lê uma flag booleana de variável de ambiente ("1", "true", "yes", "on")."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# [PERF] Busca Kabum e Amazon em paralelo dentro de scrape_component, cada loja com sua
+# própria sessão de Chrome. Dobra o número de Chromes por worker (e a memória), mas o
+# tempo por componente cai de (kabum + 5-8s + amazon) para ~max(kabum, amazon).
+PARALLEL_STORE_SEARCH = _env_flag("PARALLEL_STORE_SEARCH")
+
+# [PERF] Caminho rápido HTTP (requests + lxml) antes do Chrome — ver "HTTP FAST PATH".
+HTTP_FIRST_FETCH = _env_flag("HTTP_FIRST_FETCH")
+HTTP_FETCH_TIMEOUT_S = 15
+
+# [PERF] Avaliação em streaming do matching: ordena os candidatos por preço e para no K-ésimo
+# aceito (o mais barato válido e o Top 3 do log saem iguais). Rejeições viram um resumo
+# por motivo em vez de uma linha por candidato. 0 = avalia a página inteira (modo antigo).
+MATCH_STREAM_TOP_K = max(0, _env_int("MATCH_STREAM_TOP_K", 3))
+
+# [PERF] Fallback LLM assíncrono: a busca devolve "pending_llm" com os candidatos e segue
+# para a próxima loja/componente; uma thread de resolução pergunta ao Groq em lote
+# (juntando componentes diferentes) e grava o componente quando os veredictos chegam.
+ASYNC_LLM_FALLBACK = _env_flag("ASYNC_LLM_FALLBACK")
+LLM_RESOLVER_BATCH_MAX = max(1, _env_int("LLM_RESOLVER_BATCH_MAX", 12))  # pares por chamada
+LLM_RESOLVER_MAX_WAIT_S = _env_int("LLM_RESOLVER_MAX_WAIT_S", 20)       # espera p/ juntar lote
+
+USER_AGENTS = [
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+]
+
+
 # Palavras que indicam que não é o produto puro (kits, acessórios, PCs completos)
 # REMOVIDOS intencionalmente: 'suporte', 'cooler', 'ventoinha', 'base', 'case', 'gabinete'
 # pois aparecem em descrições técnicas legítimas (ex: "sem cooler", "suporte a PCIe",
@@ -113,6 +179,121 @@ KNOWN_STORAGE_CAPACITIES_GB = {
     2000, 2048, 4000, 4096, 8000, 8192
 }
 
+# ---------------------------------------------------------------------------
+# MATCHING DE PALAVRAS-CHAVE (vocabulários compilados)
+# ---------------------------------------------------------------------------
+
+
+class KeywordMatcher:
+    """
+    [PERF] Vocabulário de palavras-chave compilado uma vez: um frozenset para checagem de
+    pertinência exata (token in matcher) e uma única regex de alternância (mais longas
+    primeiro) para busca por substring num texto. Substitui os `any(kw in texto for kw in
+    LISTA)` espalhados pelo código — cada um era um loop Python por candidato.
+
+    find() mantém a semântica dos loops antigos: retorna a PRIMEIRA palavra da lista (na
+    ordem original de prioridade) que aparece no texto, para que o motivo de rejeição
+    logado não mude. A regex resolve o caso comum (nenhuma palavra presente) numa
+    passada só; a varredura em ordem só roda quando já se sabe que houve match.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        self.keyword_set = frozenset(self.keywords)
+        alternation = "|".join(
+            re.escape(kw) for kw in sorted(self.keywords, key=len, reverse=True)
+        )
+        self._pattern = re.compile(alternation) if self.keywords else None
+
+    def __contains__(self, token):
+        return token in self.keyword_set
+
+    def search(self, text):
+        """True se alguma palavra-chave aparece (como substring) em text."""
+        return bool(text) and self._pattern is not None and self._pattern.search(text) is not None
+
+    def find(self, text):
+        """Primeira palavra-chave (em ordem de prioridade) contida em text, ou None."""
+        if not self.search(text):
+            return None
+        for kw in self.keywords:
+            if kw in text:
+                return kw
+        return None
+
+
+# Versões compiladas dos vocabulários acima — use estas nos caminhos quentes; as listas
+# continuam sendo a fonte editável (e a ordem de prioridade dos motivos de rejeição).
+EXCLUSION_MATCHER = KeywordMatcher(EXCLUSION_KEYWORDS)
+GENERIC_WORDS_SET = frozenset(GENERIC_WORDS)
+VARIANT_SUFFIX_SET = frozenset(VARIANT_SUFFIXES)
+
+# Seletores dos cards da busca Kabum, em ordem de prioridade — compartilhados entre o
+# extrator JS (extract_kabum_cards_js) e o caminho WebElement de último recurso.
+KABUM_PRODUCT_CONTAINER_SELECTORS = [
+    ".productCard",
+    "[data-testid='product-card']",
+    "[class*='productCard']",
+    "[class*='ProductCard']",
+    "[class*='product-card']",
+    "article",
+    "[class*='CardProduct']",
+    "[class*='ItemProduct']",
+    "[class*='ProductItem']",
+]
+KABUM_NAME_SELECTORS = [
+    ".nameCard",
+    "span.nameCard",
+    "[data-testid='product-name']",
+    "[class*='nameCard']",
+    "[class*='productName']",
+    "[class*='ProductName']",
+    ".productName",
+    "a[href*='/produto/'] span",
+    "a[href*='/produto/']",
+    "h2 span",
+    "h3 span",
+]
+KABUM_PRICE_SELECTORS = [
+    ".priceCard",
+    "span.priceCard",
+    "[data-testid='price']",
+    "[class*='priceCard']",
+    "[class*='finalPrice']",
+    "[class*='bestPrice']",
+    "[class*='Price']",
+    ".finalPrice",
+    ".price",
+    ".priceMain",
+    ".bestPrice",
+]
+
+# Seletores da página de busca da Amazon — compartilhados entre o extrator JS
+# (extract_amazon_results_js) e o caminho WebElement de último recurso.
+AMAZON_PRODUCT_SELECTORS = [
+    "[data-component-type='s-search-result']",
+    "[data-asin]",
+    ".s-result-item[data-asin]",
+    ".s-result-item",
+    ".s-card-container",
+    ".sg-col-inner",
+]
+AMAZON_NAME_SELECTORS = [
+    "h2 a span",
+    ".a-size-medium.a-color-base.a-text-normal",
+    "h2 .a-text-normal",
+    ".a-size-base-plus.a-color-base.a-text-normal",
+]
+AMAZON_PRICE_FALLBACK_SELECTORS = [
+    ".a-price[data-a-size='xl'] .a-offscreen",
+    ".a-price .a-offscreen",
+    ".a-price-whole",
+    "[data-a-size='xl'] .a-price-whole",
+    ".a-price .a-price-whole",
+    ".a-price[data-a-size='l']",
+    ".a-price[data-a-size='m']",
+]
+
 
 # ---------------------------------------------------------------------------
 # MONITORAMENTO / ALERTAS
@@ -136,14 +317,1548 @@ ALLOWED_ALERT_TYPES = {
 }
 
 
+# ---------------------------------------------------------------------------
+# BLOQUEIO DE RECURSOS DE REDE
+# ---------------------------------------------------------------------------
+# [PERF] Só lemos título, preço e link — imagens, vídeos, fontes e trackers de terceiros
+# são banda, tempo de carregamento e memória do Chrome jogados fora. O perfil escolhido é
+# aplicado via CDP (Network.setBlockedURLs) logo após o driver subir. CSS NÃO é bloqueado:
+# is_displayed() e o layout dos cards dependem dele.
+_BLOCK_TRACKERS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*googleadservices.com*", "*amazon-adsystem.com*",
+    "*facebook.net*", "*facebook.com/tr*", "*connect.facebook.com*",
+    "*hotjar.com*", "*clarity.ms*", "*criteo.com*", "*criteo.net*",
+    "*taboola.com*", "*outbrain.com*", "*onesignal.com*", "*scorecardresearch.com*",
+    "*adsrvr.org*", "*tiktok.com*", "*nr-data.net*", "*bing.com/bat*",
+]
+_BLOCK_MEDIA = ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ogg*"]
+_BLOCK_FONTS = ["*.woff*", "*.ttf*", "*.otf*", "*.eot*"]
+_BLOCK_IMAGES = [
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    "*/_next/image*",  # otimizador de imagens do Next.js (Kabum), URL sem extensão
+]
+
+NETWORK_BLOCKING_PROFILES = {
+    "off": [],
+    "trackers": _BLOCK_TRACKERS,
+    "light": _BLOCK_TRACKERS + _BLOCK_MEDIA + _BLOCK_FONTS,
+    "aggressive": _BLOCK_TRACKERS + _BLOCK_MEDIA + _BLOCK_FONTS + _BLOCK_IMAGES,
+}
+NETWORK_BLOCKING_PROFILE = os.environ.get("NETWORK_BLOCKING_PROFILE", "off").strip().lower()
+
+# Requisição bloqueada não é baixada, então não há como saber o tamanho real dela. A
+# economia de bytes é estimada pelo tamanho médio (transferido, comprimido) de cada tipo
+# de recurso nessas duas lojas — serve como ordem de grandeza, não como medida exata.
+_ESTIMATED_BYTES_BY_RESOURCE_TYPE = {
+    "Image": 30_000,
+    "Media": 400_000,
+    "Font": 45_000,
+    "Script": 60_000,
+    "XHR": 4_000,
+    "Fetch": 4_000,
+    "Ping": 500,
+    "Other": 5_000,
+}
+
+
+# ---------------------------------------------------------------------------
+# HTTP FAST PATH (parsers)
+# ---------------------------------------------------------------------------
+# [PERF] Parsers lxml das páginas de busca servidas por HTTP puro. Todos retornam
+# (dados, motivo): motivo != None quando a página não serve (captcha, markup ausente,
+# vazia) e a busca deve escalar pro Selenium.
+
+AMAZON_BASE_URL = "https://www.amazon.com.br"
+
+AMAZON_SELLER_INDICATORS = [
+    "amazon.com.br",
+    "vendido pela amazon",
+    "enviado pela amazon",
+    "vendido e enviado por amazon",
+]
+AMAZON_THIRD_PARTY_INDICATORS = [
+    "loja parceira",
+    "vendedor parceiro",
+]
+AMAZON_SELLER_INFO_SELECTORS = [
+    "#merchant-info",
+    "#tabular-buybox",
+    "#buybox",
+    "#buyBoxAccordion",
+    "#shipsFromSoldBy_feature_div",
+    "#price_feature_div",
+    ".a-section.a-spacing-small.a-padding-small",
+]
+AMAZON_SELLER_STATUS_LABELS = {
+    True: "Vendido e enviado pela Amazon",
+    False: "Vendedor/envio externo",
+    None: "Nao foi possivel determinar",
+}
+
+
+def kabum_search_url(search_term):
+    """URL de busca direta da Kabum (evita inconsistência do autocomplete)."""
+    return f"https://www.kabum.com.br/busca/{search_term.replace(' ', '-')}"
+
+
+def amazon_search_url(search_term):
+    """URL de busca da Amazon restrita à categoria de informática."""
+    return f"{AMAZON_BASE_URL}/s?k={search_term.replace(' ', '+')}&i=computers"
+
+
+def _xpath_has_class(*classes):
+    """Condição XPath equivalente a um seletor CSS de classes (.a.b.c)."""
+    return " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {c} ')" for c in classes
+    )
+
+
+# Equivalentes XPath de AMAZON_NAME_SELECTORS (lxml não tem CSS sem o pacote cssselect)
+AMAZON_NAME_XPATHS = [
+    ".//h2//a//span",
+    f".//*[{_xpath_has_class('a-size-medium', 'a-color-base', 'a-text-normal')}]",
+    f".//h2//*[{_xpath_has_class('a-text-normal')}]",
+    f".//*[{_xpath_has_class('a-size-base-plus', 'a-color-base', 'a-text-normal')}]",
+    ".//h2",
+]
+AMAZON_SELLER_INFO_XPATHS = [
+    "//*[@id='merchant-info']",
+    "//*[@id='tabular-buybox']",
+    "//*[@id='buybox']",
+    "//*[@id='buyBoxAccordion']",
+    "//*[@id='shipsFromSoldBy_feature_div']",
+    "//*[@id='price_feature_div']",
+    f"//*[{_xpath_has_class('a-section', 'a-spacing-small', 'a-padding-small')}]",
+]
+
+
+def _parse_html(content):
+    """Parse lxml tolerante; None se o conteúdo não for HTML."""
+    try:
+        return lxml_html.fromstring(content)
+    except (ValueError, TypeError, etree.ParserError):
+        return None
+
+
+def _node_text(node):
+    """Texto do nó com espaços normalizados (equivalente aproximado ao .text do Selenium)."""
+    return " ".join(node.text_content().split()) if node is not None else ""
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _format_brl(value):
+    """1497.9 -> 'R$ 1.497,90' (mesmo formato do texto de preço lido das páginas)."""
+    return "R$ " + f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _iter_json_dicts(node):
+    """Percorre um JSON (dicts/listas) em profundidade, decodificando strings que são JSON embutido."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            yield current
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            stack.extend(current)
+        elif isinstance(current, str) and len(current) > 2 and current[0] in "{[":
+            try:
+                stack.append(json.loads(current))
+            except ValueError:
+                pass
+
+
+def parse_kabum_search_html(content):
+    """
+    Extrai candidatos da busca Kabum a partir do JSON do Next.js (__NEXT_DATA__), que já
+    vem renderizado no HTML. Só devolve itens vendidos pela própria KaBuM! (equivale ao
+    filtro "Vendido por" do caminho Selenium); se a página não traz o vendedor dos itens,
+    não dá pra garantir isso e a busca escala ("missing_markup").
+    """
+    doc = _parse_html(content)
+    if doc is None:
+        return None, "missing_markup"
+
+    scripts = doc.xpath("//script[@id='__NEXT_DATA__']/text()")
+    if not scripts:
+        return None, "missing_markup"
+    try:
+        data = json.loads(scripts[0])
+    except ValueError:
+        return None, "missing_markup"
+
+    products = {}
+    seller_info_seen = False
+    for item in _iter_json_dicts(data):
+        if "code" not in item or "name" not in item:
+            continue
+        if "priceWithDiscount" not in item and "price" not in item:
+            continue
+        if "sellerName" in item:
+            seller_info_seen = True
+        if "kabum" not in str(item.get("sellerName") or "").lower():
+            continue
+        if item.get("available") is False:
+            continue
+
+        # Preço à vista (PIX) é o que o card mostra em destaque — mesmo valor do .priceCard
+        price = _to_float(item.get("priceWithDiscount")) or _to_float(item.get("price"))
+        if price < 20.0:
+            continue
+
+        code = item["code"]
+        friendly_name = item.get("friendlyName")
+        url = f"https://www.kabum.com.br/produto/{code}"
+        if friendly_name:
+            url += f"/{quote(str(friendly_name))}"
+        products[code] = {
+            "name": " ".join(str(item["name"]).split()),
+            "price": price,
+            "price_text": _format_brl(price),
+            "url": url,
+        }
+
+    if not seller_info_seen:
+        return None, "missing_markup"
+    if not products:
+        return None, "empty"
+    return list(products.values()), None
+
+
+def _is_amazon_captcha(doc):
+    title = (doc.findtext(".//title") or "").lower()
+    if "robot" in title or "captcha" in title or "verification" in title:
+        return True
+    return bool(doc.xpath("//form[contains(@action, 'validateCaptcha')]"))
+
+
+def parse_amazon_search_html(content):
+    """
+    Extrai os resultados da busca Amazon no mesmo formato do extrator JS
+    (extract_amazon_results_js): [{asin, name, price_text, price_fallbacks, link, sponsored}].
+    """
+    doc = _parse_html(content)
+    if doc is None:
+        return None, "missing_markup"
+    if _is_amazon_captcha(doc):
+        return None, "captcha"
+
+    results = doc.xpath("//div[@data-component-type='s-search-result'][@data-asin!='']")
+    if not results:
+        return None, "missing_markup"
+
+    items = []
+    for product in results[:60]:
+        name = ""
+        link = None
+        for xpath in AMAZON_NAME_XPATHS:
+            name_nodes = product.xpath(xpath)
+            if not name_nodes:
+                continue
+            name = _node_text(name_nodes[0])
+            if name:
+                anchors = (name_nodes[0].xpath("ancestor-or-self::a[@href][1]")
+                           or product.xpath(".//h2//a[@href] | .//a[@href][.//h2]"))
+                link = urljoin(AMAZON_BASE_URL, anchors[0].get("href")) if anchors else None
+                break
+        if not name:
+            continue
+
+        # Preço atual (.a-text-price é o preço "de", riscado)
+        price_fallbacks = [
+            _node_text(node) for node in product.xpath(
+                f".//span[{_xpath_has_class('a-price')} and not({_xpath_has_class('a-text-price')})]"
+                f"/span[{_xpath_has_class('a-offscreen')}]"
+            )
+        ]
+        price_text = ""
+        whole = product.xpath(f".//span[{_xpath_has_class('a-price-whole')}]")
+        if whole:
+            fraction = product.xpath(f".//span[{_xpath_has_class('a-price-fraction')}]")
+            whole_text = _node_text(whole[0]).rstrip(" .,")
+            price_text = f"{whole_text},{_node_text(fraction[0]) if fraction else '00'}"
+
+        sponsored = bool(product.xpath(
+            f".//*[{_xpath_has_class('puis-sponsored-label-text')} or {_xpath_has_class('s-sponsored-label-info-icon')}]"
+        )) or bool(re.search(r"\bPatrocinad[oa]\b|\bSponsored\b", _node_text(product)[:300]))
+
+        items.append({
+            "asin": product.get("data-asin") or None,
+            "name": name,
+            "price_text": price_text,
+            "price_fallbacks": [t for t in price_fallbacks if t],
+            "link": link,
+            "sponsored": sponsored,
+        })
+
+    if not items:
+        return None, "empty"
+    return items, None
+
+
+def parse_amazon_seller_html(content):
+    """
+    Mesma regra de check_amazon_shipped_by_amazon aplicada ao HTML da página do produto.
+    Retorna (shipped_by_store, motivo) — motivo != None se a página veio bloqueada.
+    """
+    doc = _parse_html(content)
+    if doc is None:
+        return None, "missing_markup"
+    if _is_amazon_captcha(doc):
+        return None, "captcha"
+
+    for node in doc.xpath("//script | //style | //noscript"):
+        node.drop_tree()
+
+    for xpath in AMAZON_SELLER_INFO_XPATHS:
+        for node in doc.xpath(xpath):
+            text = _node_text(node).lower()
+            if not text:
+                continue
+            if any(ind in text for ind in AMAZON_SELLER_INDICATORS):
+                return True, None
+            if any(ind in text for ind in AMAZON_THIRD_PARTY_INDICATORS):
+                return False, None
+
+    body = doc.find(".//body")
+    page_text = _node_text(body).lower() if body is not None else ""
+    if "vendido e enviado por amazon" in page_text:
+        return True, None
+    if "vendido por amazon" in page_text and "enviado por amazon" in page_text:
+        return True, None
+    if any(ind in page_text for ind in AMAZON_THIRD_PARTY_INDICATORS):
+        return False, None
+    return None, None
+
+
+# ---------------------------------------------------------------------------
+# MATCHING (plano pré-compilado por componente)
+# ---------------------------------------------------------------------------
+
+_DIGIT_RE = re.compile(r'\d')
+
+# Versão da lógica de matching. Suba sempre que MatchPlan/KeywordMatcher mudarem de
+# comportamento: decisões cacheadas de versões anteriores são descartadas ao abrir o cache.
+# Os vocabulários entram no fingerprint abaixo, então editar as listas já invalida sozinho.
+MATCHER_VERSION = 1
+MATCHER_FINGERPRINT = f"{MATCHER_VERSION}:" + hashlib.sha1(json.dumps([
+    EXCLUSION_KEYWORDS, VARIANT_SUFFIXES, GENERIC_WORDS,
+    sorted(CHIP_MANUFACTURERS), sorted(KNOWN_STORAGE_CAPACITIES_GB),
+]).encode("utf-8")).hexdigest()[:12]
+
+
+class MatchPlan:
+    """
+    [PERF] Plano de matching compilado UMA vez por componente. Antes, is_exact_product_match
+    refazia todo o lado "busca" a cada candidato: re-tokenizava o model, remontava as
+    variantes, re-extraía capacidade/DDR/VRAM e chamava re.compile num loop aninhado
+    (variante x token numérico). Aqui isso tudo é pré-calculado no __init__ e evaluate()
+    só processa o título do candidato. As decisões (e os motivos de rejeição) são as
+    mesmas da implementação anterior — só a ordem do trabalho mudou.
+    """
+
+    def __init__(self, scraper, search_model, search_brand=None, search_name=None,
+                 category=None, specifications=None):
+        self.scraper = scraper
+        self.search_model = search_model
+        self.search_model_lower = (search_model or "").lower()
+        self.search_brand = search_brand
+
+        self.search_tokens = scraper.extract_key_tokens(search_model)
+        self.search_variants = {t for t in self.search_tokens if t in VARIANT_SUFFIX_SET}
+        self.search_numeric = [t for t in self.search_tokens if _DIGIT_RE.search(t)]
+
+        # Verificar variantes apenas quando aparecem ADJACENTES a tokens numéricos do modelo.
+        # Ex: rejeita "7600 xt" mas aceita "7600, 5.1GHz Max Turbo" (Max não é variante do modelo)
+        # Padrões: "7600xt", "7600 xt", "7600-xt". Mesma ordem de avaliação de antes
+        # (variante por fora, número por dentro), para o motivo de rejeição ser o mesmo.
+        rejecting_variants = [v for v in VARIANT_SUFFIXES if v not in self.search_variants]
+        self.adjacent_variant_patterns = [
+            (num, variant, re.compile(r'\b' + re.escape(num) + r'[\s\-]?' + re.escape(variant) + r'\b'))
+            for variant in rejecting_variants
+            for num in self.search_numeric
+        ]
+        # [PERF] Regex única (qualquer número x qualquer variante) que decide numa passada se
+        # ALGUM dos padrões acima casa; a lista em ordem só é percorrida para nomear o motivo.
+        self.adjacent_variant_gate = self._alternation_gate(
+            self.search_numeric, r'[\s\-]?', rejecting_variants
+        )
+
+        # [FIX Bug#2] Usar word boundary (\b) em vez de substring simples (`in`).
+        # Evita que códigos de peça como "SA400S37" sejam interpretados como
+        # variante "A400S" do modelo "A400".
+        # Variantes que fazem parte da busca nunca rejeitam, então já ficam fora dos padrões.
+        self.boundary_variant_patterns = {
+            num: [
+                (variant, re.compile(r'\b' + re.escape(num) + re.escape(variant) + r'\b'))
+                for variant in rejecting_variants
+            ]
+            for num in self.search_numeric
+        }
+        self.boundary_variant_gates = {
+            num: self._alternation_gate([num], '', rejecting_variants)
+            for num in self.search_numeric
+        }
+
+        # [FIX Bug#3] Extrair capacidade também do nome completo do componente (search_name)
+        # quando o model não contém essa informação. Ex: model="870 EVO", name="Samsung 870 EVO 1TB"
+        self.search_capacity = scraper.extract_storage_capacity(search_model)
+        if self.search_capacity is None and search_name:
+            self.search_capacity = scraper.extract_storage_capacity(search_name)
+
+        # [MONITORING/FIX] Checagem de VRAM para GPUs: model/name normalmente não trazem a
+        # capacidade (ex: "GeForce RTX 3060" não diz se é a versão 8GB ou 12GB), então a
+        # capacidade de referência vem do campo specifications.memory cadastrado no
+        # componente. Sem isso, uma RTX 3060 12GB e uma RTX 3060 8GB (produtos diferentes,
+        # preços bem diferentes) eram tratadas como o mesmo match.
+        self.vram_capacity = None
+        if category == 'GPU' and specifications:
+            self.vram_capacity = scraper.extract_gpu_vram(specifications)
+
+        # [FIX Bug#10] Checar geração DDR quando o modelo é genérico (ex: "Vengeance", "Fury Beast").
+        # Sem isso, DDR4 e DDR5 do mesmo produto ficam intercambiáveis no matching.
+        self.search_ddr = scraper.extract_ddr_type(search_model)
+        if self.search_ddr is None and search_name:
+            self.search_ddr = scraper.extract_ddr_type(search_name)
+
+        # [FIX Bug#5] Pular brand check para fabricantes de chip (NVIDIA, AMD, Intel).
+        # Seus produtos são vendidos por terceiros (ASUS, MSI, Gigabyte, ZOTAC etc.)
+        # e o nome da marca quase nunca aparece no título do produto na loja.
+        self.brand_lower = None
+        if search_brand and search_brand.lower() not in CHIP_MANUFACTURERS:
+            self.brand_lower = search_brand.lower()
+
+    @staticmethod
+    def _alternation_gate(numbers, separator, variants):
+        """Compila \\b(n1|n2..)SEP(v1|v2..)\\b, ou None se não houver o que checar."""
+        if not numbers or not variants:
+            return None
+        nums = "|".join(re.escape(n) for n in sorted(numbers, key=len, reverse=True))
+        vars_ = "|".join(re.escape(v) for v in sorted(variants, key=len, reverse=True))
+        return re.compile(r'\b(?:' + nums + ')' + separator + '(?:' + vars_ + r')\b')
+
+    # Formato do detalhe das rejeições por exclusão — a keyword é recuperada dele por
+    # exclusion_keyword() (inclusive em decisões vindas do cache), sem varrer o vocabulário.
+    EXCLUSION_DETAIL = "exclusion '{}'"
+
+    @classmethod
+    def exclusion_keyword(cls, detail):
+        """Keyword de exclusão contida num detalhe gerado por evaluate(), ou None."""
+        prefix, suffix = cls.EXCLUSION_DETAIL.split("{}")
+        if detail and detail.startswith(prefix) and detail.endswith(suffix):
+            return detail[len(prefix):len(detail) - len(suffix)] or None
+        return None
+
+    def evaluate(self, product_name):
+        """
+        Avalia um título de produto contra o plano.
+
+        Retorna (aceito, código, detalhe): código é uma categoria curta do motivo de
+        rejeição ("exclusion", "token", "variant", "capacity", ...) e detalhe é o texto
+        exibido no log "[MATCH] REJEITADO (...)". Ambos são None quando aceito (detalhe
+        também é None nas rejeições que nunca foram logadas).
+        """
+        if not product_name or not self.search_model:
+            return False, "empty", None
+
+        scraper = self.scraper
+        product_name_lower = product_name.lower()
+
+        keyword = EXCLUSION_MATCHER.find(product_name_lower)
+        if keyword:
+            return False, "exclusion", self.EXCLUSION_DETAIL.format(keyword)
+
+        search_tokens = self.search_tokens
+        if not search_tokens:
+            if self.search_model_lower in product_name_lower:
+                return True, None, None
+            return False, "model", None
+
+        # [FIX Bug#11] Rejeitar acessórios de compatibilidade: produtos onde TODOS os tokens
+        # do modelo buscado aparecem apenas após "para " no título (seção de lista de
+        # compatibilidade), e não antes. Evita casos como:
+        #   "Antena WiFi para MSI MAG Z890 Tomahawk"
+        #   "Módulo TPM 2.0 para Gigabyte H610M H DDR4"
+        #   "Cabo PCIE para Corsair HX1200"
+        if ' para ' in product_name_lower:
+            first_para_idx = product_name_lower.index(' para ')
+            tokens_before_para = set(scraper.extract_key_tokens(product_name_lower[:first_para_idx]))
+            if not any(t in tokens_before_para for t in search_tokens):
+                return False, "accessory", "tokens só após 'para' - acessório"
+
+        product_name_normalized = product_name_lower.replace('-', '').replace('_', '')
+
+        for token in search_tokens:
+            if token not in product_name_normalized:
+                return False, "token", f"token '{token}' ausente"
+
+        if self.adjacent_variant_gate and self.adjacent_variant_gate.search(product_name_normalized):
+            for num, variant, pattern in self.adjacent_variant_patterns:
+                if pattern.search(product_name_normalized):
+                    return False, "variant", f"variante '{num}+{variant}'"
+
+        product_numeric = [t for t in scraper.extract_key_tokens(product_name) if _DIGIT_RE.search(t)]
+
+        for search_num in self.search_numeric:
+            found_match = False
+            for prod_num in product_numeric:
+                if search_num == prod_num:
+                    found_match = True
+                    break
+                if prod_num.startswith(search_num) and len(prod_num) > len(search_num):
+                    suffix = prod_num[len(search_num):]
+                    if suffix in VARIANT_SUFFIX_SET:
+                        # [FIX] Se o sufixo colado no número já é a variante buscada
+                        # (ex: busca "9070 XT" e o anúncio escreve "9070XT" sem espaço),
+                        # não é produto diferente — é o mesmo, só sem espaço no título.
+                        if suffix in self.search_variants:
+                            found_match = True
+                            break
+                        return False, "numeric_variant", f"variante numerica '{prod_num}' != '{search_num}'"
+
+            if not found_match:
+                if search_num not in product_name_normalized:
+                    return False, "numeric", f"num '{search_num}' ausente"
+
+                gate = self.boundary_variant_gates[search_num]
+                if gate and gate.search(product_name_normalized):
+                    for variant, variant_pattern in self.boundary_variant_patterns[search_num]:
+                        if variant_pattern.search(product_name_normalized):
+                            return False, "variant_boundary", f"variante word-boundary '{search_num}+{variant}'"
+
+        product_capacity = scraper.extract_storage_capacity(product_name)
+
+        if self.search_capacity is not None:
+            if product_capacity is None or product_capacity != self.search_capacity:
+                return False, "capacity", f"capacidade {self.search_capacity}GB != {product_capacity}GB"
+
+        if self.vram_capacity is not None:
+            if product_capacity is None or product_capacity != self.vram_capacity:
+                return False, "vram", f"VRAM {self.vram_capacity}GB != {product_capacity}GB"
+
+        # Só rejeita quando AMBOS têm DDR explícito e são diferentes.
+        if self.search_ddr is not None:
+            product_ddr = scraper.extract_ddr_type(product_name)
+            if product_ddr is not None and self.search_ddr != product_ddr:
+                return False, "ddr", f"tipo {self.search_ddr.upper()} != {product_ddr.upper()}"
+
+        if self.brand_lower and self.brand_lower not in product_name_lower:
+            return False, "brand", f"marca '{self.search_brand}' ausente"
+
+        return True, None, None
+
+
+# ---------------------------------------------------------------------------
+# CACHE LOCAL (SQLite)
+# ---------------------------------------------------------------------------
+
+# Diretório dos caches locais (persistido entre runs pelo workflow via actions/cache)
+SCRAPER_CACHE_DIR = os.environ.get("SCRAPER_CACHE_DIR", ".cache")
+LOCAL_CACHE_FILE = "scraper_cache.sqlite3"
+
+# [PERF] Cache persistente das decisões do matcher: os mesmos títulos aparecem para o mesmo
+# componente run após run, e a decisão só muda se o componente ou o matcher mudarem.
+MATCH_DECISION_CACHE = _env_flag("MATCH_DECISION_CACHE")
+MATCH_CACHE_MAX_AGE_DAYS = _env_int("MATCH_CACHE_MAX_AGE_DAYS", 30)
+MATCH_CACHE_MAX_ENTRIES = _env_int("MATCH_CACHE_MAX_ENTRIES", 200000)
+
+# [PERF] Cache de veredictos do LLM (Groq): o free tier é de 1.000 requests/dia e os mesmos
+# pares (componente, título) voltavam ao LLM a cada run. Hit = sem chamada e sem sleep.
+LLM_VERDICT_CACHE = _env_flag("LLM_VERDICT_CACHE")
+LLM_CACHE_TTL_DAYS = _env_int("LLM_CACHE_TTL_DAYS", 30)
+LLM_CACHE_MAX_ENTRIES = _env_int("LLM_CACHE_MAX_ENTRIES", 50000)
+
+GROQ_MODEL = "openai/gpt-oss-120b"
+# Versão do prompt de ask_gemini_is_match. Suba ao mudar o texto do prompt: veredictos
+# cacheados com outro prompt (ou outro modelo) são descartados.
+LLM_PROMPT_VERSION = 2
+LLM_VERDICT_VERSION = f"{LLM_PROMPT_VERSION}:{GROQ_MODEL}"
+
+
+class LocalCache:
+    """
+    Cache chave -> JSON em SQLite, separado por namespace e versionado. Entradas de outra
+    versão são apagadas ao abrir (bump de versão = invalidação automática); a evicção
+    remove o que passou de max_age_s e corta as mais antigas acima de max_entries.
+
+    Thread-safe (uma conexão compartilhada protegida por lock). Escritas ficam num buffer
+    em memória e vão ao disco em lote (flush a cada FLUSH_EVERY ou no close). Qualquer
+    erro de SQLite só desativa o cache — nunca derruba a busca.
+    """
+
+    FLUSH_EVERY = 200
+    _QUERY_CHUNK = 500
+
+    def __init__(self, path, namespace, version, max_age_s=None, max_entries=None):
+        self.path = path
+        self.namespace = namespace
+        self.version = str(version)
+        self.max_age_s = max_age_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, version TEXT NOT NULL,"
+            " value TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_age ON cache_entries (namespace, created_at)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    def _min_created_at(self):
+        return time.time() - self.max_age_s if self.max_age_s else 0
+
+    def evict(self):
+        """Apaga entradas de outras versões, expiradas e excedentes. Retorna quantas saíram."""
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND version != ?",
+                (self.namespace, self.version),
+            ).rowcount
+            if self.max_age_s:
+                removed += self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                    (self.namespace, self._min_created_at()),
+                ).rowcount
+            if self.max_entries:
+                removed += self._conn.execute(
+                    "DELETE FROM cache_entries WHERE rowid IN ("
+                    " SELECT rowid FROM cache_entries WHERE namespace = ?"
+                    " ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.namespace, self.max_entries),
+                ).rowcount
+        return removed
+
+    def get_many(self, keys, count=True):
+        """
+        Busca várias chaves numa ida ao banco. Retorna {chave: valor} só com os hits.
+        count=False não mexe em hits/misses — para preloads em que o chamador só usa parte
+        das chaves e contabiliza o que de fato consultou via record().
+        """
+        keys = [k for k in dict.fromkeys(keys) if k]
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._pending:
+                    found[key] = json.loads(self._pending[key][0])
+                else:
+                    missing.append(key)
+            try:
+                for i in range(0, len(missing), self._QUERY_CHUNK):
+                    chunk = missing[i:i + self._QUERY_CHUNK]
+                    rows = self._conn.execute(
+                        "SELECT key, value FROM cache_entries"
+                        " WHERE namespace = ? AND version = ? AND created_at >= ?"
+                        f" AND key IN ({','.join('?' * len(chunk))})",
+                        (self.namespace, self.version, self._min_created_at(), *chunk),
+                    ).fetchall()
+                    for key, value in rows:
+                        found[key] = json.loads(value)
+            except sqlite3.Error as e:
+                print(f"[CACHE] Falha ao ler {self.namespace}: {e}")
+            if count:
+                self.hits += len(found)
+                self.misses += len(keys) - len(found)
+        return found
+
+    def record(self, hits, misses):
+        """Contabiliza consultas feitas sobre um preload de get_many(count=False)."""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def put_many(self, items):
+        """Enfileira {chave: valor JSON-serializável}; grava em lote a cada FLUSH_EVERY."""
+        now = time.time()
+        with self._lock:
+            for key, value in items.items():
+                self._pending[key] = (json.dumps(value, ensure_ascii=False), now)
+            should_flush = len(self._pending) >= self.FLUSH_EVERY
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            rows = [
+                (self.namespace, key, self.version, value, created_at)
+                for key, (value, created_at) in self._pending.items()
+            ]
+            self._pending = {}
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO cache_entries"
+                        " (namespace, key, version, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                self.writes += len(rows)
+            except sqlite3.Error as e:
+                print(f"[CACHE] Falha ao gravar {len(rows)} entradas em {self.namespace}: {e}")
+
+    def iter_values(self):
+        """Todos os valores válidos (versão atual, não expirados) do namespace."""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND version = ? AND created_at >= ?",
+                (self.namespace, self.version, self._min_created_at()),
+            ).fetchall()
+        return [json.loads(value) for (value,) in rows]
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+def open_local_cache(namespace, version, max_age_days=None, max_entries=None):
+    """Abre o LocalCache do namespace no arquivo compartilhado; None se não der (disco, permissão)."""
+    path = os.path.join(SCRAPER_CACHE_DIR, LOCAL_CACHE_FILE)
+    try:
+        cache = LocalCache(
+            path, namespace, version,
+            max_age_s=max_age_days * 86400 if max_age_days else None,
+            max_entries=max_entries,
+        )
+        print(f"[CACHE] {namespace}: {path} (versao {version})")
+        return cache
+    except (sqlite3.Error, OSError) as e:
+        print(f"[CACHE] {namespace} desativado — falha ao abrir {path}: {e}")
+        return None
+
+
+_shared_caches = {}
+_shared_caches_lock = threading.Lock()
+
+
+def _get_shared_cache(namespace, version, max_age_days, max_entries):
+    """Singleton por namespace, compartilhado entre workers (abre na primeira chamada)."""
+    with _shared_caches_lock:
+        if namespace not in _shared_caches:
+            # None = tentativa de abrir já falhou; não tenta de novo a cada busca
+            _shared_caches[namespace] = open_local_cache(
+                namespace, version, max_age_days=max_age_days, max_entries=max_entries,
+            )
+        return _shared_caches[namespace]
+
+
+def get_match_decision_cache():
+    """Cache de decisões do matcher, ou None se desativado/indisponível."""
+    if not MATCH_DECISION_CACHE:
+        return None
+    return _get_shared_cache("match", MATCHER_FINGERPRINT,
+                             MATCH_CACHE_MAX_AGE_DAYS, MATCH_CACHE_MAX_ENTRIES)
+
+
+def get_llm_verdict_cache():
+    """Cache de veredictos do LLM, ou None se desativado/indisponível."""
+    if not LLM_VERDICT_CACHE:
+        return None
+    return _get_shared_cache("llm", LLM_VERDICT_VERSION,
+                             LLM_CACHE_TTL_DAYS, LLM_CACHE_MAX_ENTRIES)
+
+
+def opened_local_cache(namespace):
+    """Cache do namespace se já foi aberto nesta run (não abre — usado para estatísticas)."""
+    with _shared_caches_lock:
+        return _shared_caches.get(namespace)
+
+
+def close_local_caches():
+    """Grava o que estiver pendente e fecha todos os caches abertos (fim da run)."""
+    with _shared_caches_lock:
+        caches = [c for c in _shared_caches.values() if c]
+        _shared_caches.clear()
+    for cache in caches:
+        try:
+            cache.close()
+        except sqlite3.Error as e:
+            print(f"[CACHE] Falha ao fechar {cache.namespace}: {e}")
+
+
+def component_fingerprint(component):
+    """Hash dos campos do componente que influenciam o matching (model/brand/name/category/specs)."""
+    payload = json.dumps(
+        [component.get('model'), component.get('brand'), component.get('name'),
+         component.get('category'), component.get('specifications')],
+        sort_keys=True, default=str, ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_title(title):
+    """
+    Normalização do título para chaves de cache. Só lowercase: todo o matching já trabalha
+    em minúsculas, e mexer em espaços/pontuação poderia mudar a decisão (ex: "7600  xt").
+    """
+    return (title or "").lower()
+
+
+def match_decision_key(fingerprint, title):
+    return hashlib.sha1(f"{fingerprint}\x00{normalize_title(title)}".encode("utf-8")).hexdigest()
+
+
+_LLM_BATCH_LINE_RE = re.compile(r'^\s*(\d+)\s*[:.)\-]\s*(SIM|NÃO|NAO)\b', re.MULTILINE)
+
+
+def parse_llm_batch_answers(content):
+    """Extrai {número do par: "SIM"/"NÃO"} de uma resposta em lote (já em maiúsculas)."""
+    return {int(n): answer for n, answer in _LLM_BATCH_LINE_RE.findall(content or "")}
+
+
+def llm_verdict_key(product_name, component_name, model):
+    payload = "\x00".join([normalize_title(product_name), (component_name or "").lower(), (model or "").lower()])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# RATE LIMIT DO GROQ
+# ---------------------------------------------------------------------------
+
+# Limites do free tier p/ gpt-oss-120b (ver ask_gemini_batch). Ajustáveis se o plano mudar.
+GROQ_RPM_LIMIT = _env_int("GROQ_RPM_LIMIT", 30)
+GROQ_TPM_LIMIT = _env_int("GROQ_TPM_LIMIT", 8000)
+GROQ_RPD_LIMIT = _env_int("GROQ_RPD_LIMIT", 1000)
+GROQ_MAX_WAIT_S = _env_int("GROQ_MAX_WAIT_S", 30)   # espera máxima por vaga antes de desistir
+# Tempo mínimo reservado para o POST ao Groq dentro do prazo do componente: com menos que
+# isso sobrando, a verificação é pulada em vez de estourar o Deadline.
+LLM_MIN_CALL_BUDGET_S = 5
+GROQ_DEFAULT_COOLDOWN_S = 60                        # 429 sem Retry-After
+GROQ_USAGE_FILE = "groq_usage.json"                 # contagem diária, em SCRAPER_CACHE_DIR
+
+_GROQ_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+
+def parse_groq_duration(value):
+    """Converte durações dos headers do Groq ("2m59.56s", "7.66s", "250ms", "1h2m") em segundos."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _GROQ_DURATION_RE.findall(value)
+    if not parts:
+        return None
+    factors = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(n) * factors[unit] for n, unit in parts)
+
+
+def estimate_llm_tokens(prompt, max_completion_tokens):
+    """
+    Estimativa grosseira de tokens de uma chamada: ~3 caracteres por token para o prompt
+    (português com acentos e aspas rende menos que os ~4 do inglês) mais uma reserva para a
+    saída — que num modelo de raciocínio inclui o raciocínio oculto.
+    """
+    return math.ceil(len(prompt) / 3) + min(max_completion_tokens, 300)
+
+
+class _TokenBucket:
+    """Balde de tokens com capacidade `capacity` e reposição contínua de `per_second`."""
+
+    def __init__(self, capacity, per_second):
+        self.capacity = capacity
+        self.per_second = per_second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_second)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Segundos até haver `amount` tokens (pedidos maiores que a capacidade esperam encher)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.per_second
+
+    def consume(self, amount):
+        self._refill()
+        self.tokens -= amount  # pode ficar negativo (ajuste pelo uso real) — repõe com o tempo
+
+    def cap(self, available):
+        """Alinha com o que o servidor diz que resta (nunca aumenta)."""
+        self._refill()
+        self.tokens = min(self.tokens, float(available))
+
+
+class GroqRateLimiter:
+    """
+    [PERF] Limiter compartilhado por todos os workers (e pelo LLMFallbackResolver) para o
+    free tier do Groq. Substitui o par _last_llm_call/_llm_blocked_until por instância (que
+    com N workers deixava N vezes mais chamadas passarem) e o intervalo fixo de 2.5s:
+      - RPM e TPM são baldes de tokens (rajadas curtas permitidas, média respeitada);
+      - RPD é um contador por dia UTC persistido em SCRAPER_CACHE_DIR/groq_usage.json,
+        então runs do mesmo dia enxergam o que as anteriores já gastaram;
+      - headers do servidor mandam: Retry-After num 429, x-ratelimit-remaining-* e
+        x-ratelimit-reset-* realinham os baldes e o teto diário.
+    acquire() espera (fora do lock) até GROQ_MAX_WAIT_S por uma vaga; se não der, retorna
+    um motivo e a chamada é pulada (mesmo efeito do cooldown antigo: sem veredicto).
+    """
+
+    def __init__(self, rpm=GROQ_RPM_LIMIT, tpm=GROQ_TPM_LIMIT, rpd=GROQ_RPD_LIMIT,
+                 usage_path=None, max_wait_s=GROQ_MAX_WAIT_S):
+        self._lock = threading.Lock()
+        self.rpm = _TokenBucket(rpm, rpm / 60)
+        self.tpm = _TokenBucket(tpm, tpm / 60)
+        self.rpd = rpd
+        self.max_wait_s = max_wait_s
+        self.usage_path = usage_path
+        self.blocked_until = 0.0        # cooldown (time.time) após 429 / balde zerado no servidor
+        self.daily_blocked_until = 0.0  # servidor informou RPD esgotado
+        self.requests_made = 0
+        self.wait_seconds = 0.0
+        self.skipped = 0
+        self._day = None
+        self._day_requests = 0
+        self._day_tokens = 0
+        self._load_usage()
+
+    @staticmethod
+    def _today():
+        return time.strftime("%Y-%m-%d", time.gmtime())
+
+    def _load_usage(self):
+        self._day = self._today()
+        if not self.usage_path:
+            return
+        try:
+            with open(self.usage_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("date") == self._day:
+                self._day_requests = int(data.get("requests", 0))
+                self._day_tokens = int(data.get("tokens", 0))
+                print(f"[LLM] Uso Groq hoje (runs anteriores): {self._day_requests}/{self.rpd} requests")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"[LLM] Falha ao ler {self.usage_path}: {e}")
+
+    def _save_usage(self):
+        """Gravação atômica (arquivo temporário + os.replace) — nunca deixa JSON pela metade."""
+        if not self.usage_path:
+            return
+        payload = {"date": self._day, "requests": self._day_requests, "tokens": self._day_tokens}
+        try:
+            directory = os.path.dirname(self.usage_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".groq_usage.", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.usage_path)
+        except OSError as e:
+            print(f"[LLM] Falha ao gravar {self.usage_path}: {e}")
+            self.usage_path = None  # segue só em memória
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self._day:
+            self._day, self._day_requests, self._day_tokens = today, 0, 0
+            self.daily_blocked_until = 0.0
+
+    @property
+    def daily_requests(self):
+        with self._lock:
+            self._roll_day()
+            return self._day_requests
+
+    def acquire(self, estimated_tokens, max_wait_s=None):
+        """
+        Reserva uma request de `estimated_tokens`. Retorna None quando liberado, ou o motivo
+        ("cooldown", "daily_cap", "wait_limit") quando a chamada deve ser pulada.
+        max_wait_s: teto de espera desta chamada (prazo do componente), além de GROQ_MAX_WAIT_S.
+        """
+        max_wait = self.max_wait_s if max_wait_s is None else max(0.0, min(self.max_wait_s, max_wait_s))
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._roll_day()
+                now = time.time()
+                if self._day_requests >= self.rpd or now < self.daily_blocked_until:
+                    self.skipped += 1
+                    return "daily_cap"
+                wait = max(
+                    self.blocked_until - now,
+                    self.rpm.wait_time(1),
+                    self.tpm.wait_time(estimated_tokens),
+                )
+                if wait <= 0:
+                    self.rpm.consume(1)
+                    self.tpm.consume(estimated_tokens)
+                    self._day_requests += 1
+                    self._day_tokens += estimated_tokens
+                    self.requests_made += 1
+                    self.wait_seconds += waited
+                    self._save_usage()
+                    return None
+                if waited + wait > max_wait:
+                    self.skipped += 1
+                    self.wait_seconds += waited
+                    return "cooldown" if now < self.blocked_until else "wait_limit"
+            print(f"[LLM] Rate limiter — aguardando {wait:.1f}s")
+            time.sleep(wait)
+            waited += wait
+
+    def record_response(self, response, estimated_tokens, used_tokens=None):
+        """Realinha o limiter com o que o servidor respondeu (status, headers e uso real)."""
+        headers = response.headers or {}
+        with self._lock:
+            now = time.time()
+            if response.status_code == 429:
+                retry_after = parse_groq_duration(headers.get("retry-after"))
+                cooldown = retry_after if retry_after is not None else GROQ_DEFAULT_COOLDOWN_S
+                self.blocked_until = max(self.blocked_until, now + cooldown)
+                print(f"[LLM] Rate limit (429) — cooldown de {cooldown:.0f}s")
+
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            try:
+                remaining_tokens = float(remaining_tokens) if remaining_tokens is not None else None
+            except ValueError:
+                remaining_tokens = None
+            if remaining_tokens is not None:
+                self.tpm.cap(remaining_tokens)
+                if remaining_tokens <= 0:
+                    reset = parse_groq_duration(headers.get("x-ratelimit-reset-tokens"))
+                    if reset:
+                        self.blocked_until = max(self.blocked_until, now + reset)
+
+            # No Groq, *-requests se refere ao limite diário (RPD)
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            if remaining_requests is not None:
+                try:
+                    remaining_requests = int(float(remaining_requests))
+                except ValueError:
+                    remaining_requests = None
+            if remaining_requests is not None:
+                limit_requests = headers.get("x-ratelimit-limit-requests")
+                try:
+                    limit = int(float(limit_requests)) if limit_requests is not None else self.rpd
+                except ValueError:
+                    limit = self.rpd
+                self._day_requests = max(self._day_requests, limit - remaining_requests)
+                if remaining_requests <= 0:
+                    reset = parse_groq_duration(headers.get("x-ratelimit-reset-requests"))
+                    self.daily_blocked_until = now + (reset or GROQ_DEFAULT_COOLDOWN_S)
+
+            if used_tokens is not None and used_tokens != estimated_tokens:
+                # Corrige a reserva pela contagem real devolvida em "usage"
+                self.tpm.consume(used_tokens - estimated_tokens)
+                self._day_tokens += used_tokens - estimated_tokens
+            self._save_usage()
+
+
+_groq_rate_limiter = None
+_groq_rate_limiter_lock = threading.Lock()
+
+
+def get_groq_rate_limiter():
+    """GroqRateLimiter único do processo (compartilhado entre workers)."""
+    global _groq_rate_limiter
+    with _groq_rate_limiter_lock:
+        if _groq_rate_limiter is None:
+            _groq_rate_limiter = GroqRateLimiter(usage_path=os.path.join(SCRAPER_CACHE_DIR, GROQ_USAGE_FILE))
+        return _groq_rate_limiter
+
+
+# ---------------------------------------------------------------------------
+# RANKER DE CANDIDATOS (fallback LLM)
+# ---------------------------------------------------------------------------
+
+# [PERF] Classificador local (TF-IDF + regressão logística, Python puro) treinado com os
+# veredictos acumulados nos caches. Ordena os candidatos do fallback por probabilidade de
+# serem o produto (em vez de só pelos 3 mais baratos) e decide sozinho os casos claros;
+# só a faixa ambígua vai ao Groq. Requer LLM_VERDICT_CACHE (de onde vêm os rótulos).
+MATCH_RANKER = _env_flag("MATCH_RANKER")
+RANKER_ACCEPT_P = _env_float("RANKER_ACCEPT_P", 0.9)
+RANKER_REJECT_P = _env_float("RANKER_REJECT_P", 0.1)
+RANKER_FILE = "match_ranker.json"        # pesos, em SCRAPER_CACHE_DIR
+RANKER_FEATURES_VERSION = 1              # suba ao mudar featurize(): pesos antigos são ignorados
+RANKER_MIN_SAMPLES = 200                 # mínimo de exemplos para treinar
+RANKER_MIN_LLM_SAMPLES = 30              # mínimo de veredictos do LLM para decidir localmente
+RANKER_MAX_TRAIN_SAMPLES = 20000
+RANKER_MATCHER_WEIGHT = 0.2              # decisões do matcher pesam menos que veredictos do LLM
+
+_RANKER_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def _ranker_tokens(text):
+    return _RANKER_TOKEN_RE.findall((text or "").lower())
+
+
+def _sigmoid(z):
+    if z < -35:
+        return 0.0
+    if z > 35:
+        return 1.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+class MatchRanker:
+    """
+    Regressão logística sobre features esparsas de um par (componente, título):
+      - TF-IDF dos tokens do título ("w:<token>") — pega palavras de acessório/variante;
+      - cobertura dos tokens do modelo e do nome do componente no título, números do
+        modelo ausentes, números "extras" no título, presença de " para ".
+    Treino por gradiente descendente em lote (com L2) — sem numpy/sklearn, roda em
+    segundos para RANKER_MAX_TRAIN_SAMPLES exemplos.
+    """
+
+    def __init__(self, idf, weights, bias, samples=0, llm_samples=0, can_settle=False):
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.samples = samples
+        self.llm_samples = llm_samples
+        self.can_settle = can_settle
+
+    @staticmethod
+    def pair_features(title, component_name, model):
+        """Features que dependem do par (não do vocabulário)."""
+        title_tokens = _ranker_tokens(title)
+        title_set = set(title_tokens)
+        title_compact = "".join(title_tokens)
+        model_tokens = _ranker_tokens(model)
+        name_tokens = [t for t in _ranker_tokens(component_name) if len(t) >= 2]
+        model_numbers = [t for t in model_tokens if _DIGIT_RE.search(t)]
+        known_numbers = {t for t in model_tokens + name_tokens if _DIGIT_RE.search(t)}
+
+        features = {"bias_pair": 1.0}
+        if model_tokens:
+            features["model_cov"] = sum(t in title_compact for t in model_tokens) / len(model_tokens)
+        if name_tokens:
+            features["name_cov"] = sum(t in title_set for t in name_tokens) / len(name_tokens)
+        if model_numbers:
+            features["model_num_missing"] = sum(t not in title_compact for t in model_numbers) / len(model_numbers)
+        extra_numbers = [t for t in title_set if _DIGIT_RE.search(t) and t not in known_numbers]
+        features["extra_numbers"] = min(len(extra_numbers), 10) / 10
+        features["title_len"] = min(len(title_tokens), 40) / 40
+        if " para " in f" {(title or '').lower()} ":
+            features["has_para"] = 1.0
+        return features, title_tokens
+
+    def featurize(self, title, component_name, model):
+        features, title_tokens = self.pair_features(title, component_name, model)
+        counts = {}
+        for token in title_tokens:
+            counts[token] = counts.get(token, 0) + 1
+        norm = 0.0
+        tfidf = {}
+        for token, count in counts.items():
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            tfidf["w:" + token] = count * idf
+            norm += (count * idf) ** 2
+        if norm:
+            norm = math.sqrt(norm)
+            for name, value in tfidf.items():
+                features[name] = value / norm
+        return features
+
+    def score(self, title, component_name, model):
+        """Probabilidade estimada de o título ser o produto buscado."""
+        z = self.bias + sum(self.weights.get(f, 0.0) * v for f, v in self.featurize(title, component_name, model).items())
+        return _sigmoid(z)
+
+    @classmethod
+    def train(cls, samples, epochs=150, lr=2.0, l2=1e-4):
+        """
+        samples: lista de (título, nome do componente, modelo, rótulo 0/1, peso, é_do_llm).
+        Retorna o MatchRanker treinado, ou None se os dados não bastam.
+        """
+        labels = {s[3] for s in samples}
+        if len(samples) < RANKER_MIN_SAMPLES or labels != {0, 1}:
+            return None
+
+        doc_freq = {}
+        for title, *_rest in samples:
+            for token in set(_ranker_tokens(title)):
+                doc_freq[token] = doc_freq.get(token, 0) + 1
+        n_docs = len(samples)
+        # Tokens raros demais viram ruído (e incham o JSON de pesos)
+        idf = {t: math.log((1 + n_docs) / (1 + df)) + 1 for t, df in doc_freq.items() if df >= 2}
+
+        ranker = cls(idf, {}, 0.0)
+        rows = [(ranker.featurize(t, name, model), label, weight) for t, name, model, label, weight, _ in samples]
+        total_weight = sum(w for _f, _l, w in rows)
+
+        weights = {}
+        bias = 0.0
+        for _ in range(epochs):
+            grad = {}
+            grad_bias = 0.0
+            for features, label, weight in rows:
+                z = bias + sum(weights.get(f, 0.0) * v for f, v in features.items())
+                err = (_sigmoid(z) - label) * weight
+                grad_bias += err
+                for f, v in features.items():
+                    grad[f] = grad.get(f, 0.0) + err * v
+            bias -= lr * grad_bias / total_weight
+            for f, g in grad.items():
+                w = weights.get(f, 0.0)
+                weights[f] = w - lr * (g / total_weight + l2 * w)
+
+        llm_rows = [s for s in samples if s[5]]
+        llm_labels = [s[3] for s in llm_rows]
+        can_settle = (
+            len(llm_rows) >= RANKER_MIN_LLM_SAMPLES
+            and min(llm_labels.count(0), llm_labels.count(1)) >= 5
+        )
+        ranker.weights = {f: round(w, 5) for f, w in weights.items() if abs(w) >= 1e-4}
+        ranker.bias = bias
+        ranker.samples = len(samples)
+        ranker.llm_samples = len(llm_rows)
+        ranker.can_settle = can_settle
+        return ranker
+
+    def to_json(self):
+        return {
+            "features_version": RANKER_FEATURES_VERSION,
+            "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "samples": self.samples,
+            "llm_samples": self.llm_samples,
+            "can_settle": self.can_settle,
+            "bias": self.bias,
+            "idf": {t: round(v, 4) for t, v in self.idf.items()},
+            "weights": self.weights,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get("features_version") != RANKER_FEATURES_VERSION:
+            return None
+        return cls(data["idf"], data["weights"], data["bias"], data.get("samples", 0),
+                   data.get("llm_samples", 0), data.get("can_settle", False))
+
+
+def collect_ranker_samples():
+    """Exemplos de treino a partir dos caches de veredictos do LLM e de decisões do matcher."""
+    samples = []
+    llm_cache = get_llm_verdict_cache()
+    if llm_cache:
+        for v in llm_cache.iter_values():
+            samples.append((v.get("title"), v.get("component"), v.get("model"),
+                            1 if v.get("match") else 0, 1.0, True))
+    match_cache = get_match_decision_cache()
+    if match_cache:
+        decisions = [
+            v for v in match_cache.iter_values()
+            # Exclusão por keyword nunca chega ao fallback — não ensina nada útil aqui
+            if v.get("code") != "exclusion"
+        ]
+        room = max(0, RANKER_MAX_TRAIN_SAMPLES - len(samples))
+        if len(decisions) > room:
+            decisions = random.Random(0).sample(decisions, room)
+        for v in decisions:
+            samples.append((v.get("title"), v.get("name"), v.get("model"),
+                            1 if v.get("accepted") else 0, RANKER_MATCHER_WEIGHT, False))
+    return [s for s in samples if s[0] and s[2]]
+
+
+_match_ranker = None
+_match_ranker_lock = threading.Lock()
+
+
+def get_match_ranker():
+    """
+    MatchRanker da run (treinado uma vez, na primeira chamada — main() chama antes dos
+    workers), ou None. Treina com os caches; sem dados suficientes, reaproveita os
+    últimos pesos salvos.
+    """
+    global _match_ranker
+    if not MATCH_RANKER:
+        return None
+    with _match_ranker_lock:
+        if _match_ranker is not None:
+            return _match_ranker or None
+        path = os.path.join(SCRAPER_CACHE_DIR, RANKER_FILE)
+        ranker = None
+        try:
+            started = time.time()
+            ranker = MatchRanker.train(collect_ranker_samples())
+            if ranker:
+                print(f"[RANKER] Treinado com {ranker.samples} exemplos ({ranker.llm_samples} do LLM) "
+                      f"em {time.time() - started:.1f}s | decisao local: {ranker.can_settle}")
+                os.makedirs(SCRAPER_CACHE_DIR, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(ranker.to_json(), f)
+        except (OSError, sqlite3.Error) as e:
+            print(f"[RANKER] Falha no treino: {e}")
+        if ranker is None:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    ranker = MatchRanker.from_json(json.load(f))
+                if ranker:
+                    print(f"[RANKER] Pesos carregados de {path} ({ranker.samples} exemplos)")
+            except (OSError, ValueError, KeyError):
+                ranker = None
+        if ranker is None:
+            print("[RANKER] Sem dados suficientes — fallback LLM segue pelos mais baratos")
+        _match_ranker = ranker or False
+        return ranker
+
+
+# ---------------------------------------------------------------------------
+# PRAZO POR COMPONENTE
+# ---------------------------------------------------------------------------
+
+PAGE_LOAD_TIMEOUT_S = 45  # teto do driver.get (antes fixo em setup_driver)
+SCRIPT_TIMEOUT_S = 30     # teto dos execute_script (extratores JS, filtro, scroll)
+MIN_VERIFY_BUDGET_S = 20  # abaixo disso, a checagem de vendedor da Amazon é pulada
+
+
+class Deadline:
+    """
+    [PERF] Prazo de um componente, passado pelas buscas até cada espera e sleep. Toda
+    espera vira min(espera, tempo restante): um componente atrasado encurta scrolls e
+    delays e pula etapas opcionais, em vez de estourar o watchdog e perder tudo.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def clamp(self, seconds):
+        return min(seconds, self.remaining())
+
+    def sleep(self, seconds):
+        time.sleep(self.clamp(seconds))
+
+
+def clamp_wait(deadline, seconds):
+    """Espera de `seconds`, limitada ao prazo quando houver um."""
+    return deadline.clamp(seconds) if deadline else seconds
+
+
+# ---------------------------------------------------------------------------
+# PROCESSOS DO CHROME (/proc)
+# ---------------------------------------------------------------------------
+
+def process_tree(root_pid):
+    """
+    PIDs da árvore de processos de root_pid (ele incluso, descendentes depois), lida de
+    /proc/<pid>/stat. Fora do Linux (sem /proc), devolve só [root_pid].
+    """
+    children = {}
+    try:
+        pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return [root_pid]
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", encoding="utf-8", errors="replace") as f:
+                stat = f.read()
+        except OSError:
+            continue  # processo já terminou
+        # O nome (campo 2) vem entre parênteses e pode ter espaços: o ppid vem depois do ")"
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1:
+            children.setdefault(int(fields[1]), []).append(pid)
+
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def _process_memory_kb(pid):
+    """
+    Memória de um processo em KB: PSS (smaps_rollup) quando disponível — somar RSS de
+    todos os processos do Chrome conta várias vezes as páginas compartilhadas entre eles —
+    senão VmRSS. 0 se o processo sumiu.
+    """
+    for path, field in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+    return 0
+
+
+def process_tree_memory_mb(root_pid):
+    """Memória somada (MB) da árvore de processos de root_pid."""
+    return sum(_process_memory_kb(pid) for pid in process_tree(root_pid)) / 1024
+
+
+def kill_process_tree(root_pid):
+    """SIGKILL em toda a árvore (folhas primeiro). Retorna quantos processos foram mortos."""
+    killed = 0
+    for pid in reversed(process_tree(root_pid)):
+        try:
+            os.kill(pid, signal.SIGKILL)
+            killed += 1
+        except (ProcessLookupError, PermissionError):
+            pass
+    return killed
+
+
+# [PERF] Reciclagem do Chrome: um Chrome vivo por 5h acumula heap e renderers vazando, o
+# que deixa as páginas finais mais lentas e às vezes derruba a sessão. Entre componentes,
+# o worker mede a memória da árvore chromedriver + Chrome e o número de navegações e
+# recria o driver quando um dos limites é cruzado (0 = limite desligado).
+DRIVER_MAX_MEMORY_MB = max(0, _env_int("DRIVER_MAX_MEMORY_MB", 0))
+DRIVER_MAX_NAVIGATIONS = max(0, _env_int("DRIVER_MAX_NAVIGATIONS", 0))
+# quit() educado antes de matar a árvore: com renderer travado ele bloquearia pelo timeout
+# de comando inteiro do Selenium, então roda numa thread com este teto.
+DRIVER_QUIT_TIMEOUT_S = 10
+
+# [PERF] Ressurreição do driver: antes de cada componente a sessão é testada; se o Chrome
+# morreu ("invalid session id", renderer desconectado), é recriado com backoff exponencial
+# em vez de todas as buscas seguintes falharem como erro técnico até o fim da run.
+SESSION_RESURRECT_ATTEMPTS = max(1, _env_int("SESSION_RESURRECT_ATTEMPTS", 4))
+SESSION_RESURRECT_BACKOFF_S = 5  # 5s, 10s, 20s... entre tentativas
+
+
+# ---------------------------------------------------------------------------
+# PERFIL PERSISTENTE DO CHROME
+# ---------------------------------------------------------------------------
+# [PERF] Com CHROME_PROFILE_DIR, cada sessão (worker e peer da Amazon) usa um
+# --user-data-dir próprio e persistente: cookies, consentimentos, service workers e o
+# cache HTTP dos bundles estáticos da Kabum/Amazon sobrevivem entre runs (páginas
+# "quentes" carregam menos e parecem menos com robô). Um diretório por sessão — o Chrome
+# não aceita dois processos no mesmo perfil.
+CHROME_PROFILE_DIR = os.environ.get("CHROME_PROFILE_DIR", "")
+CHROME_DISK_CACHE_MB = max(1, _env_int("CHROME_DISK_CACHE_MB", 150))
+CHROME_PROFILE_MAX_MB = max(CHROME_DISK_CACHE_MB, _env_int("CHROME_PROFILE_MAX_MB", 400))
+# Partes descartáveis do perfil (cache), apagadas primeiro quando ele passa do limite
+_PROFILE_PRUNABLE = ("disk-cache", "GrShaderCache", "ShaderCache", "GraphiteDawnCache",
+                     os.path.join("Default", "Cache"), os.path.join("Default", "Code Cache"),
+                     os.path.join("Default", "Service Worker", "CacheStorage"))
+# Travas que o Chrome deixa no perfil quando morre sem fechar (SIGKILL, container novo
+# com outro hostname) e que fazem o próximo Chrome recusar o perfil como "em uso"
+_PROFILE_LOCKS = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+
+def dir_size_mb(path):
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total / 1_048_576
+
+
+def prepare_chrome_profile(path):
+    """
+    Deixa o perfil pronto para um Chrome novo: remove travas órfãs e, se passou de
+    CHROME_PROFILE_MAX_MB, apaga os caches (e, se ainda não bastar, o perfil inteiro).
+    Só é chamado com o Chrome anterior desta sessão já encerrado. Retorna True se o
+    perfil já existia (partida "quente").
+    """
+    os.makedirs(path, exist_ok=True)
+    for name in _PROFILE_LOCKS:
+        lock = os.path.join(path, name)
+        if os.path.lexists(lock):
+            try:
+                os.unlink(lock)
+            except OSError as e:
+                print(f"[PROFILE] Falha ao remover {lock}: {e}")
+
+    size_mb = dir_size_mb(path)
+    if size_mb > CHROME_PROFILE_MAX_MB:
+        for name in _PROFILE_PRUNABLE:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        pruned_mb = dir_size_mb(path)
+        print(f"[PROFILE] {path}: {size_mb:.0f}MB > {CHROME_PROFILE_MAX_MB}MB — caches apagados ({pruned_mb:.0f}MB)")
+        if pruned_mb > CHROME_PROFILE_MAX_MB:
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path, exist_ok=True)
+            print(f"[PROFILE] {path}: ainda acima do limite — perfil recriado do zero")
+
+    return os.path.isdir(os.path.join(path, "Default"))
+
+
 class PriceScraper:
     """Web scraper para buscar preços em Kabum e Amazon com comportamento humanizado"""
 
-    def __init__(self):
+    def __init__(self, worker_id=0, parallel_stores=None, is_peer=False, with_browser=True):
+        # [PERF] worker_id identifica a instância dentro do pool de workers de main()
+        # (cada worker tem seu próprio Chrome). Usado para não colidir a porta de debug.
+        # with_browser=False monta só os helpers sem Chrome (host do LLMFallbackResolver).
+        self.worker_id = worker_id
+        self.is_peer = is_peer
         self.driver = None
-        self._llm_blocked_until = 0
-        self._last_llm_call = 0
-        self.setup_driver()
+        self.blocking_profile = NETWORK_BLOCKING_PROFILE
+        if self.blocking_profile not in NETWORK_BLOCKING_PROFILES:
+            print(f"[NET] Perfil de bloqueio desconhecido '{self.blocking_profile}' — usando 'off'")
+            self.blocking_profile = "off"
+        # [PERF] LLMFallbackResolver de main() quando ASYNC_LLM_FALLBACK está ligado
+        self.llm_resolver = None
+        # [PERF] Métricas do governador de memória (ver govern_memory)
+        self.navigations = 0
+        self.driver_recycles = 0
+        self.memory_peak_mb = 0.0
+        # [PERF] Perfil persistente (CHROME_PROFILE_DIR), um por sessão
+        self.profile_dir = None
+        if CHROME_PROFILE_DIR and with_browser:
+            self.profile_dir = os.path.abspath(os.path.join(
+                CHROME_PROFILE_DIR, f"w{worker_id}" + ("-amazon" if is_peer else "")
+            ))
+        self.profile_warm_starts = 0
+        self.profile_cold_starts = 0
+        # Mesmo user-agent no Chrome e na sessão HTTP do caminho rápido
+        self.user_agent = random.choice(USER_AGENTS)
+        self.http = self.build_http_session() if HTTP_FIRST_FETCH else None
+        if with_browser:
+            self.setup_driver()
+
+        # [PERF] Sessão dedicada à Amazon quando a busca por loja é paralela. É um
+        # PriceScraper completo (mesmos helpers), só que com outro Chrome.
+        self.amazon_peer = None
+        self.peer_disabled = False  # peer irrecuperável: busca sequencial até o fim da run
+        if parallel_stores is None:
+            parallel_stores = PARALLEL_STORE_SEARCH
+        if parallel_stores and not is_peer and self.driver:
+            peer = PriceScraper(worker_id=worker_id, parallel_stores=False, is_peer=True)
+            if peer.driver:
+                self.amazon_peer = peer
+            else:
+                print(f"[W{worker_id}] Sessao dedicada da Amazon falhou — busca por loja fica sequencial")
 
     def setup_driver(self):
         """Configura Chrome com comportamento humanizado"""
@@ -155,17 +1870,27 @@ class PriceScraper:
             chrome_options.add_argument("--disable-dev-shm-usage")
             chrome_options.add_argument("--disable-gpu")
             chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--remote-debugging-port=9222")
+            # Porta de debug por worker/sessão — com vários Chromes em paralelo, a 9222 fixa
+            # colidia. Cada worker reserva duas portas (sessão principal + peer da Amazon).
+            debug_port = 9222 + 2 * self.worker_id + (1 if self.is_peer else 0)
+            chrome_options.add_argument(f"--remote-debugging-port={debug_port}")
 
             chrome_options.add_argument("--disable-blink-features=AutomationControlled")
             chrome_options.add_argument("--disable-extensions")
             chrome_options.add_argument("--disable-plugins-discovery")
 
-            user_agents = [
-                "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
-            ]
-            chrome_options.add_argument(f"--user-agent={random.choice(user_agents)}")
+            chrome_options.add_argument(f"--user-agent={self.user_agent}")
+
+            if self.profile_dir:
+                warm = prepare_chrome_profile(self.profile_dir)
+                if warm:
+                    self.profile_warm_starts += 1
+                else:
+                    self.profile_cold_starts += 1
+                print(f"[PROFILE] {self.profile_dir} ({'quente' if warm else 'frio'})")
+                chrome_options.add_argument(f"--user-data-dir={self.profile_dir}")
+                chrome_options.add_argument(f"--disk-cache-dir={os.path.join(self.profile_dir, 'disk-cache')}")
+                chrome_options.add_argument(f"--disk-cache-size={CHROME_DISK_CACHE_MB * 1_048_576}")
 
             chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
             chrome_options.add_experimental_option('useAutomationExtension', False)
@@ -174,6 +1899,11 @@ class PriceScraper:
             chrome_options.add_argument("--disable-web-security")
             chrome_options.add_argument("--allow-running-insecure-content")
 
+            if self.blocking_profile != "off" or self.profile_dir:
+                # Log de performance = eventos Network.* do CDP, usados no relatório de
+                # requisições bloqueadas/bytes economizados/hits do cache de disco por página.
+                chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
             chromedriver_path = os.environ.get("CHROME_DRIVER_PATH", "/usr/local/bin/chromedriver")
             if os.path.exists(chromedriver_path):
                 service = Service(chromedriver_path)
@@ -181,25 +1911,119 @@ class PriceScraper:
                 service = Service(ChromeDriverManager().install())
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
 
-            self.driver.set_page_load_timeout(45)
-            self.driver.set_script_timeout(30)
+            self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT_S)
+            self.driver.set_script_timeout(SCRIPT_TIMEOUT_S)
 
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             self.driver.execute_script("Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]})")
             self.driver.execute_script("Object.defineProperty(navigator, 'languages', {get: () => ['pt-BR', 'pt', 'en']})")
 
+            self.apply_blocking_profile()
+
+            self.navigations = 0
             return True
 
-        except Exception as e:
-            print(f"ERRO CRITICO: Falha ao configurar driver - {e}")
-            self.driver = None
-            return False
+        except Exception as e:
+            print(f"ERRO CRITICO: Falha ao configurar driver - {e}")
+            self.driver = None
+            return False
+
+    def apply_blocking_profile(self):
+        """
+        [PERF] Aplica o perfil de bloqueio de rede (NETWORK_BLOCKING_PROFILES) via CDP.
+        Falha aqui não é crítica: o scraper só segue sem bloqueio.
+        """
+        patterns = NETWORK_BLOCKING_PROFILES.get(self.blocking_profile) or []
+        if not patterns:
+            return False
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+            print(f"[NET] Perfil de bloqueio '{self.blocking_profile}' aplicado ({len(patterns)} padroes)")
+            return True
+        except Exception as e:
+            print(f"[NET] Falha ao aplicar perfil de bloqueio: {e}")
+            return False
+
+    def collect_network_report(self, page_label):
+        """
+        [PERF] Consome o log de performance do Chrome desde a última coleta e resume o
+        efeito do perfil de bloqueio: requisições feitas, bloqueadas (por tipo), bytes
+        efetivamente transferidos e bytes economizados (estimados), além das respostas
+        servidas pelo cache de disco (perfil persistente). Retorna None quando nem o
+        bloqueio nem o perfil persistente estão ligados, ou o log não está disponível.
+        """
+        if (self.blocking_profile == "off" and not self.profile_dir) or not self.driver:
+            return None
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return None
+        if not entries:
+            return None
+
+        requests_sent = 0
+        bytes_loaded = 0
+        cache_hits = 0
+        blocked_by_type = {}
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params") or {}
+            if method == "Network.requestWillBeSent":
+                requests_sent += 1
+            elif method == "Network.responseReceived":
+                if (params.get("response") or {}).get("fromDiskCache"):
+                    cache_hits += 1
+            elif method == "Network.loadingFinished":
+                bytes_loaded += int(params.get("encodedDataLength") or 0)
+            elif method == "Network.loadingFailed" and params.get("blockedReason") == "inspector":
+                resource_type = params.get("type") or "Other"
+                blocked_by_type[resource_type] = blocked_by_type.get(resource_type, 0) + 1
+
+        blocked = sum(blocked_by_type.values())
+        bytes_saved_est = sum(
+            count * _ESTIMATED_BYTES_BY_RESOURCE_TYPE.get(resource_type, _ESTIMATED_BYTES_BY_RESOURCE_TYPE["Other"])
+            for resource_type, count in blocked_by_type.items()
+        )
+        report = {
+            "profile": self.blocking_profile,
+            "requests": requests_sent,
+            "blocked_requests": blocked,
+            "blocked_by_type": blocked_by_type,
+            "bytes_loaded": bytes_loaded,
+            "bytes_saved_est": bytes_saved_est,
+            "cache_hits": cache_hits,
+        }
+        print(
+            f"[NET] {page_label} perfil={self.blocking_profile} | bloqueadas {blocked}/{requests_sent} "
+            f"| economia ~{bytes_saved_est / 1024:.0f}KB | transferido {bytes_loaded / 1024:.0f}KB"
+            f" | cache de disco {cache_hits}"
+        )
+        return report
 
     def ask_gemini_is_match(self, product_name, component_name, model):
         """
         Usa Groq (openai/gpt-oss-120b) como segunda opinião quando is_exact_product_match rejeita.
         Retorna True se o LLM confirma que é o mesmo produto, False caso contrário
-        ou em caso de erro.
+        ou em caso de erro. Atalho de ask_gemini_batch para um único par.
+        """
+        return self.ask_gemini_batch([{
+            "product_name": product_name, "component_name": component_name, "model": model,
+        }])[0] is True
+
+    def ask_gemini_batch(self, items, deadline=None):
+        """
+        [PERF] Verificação em lote: manda N pares (produto buscado, título da loja) numa única
+        chamada ao Groq e lê uma resposta por par ("1: SIM", "2: NÃO", ...). Os itens podem ser
+        de componentes diferentes — cada par carrega seu próprio produto buscado.
+
+        items: lista de dicts {product_name, component_name, model}.
+        Retorna uma lista alinhada com items: True/False pelo veredicto, None quando não houve
+        resposta para o item (sem chave, cooldown, erro, linha ausente na resposta).
 
         Free tier Groq p/ gpt-oss-120b: 30 RPM, 1.000 RPD, 8.000 TPM, 200.000 TPD.
         gpt-oss-120b é um modelo de raciocínio: reasoning_effort="low" mantém custo/latência
@@ -207,35 +2031,59 @@ class PriceScraper:
         final (sem isso, o texto de raciocínio viria junto e quebraria o parsing de SIM/NÃO).
         Por consumir mais tokens por chamada que o modelo antigo (llama-3.3-70b-versatile,
         descontinuado pelo Groq em 16/08/2026), o TPM (8.000/min) tende a ser o limite mais
-        provável de bater antes do RPM — daí o intervalo de 2.5s abaixo (era 2s).
-        """
-        if not GROQ_API_KEY:
-            return False
+        provável de bater antes do RPM. O espaçamento fica com o GroqRateLimiter compartilhado
+        (RPM/TPM/RPD + headers do servidor). Em lote, as regras do prompt são enviadas uma
+        vez só para todos os pares, e a vaga do limiter é paga uma vez por lote.
 
-        # Cooldown de segurança após 429 (60s)
-        if time.time() < self._llm_blocked_until:
-            remaining = int(self._llm_blocked_until - time.time())
-            print(f"[LLM] Cooldown ativo — {remaining}s restantes")
-            return False
-
-        # Rate limiter proativo: intervalo mínimo de 2.5s entre chamadas.
-        if self._last_llm_call > 0:
-            elapsed = time.time() - self._last_llm_call
-            if elapsed < 2.5:
-                wait = 2.5 - elapsed
-                print(f"[LLM] Rate limiter — aguardando {wait:.1f}s")
-                time.sleep(wait)
+        [PERF] Com LLM_VERDICT_CACHE, veredictos já obtidos são reaproveitados antes do
+        rate limiter — um hit não gasta request do free tier nem espera.
+        Só respostas válidas do LLM são cacheadas (erro/429 nunca viram "NÃO" persistente).
 
+        deadline: com ele, a espera por vaga no limiter e o timeout do POST ficam dentro do
+        tempo restante do componente (sem tempo sobrando, a chamada é pulada como num cooldown).
+        """
+        verdicts = [None] * len(items)
+        if not GROQ_API_KEY or not items:
+            return verdicts
+
+        verdict_cache = get_llm_verdict_cache()
+        cache_keys = [
+            llm_verdict_key(it["product_name"], it["component_name"], it["model"]) if verdict_cache else None
+            for it in items
+        ]
+        if verdict_cache:
+            cached = verdict_cache.get_many(cache_keys)
+            for i, it in enumerate(items):
+                hit = cached.get(cache_keys[i])
+                if hit is not None:
+                    verdicts[i] = hit["match"]
+                    print(f"[LLM] (cache) '{it['product_name'][:60]}' → {hit['answer']} (match={hit['match']})")
+
+        pending = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        if not pending:
+            return verdicts
+
+        # Pares agrupados por produto buscado: cada componente aparece uma vez no prompt e
+        # seus títulos vêm numerados embaixo (a numeração é global, na ordem de pending)
+        groups = {}
+        for n, i in enumerate(pending, 1):
+            groups.setdefault((items[i]["component_name"], items[i]["model"]), []).append(
+                f'  {n}. "{items[i]["product_name"]}"'
+            )
+        pairs = "\n".join(
+            f'Produto buscado: "{component_name}" (modelo: {model}) — encontrados na loja:\n' + "\n".join(lines)
+            for (component_name, model), lines in groups.items()
+        )
         prompt = (
             f'Você é especialista em hardware de computador. '
-            f'Decida se estes dois itens são EXATAMENTE o mesmo produto.\n\n'
-            f'Produto buscado: "{component_name}" (modelo: {model})\n'
-            f'Produto encontrado na loja: "{product_name}"\n\n'
+            f'Para cada item numerado abaixo, decida se o produto encontrado na loja é EXATAMENTE '
+            f'o mesmo produto buscado acima dele.\n\n'
+            f'{pairs}\n\n'
             f'REGRAS OBRIGATÓRIAS — responda NÃO se qualquer uma for verdade:\n'
             f'- As marcas são diferentes (ex: XPG vs C3Tech, Corsair vs Redragon)\n'
             f'- O modelo é diferente (ex: Pylon vs Kyber, Core Reactor vs PS-G850)\n'
             f'- É apenas um produto similar da mesma categoria (ex: outra fonte 550W)\n\n'
-            f'Responda APENAS com SIM ou NÃO, sem mais texto.\n'
+            f'Responda APENAS com uma linha por item, no formato "N: SIM" ou "N: NÃO", sem mais texto.\n'
             f'SIM = definitivamente o mesmo produto, com nome abreviado ou variante\n'
             f'NÃO = produto diferente, marca diferente, ou modelo diferente'
         )
@@ -246,42 +2094,91 @@ class PriceScraper:
             "Content-Type": "application/json",
         }
         body = {
-            "model": "openai/gpt-oss-120b",
+            "model": GROQ_MODEL,
             "messages": [{"role": "user", "content": prompt}],
-            "max_completion_tokens": 500,
+            "max_completion_tokens": 500 + 100 * (len(pending) - 1),
             "temperature": 0,
             "reasoning_effort": "low",
             "reasoning_format": "hidden",
         }
 
-        self._last_llm_call = time.time()
+        if deadline and deadline.remaining() < LLM_MIN_CALL_BUDGET_S:
+            print(f"[DEADLINE] {deadline.remaining():.0f}s restantes — verificacao LLM pulada")
+            return verdicts
+        limiter = get_groq_rate_limiter()
+        estimated_tokens = estimate_llm_tokens(prompt, body["max_completion_tokens"])
+        skip_reason = limiter.acquire(
+            estimated_tokens,
+            max_wait_s=deadline.remaining() - LLM_MIN_CALL_BUDGET_S if deadline else None,
+        )
+        if skip_reason:
+            print(f"[LLM] Chamada pulada pelo rate limiter ({skip_reason})")
+            return verdicts
 
         try:
-            response = requests.post(url, json=body, headers=headers, timeout=10)
+            timeout = clamp_wait(deadline, 10 + 2 * len(pending))
+            response = requests.post(url, json=body, headers=headers, timeout=max(1.0, timeout))
 
             if response.status_code == 429:
-                self._llm_blocked_until = time.time() + 60
-                print(f"[LLM] Rate limit (429) — cooldown de 60s ativado")
-                return False
+                limiter.record_response(response, estimated_tokens)
+                return verdicts
 
             response.raise_for_status()
 
-            answer = (
-                response.json()
-                ["choices"][0]["message"]["content"]
-                .strip()
-                .upper()
+            payload = response.json()
+            limiter.record_response(
+                response, estimated_tokens, (payload.get("usage") or {}).get("total_tokens")
             )
-            result = answer.startswith("SIM")
-            print(f"[LLM] '{product_name[:60]}' → {answer} (match={result})")
-            return result
+            content = payload["choices"][0]["message"]["content"].strip().upper()
+            answers = parse_llm_batch_answers(content)
+            if len(pending) == 1 and not answers and content:
+                # Resposta sem numeração para um par só ("SIM"/"NÃO"): aceita como a do item 1
+                answers = {1: content}
+
+            new_entries = {}
+            for n, i in enumerate(pending, 1):
+                it = items[i]
+                answer = answers.get(n)
+                if answer is None:
+                    print(f"[LLM] '{it['product_name'][:60]}' → sem resposta no lote")
+                    continue
+                result = answer.startswith("SIM")
+                verdicts[i] = result
+                print(f"[LLM] '{it['product_name'][:60]}' → {answer} (match={result})")
+                if verdict_cache:
+                    new_entries[cache_keys[i]] = {
+                        "match": result, "answer": answer[:20], "title": it["product_name"],
+                        "component": it["component_name"], "model": it["model"],
+                    }
+            if new_entries:
+                verdict_cache.put_many(new_entries)
+                # Veredicto custa request do free tier: grava já, não espera o lote
+                verdict_cache.flush()
+            return verdicts
 
         except Exception as e:
             print(f"[LLM] Erro na validacao: {e}")
-            return False
+            return verdicts
+
+    def navigate(self, url, deadline=None):
+        """driver.get com os timeouts de carregamento e de script limitados ao prazo do componente."""
+        self.driver.set_page_load_timeout(max(1, clamp_wait(deadline, PAGE_LOAD_TIMEOUT_S)))
+        self.clamp_script_timeout(deadline)
+        self.navigations += 1
+        self.driver.get(url)
+
+    def clamp_script_timeout(self, deadline):
+        """
+        Limita o timeout dos execute_script ao que resta do prazo (refeito antes das
+        extrações). Sem prazo, volta ao SCRIPT_TIMEOUT_S cheio.
+        """
+        self.driver.set_script_timeout(max(1, clamp_wait(deadline, SCRIPT_TIMEOUT_S)))
 
-    def wait_for_page_load(self, timeout=30):
+    def wait_for_page_load(self, timeout=30, deadline=None):
         """Espera página carregar completamente"""
+        timeout = clamp_wait(deadline, timeout)
+        if timeout <= 0:
+            return False
         try:
             WebDriverWait(self.driver, timeout).until(
                 lambda driver: driver.execute_script("return document.readyState") == "complete"
@@ -335,19 +2232,22 @@ class PriceScraper:
             print(f"ERRO: Falha na digitacao - {e}")
             return False
 
-    def human_delay(self, min_sec=1, max_sec=3):
+    def human_delay(self, min_sec=1, max_sec=3, deadline=None):
         """Delay humanizado"""
-        time.sleep(random.uniform(min_sec, max_sec))
+        time.sleep(clamp_wait(deadline, random.uniform(min_sec, max_sec)))
 
-    def progressive_scroll(self, max_scrolls=8):
+    def progressive_scroll(self, max_scrolls=8, deadline=None):
         """Scroll progressivo para carregar todos os produtos (lazy loading)"""
         try:
             last_height = self.driver.execute_script("return document.body.scrollHeight")
             scrolls_without_change = 0
 
             for i in range(max_scrolls):
+                if deadline and deadline.expired():
+                    print(f"[DEADLINE] Scroll interrompido apos {i} rolagens — seguindo com o que carregou")
+                    break
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(random.uniform(1.5, 2.5))
+                time.sleep(clamp_wait(deadline, random.uniform(1.5, 2.5)))
 
                 new_height = self.driver.execute_script("return document.body.scrollHeight")
 
@@ -361,10 +2261,10 @@ class PriceScraper:
 
                 if random.random() < 0.3:
                     self.driver.execute_script("window.scrollBy(0, -200);")
-                    time.sleep(random.uniform(0.3, 0.7))
+                    time.sleep(clamp_wait(deadline, random.uniform(0.3, 0.7)))
 
             self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(random.uniform(0.5, 1.0))
+            time.sleep(clamp_wait(deadline, random.uniform(0.5, 1.0)))
 
         except Exception as e:
             print(f"ERRO: Falha no scroll progressivo - {e}")
@@ -429,7 +2329,7 @@ class PriceScraper:
 
         return None
 
-    def close_popups(self):
+    def close_popups(self, deadline=None):
         """Fecha popups que aparecem nas páginas"""
         try:
             close_selectors = [
@@ -447,7 +2347,7 @@ class PriceScraper:
                     for button in close_buttons:
                         if button.is_displayed():
                             button.click()
-                            time.sleep(1)
+                            time.sleep(clamp_wait(deadline, 1))
                             break
                 except:
                     continue
@@ -529,7 +2429,7 @@ class PriceScraper:
             if len(normalized_token) < 2:
                 continue
 
-            if normalized_token in GENERIC_WORDS:
+            if normalized_token in GENERIC_WORDS_SET:
                 continue
 
             # Manter qualquer token que não seja genérico:
@@ -541,8 +2441,19 @@ class PriceScraper:
 
         return key_tokens
 
+    def build_match_plan(self, component):
+        """[PERF] Compila o MatchPlan de um componente (campos model/brand/name/category/specifications)."""
+        return MatchPlan(
+            self,
+            component.get('model'),
+            search_brand=component.get('brand'),
+            search_name=component.get('name'),
+            category=component.get('category'),
+            specifications=component.get('specifications'),
+        )
+
     def is_exact_product_match(self, product_name, search_model, search_brand=None,
-                                search_name=None, category=None, specifications=None):
+                                search_name=None, category=None, specifications=None, plan=None):
         """
         Valida se o produto encontrado corresponde exatamente ao modelo buscado.
 
@@ -557,150 +2468,36 @@ class PriceScraper:
                       checagem de VRAM em GPUs.
             specifications: Dict de especificações do componente (campo 'specifications').
                              Usado para extrair a VRAM de referência em GPUs.
+            plan: [PERF] MatchPlan já compilado para esse componente. Quando informado, os
+                  demais argumentos de busca são ignorados — todo o lado "busca" (tokens,
+                  regexes, capacidade, DDR, VRAM) já está pré-calculado no plano.
         """
-        if not product_name or not search_model:
-            return False
-
-        product_name_lower = product_name.lower()
-
-        for keyword in EXCLUSION_KEYWORDS:
-            if keyword in product_name_lower:
-                print(f"  [MATCH] REJEITADO (exclusion '{keyword}'): {product_name[:80]}")
-                return False
-
-        search_tokens = self.extract_key_tokens(search_model)
-        product_tokens = self.extract_key_tokens(product_name)
-
-        if not search_tokens:
-            return search_model.lower() in product_name_lower
-
-        # [FIX Bug#11] Rejeitar acessórios de compatibilidade: produtos onde TODOS os tokens
-        # do modelo buscado aparecem apenas após "para " no título (seção de lista de
-        # compatibilidade), e não antes. Evita casos como:
-        #   "Antena WiFi para MSI MAG Z890 Tomahawk"
-        #   "Módulo TPM 2.0 para Gigabyte H610M H DDR4"
-        #   "Cabo PCIE para Corsair HX1200"
-        if ' para ' in product_name_lower:
-            first_para_idx = product_name_lower.index(' para ')
-            tokens_before_para = self.extract_key_tokens(product_name_lower[:first_para_idx])
-            if not any(t in tokens_before_para for t in search_tokens):
-                print(f"  [MATCH] REJEITADO (tokens só após 'para' - acessório): {product_name[:80]}")
-                return False
-
-        product_name_normalized = product_name_lower.replace('-', '').replace('_', '')
-
-        for token in search_tokens:
-            if token not in product_name_normalized:
-                print(f"  [MATCH] REJEITADO (token '{token}' ausente): {product_name[:80]}")
-                return False
-
-        search_variants = [t for t in search_tokens if t in VARIANT_SUFFIXES]
-
-        # Verificar variantes apenas quando aparecem ADJACENTES a tokens numéricos do modelo.
-        # Ex: rejeita "7600 xt" mas aceita "7600, 5.1GHz Max Turbo" (Max não é variante do modelo)
-        search_numeric_for_variants = [t for t in search_tokens if re.search(r'\d', t)]
-
-        for variant in VARIANT_SUFFIXES:
-            if variant in search_variants:
-                continue  # Variante faz parte da busca, ok
-
-            # Verificar se a variante aparece colada ou logo após algum número do modelo
-            for num in search_numeric_for_variants:
-                # Padrões: "7600xt", "7600 xt", "7600-xt"
-                pattern = re.compile(r'\b' + re.escape(num) + r'[\s\-]?' + re.escape(variant) + r'\b')
-                if pattern.search(product_name_normalized):
-                    print(f"  [MATCH] REJEITADO (variante '{num}+{variant}'): {product_name[:80]}")
-                    return False
-
-        search_numeric = [t for t in search_tokens if re.search(r'\d', t)]
-        product_numeric = [t for t in product_tokens if re.search(r'\d', t)]
-
-        for search_num in search_numeric:
-            found_match = False
-            for prod_num in product_numeric:
-                if search_num == prod_num:
-                    found_match = True
-                    break
-                if prod_num.startswith(search_num) and len(prod_num) > len(search_num):
-                    suffix = prod_num[len(search_num):]
-                    if suffix in VARIANT_SUFFIXES:
-                        # [FIX] Se o sufixo colado no número já é a variante buscada
-                        # (ex: busca "9070 XT" e o anúncio escreve "9070XT" sem espaço),
-                        # não é produto diferente — é o mesmo, só sem espaço no título.
-                        if suffix in search_variants:
-                            found_match = True
-                            break
-                        print(f"  [MATCH] REJEITADO (variante numerica '{prod_num}' != '{search_num}'): {product_name[:80]}")
-                        return False
-
-            if not found_match:
-                if search_num not in product_name_normalized:
-                    print(f"  [MATCH] REJEITADO (num '{search_num}' ausente): {product_name[:80]}")
-                    return False
-
-                # [FIX Bug#2] Usar word boundary (\b) em vez de substring simples (`in`).
-                # Evita que códigos de peça como "SA400S37" sejam interpretados como
-                # variante "A400S" do modelo "A400".
-                for variant in VARIANT_SUFFIXES:
-                    variant_pattern = re.compile(
-                        r'\b' + re.escape(search_num) + re.escape(variant) + r'\b'
-                    )
-                    if variant_pattern.search(product_name_normalized):
-                        if variant not in [t for t in search_tokens if t in VARIANT_SUFFIXES]:
-                            print(f"  [MATCH] REJEITADO (variante word-boundary '{search_num}+{variant}'): {product_name[:80]}")
-                            return False
-
-        # [FIX Bug#3] Extrair capacidade também do nome completo do componente (search_name)
-        # quando o model não contém essa informação. Ex: model="870 EVO", name="Samsung 870 EVO 1TB"
-        search_capacity = self.extract_storage_capacity(search_model)
-        if search_capacity is None and search_name:
-            search_capacity = self.extract_storage_capacity(search_name)
-        product_capacity = self.extract_storage_capacity(product_name)
-
-        if search_capacity is not None:
-            if product_capacity is None or product_capacity != search_capacity:
-                print(f"  [MATCH] REJEITADO (capacidade {search_capacity}GB != {product_capacity}GB): {product_name[:80]}")
+        if plan is None:
+            if not product_name or not search_model:
                 return False
+            plan = MatchPlan(self, search_model, search_brand=search_brand, search_name=search_name,
+                             category=category, specifications=specifications)
 
-        # [MONITORING/FIX] Checagem de VRAM para GPUs: model/name normalmente não trazem a
-        # capacidade (ex: "GeForce RTX 3060" não diz se é a versão 8GB ou 12GB), então a
-        # capacidade de referência vem do campo specifications.memory cadastrado no
-        # componente. Sem isso, uma RTX 3060 12GB e uma RTX 3060 8GB (produtos diferentes,
-        # preços bem diferentes) eram tratadas como o mesmo match.
-        if category == 'GPU' and specifications:
-            vram_capacity = self.extract_gpu_vram(specifications)
-            if vram_capacity is not None:
-                if product_capacity is None or product_capacity != vram_capacity:
-                    print(f"  [MATCH] REJEITADO (VRAM {vram_capacity}GB != {product_capacity}GB): {product_name[:80]}")
-                    return False
-
-        # [FIX Bug#10] Checar geração DDR quando o modelo é genérico (ex: "Vengeance", "Fury Beast").
-        # Sem isso, DDR4 e DDR5 do mesmo produto ficam intercambiáveis no matching.
-        # Só rejeita quando AMBOS têm DDR explícito e são diferentes.
-        search_ddr = self.extract_ddr_type(search_model)
-        if search_ddr is None and search_name:
-            search_ddr = self.extract_ddr_type(search_name)
-        product_ddr = self.extract_ddr_type(product_name)
-        if search_ddr is not None and product_ddr is not None and search_ddr != product_ddr:
-            print(f"  [MATCH] REJEITADO (tipo {search_ddr.upper()} != {product_ddr.upper()}): {product_name[:80]}")
-            return False
-
-        # [FIX Bug#5] Pular brand check para fabricantes de chip (NVIDIA, AMD, Intel).
-        # Seus produtos são vendidos por terceiros (ASUS, MSI, Gigabyte, ZOTAC etc.)
-        # e o nome da marca quase nunca aparece no título do produto na loja.
-        if search_brand:
-            if search_brand.lower() not in CHIP_MANUFACTURERS:
-                if search_brand.lower() not in product_name_lower:
-                    print(f"  [MATCH] REJEITADO (marca '{search_brand}' ausente): {product_name[:80]}")
-                    return False
+        accepted, _code, _detail = self.evaluate_product_match(product_name, plan)
+        return accepted
 
-        return True
+    def evaluate_product_match(self, product_name, plan, log_rejections=True, decision=None):
+        """
+        Igual a is_exact_product_match com um plano pronto, mas retorna (aceito, código do
+        motivo, detalhe) — usado por match_candidates para registrar por que cada candidato
+        caiu. Com log_rejections=False não imprime a linha de REJEITADO (o chamador resume).
+        decision: decisão já conhecida (cache) no formato de MatchPlan.evaluate; pula a avaliação.
+        """
+        accepted, code, detail = decision if decision is not None else plan.evaluate(product_name)
+        if not accepted and detail and log_rejections:
+            print(f"  [MATCH] REJEITADO ({detail}): {product_name[:80]}")
+        return accepted, code, detail
 
     # -------------------------------------------------------------------------
     # KABUM helpers
     # -------------------------------------------------------------------------
 
-    def click_kabum_filter(self):
+    def click_kabum_filter(self, deadline=None):
         """
         Tenta clicar no checkbox 'KaBuM!' no filtro 'Vendido por'.
 
@@ -742,7 +2539,7 @@ class PriceScraper:
             """, target_index)
 
             # Aguardar scroll terminar e página estabilizar
-            time.sleep(random.uniform(0.6, 1.0))
+            time.sleep(clamp_wait(deadline, random.uniform(0.6, 1.0)))
 
             # Verificar se já está marcado via JS (sem guardar referência)
             already_checked = self.driver.execute_script("""
@@ -767,44 +2564,458 @@ class PriceScraper:
                 print("[KABUM] Filtro sumiu apos scroll")
                 return "error"
 
-            checkbox = labels_fresh[target_index].find_element(By.CSS_SELECTOR, "input")
+            checkbox = labels_fresh[target_index].find_element(By.CSS_SELECTOR, "input")
+
+            # Clique humanizado via ActionChains
+            actions = ActionChains(self.driver)
+            actions.move_to_element(checkbox)
+            actions.pause(clamp_wait(deadline, random.uniform(0.1, 0.3)))
+            actions.click()
+            actions.perform()
+
+            print("[KABUM] Filtro 'KaBuM!' aplicado")
+            return "applied"
+
+        except Exception as e:
+            print(f"[KABUM] Falha ao aplicar filtro: {e}")
+            return "error"
+
+    def extract_kabum_cards_js(self, container_selector):
+        """
+        [PERF] Extrai nome, preço e URL de todos os cards da Kabum em um único
+        execute_script. Segue exatamente a prioridade do caminho WebElement:
+          - nome: primeiro KABUM_NAME_SELECTORS com texto; sem nenhum elemento, 1ª linha
+            do texto do card;
+          - preço: primeiro KABUM_PRICE_SELECTORS presente, com o "R$ x,yy" do texto do
+            card como fallback (price_fallback);
+          - URL: o próprio card se for <a>, senão o primeiro <a> filho (só kabum.com.br).
+        Retorna lista de dicts {name, price_text, price_fallback, url} ou None se falhar.
+        """
+        try:
+            data = self.driver.execute_script("""
+                var containers = document.querySelectorAll(arguments[0]);
+                var nameSelectors = arguments[1];
+                var priceSelectors = arguments[2];
+
+                function text(el) {
+                    return el ? (el.innerText || el.textContent || '').trim() : '';
+                }
+
+                var results = [];
+                for (var i = 0; i < containers.length; i++) {
+                    var container = containers[i];
+
+                    var nameEl = null;
+                    for (var n = 0; n < nameSelectors.length; n++) {
+                        var candidate = container.querySelector(nameSelectors[n]);
+                        if (!candidate) continue;
+                        nameEl = candidate;
+                        if (text(candidate)) break;
+                    }
+
+                    var cardText = (container.innerText || '').trim();
+                    var name = nameEl ? text(nameEl) : cardText.split('\\n')[0];
+                    if (!name) continue;
+
+                    var priceEl = null;
+                    for (var p = 0; p < priceSelectors.length; p++) {
+                        priceEl = container.querySelector(priceSelectors[p]);
+                        if (priceEl) break;
+                    }
+                    var pm = cardText.match(/R\\$\\s*[\\d\\.]+,\\d{2}/);
+
+                    var url = null;
+                    var link = container.tagName.toLowerCase() === 'a' ? container : container.querySelector('a');
+                    if (link && link.href && link.href.indexOf('kabum.com.br') !== -1) url = link.href;
+                    if (!url && link === container) {
+                        var child = container.querySelector('a');
+                        if (child && child.href && child.href.indexOf('kabum.com.br') !== -1) url = child.href;
+                    }
+
+                    results.push({
+                        name: name,
+                        price_text: text(priceEl),
+                        price_fallback: pm ? pm[0] : '',
+                        url: url
+                    });
+                }
+                return results;
+            """, container_selector, KABUM_NAME_SELECTORS, KABUM_PRICE_SELECTORS)
+        except Exception as e:
+            print(f"[KABUM] Extracao JS dos cards falhou, usando caminho WebElement: {e}")
+            return None
+
+        return data if isinstance(data, list) else None
+
+    def build_kabum_candidates(self, cards):
+        """Converte os registros de extract_kabum_cards_js em candidatos {name, price, price_text, url}."""
+        candidates = []
+        for card in cards:
+            product_name = (card.get("name") or "").strip()
+            if not product_name:
+                continue
+
+            price_text = (card.get("price_text") or "").strip()
+            price_value = self.clean_price_text(price_text)
+
+            # Fallback: preço do texto bruto do card via regex
+            if price_value == 0 and card.get("price_fallback"):
+                price_text = card["price_fallback"]
+                price_value = self.clean_price_text(price_text)
+
+            if price_value > 0:
+                candidates.append({
+                    "name": product_name,
+                    "price": price_value,
+                    "price_text": price_text,
+                    "url": card.get("url"),
+                })
+            else:
+                print(f"[KABUM DEBUG] Preco nao encontrado para: {product_name[:60]}")
+
+        return candidates
+
+    def extract_kabum_candidates_legacy(self, product_containers):
+        """
+        Caminho WebElement original (um round trip por seletor, por card). Mantido só como
+        último recurso para quando extract_kabum_cards_js falha.
+        """
+        candidates = []
+
+        for container in product_containers:
+            try:
+                name_element = None
+                for selector in KABUM_NAME_SELECTORS:
+                    try:
+                        name_element = container.find_element(By.CSS_SELECTOR, selector)
+                        if name_element and name_element.text.strip():
+                            break
+                    except:
+                        continue
+
+                if not name_element:
+                    raw_text = container.text.strip().split('\n')[0]
+                    if raw_text:
+                        product_name = raw_text
+                    else:
+                        continue
+                else:
+                    product_name = name_element.text.strip()
+
+                if not product_name:
+                    continue
+
+                price_element = None
+                for selector in KABUM_PRICE_SELECTORS:
+                    try:
+                        price_element = container.find_element(By.CSS_SELECTOR, selector)
+                        if price_element:
+                            break
+                    except:
+                        continue
+
+                price_text = ""
+                price_value = 0
+
+                if price_element:
+                    price_text = price_element.text.strip()
+                    price_value = self.clean_price_text(price_text)
+
+                # Fallback: extrair preço do texto bruto do container via regex
+                if price_value == 0:
+                    raw_text = container.text
+                    price_match = re.search(r'R\$\s*[\d\.]+,\d{2}', raw_text)
+                    if price_match:
+                        price_text = price_match.group(0)
+                        price_value = self.clean_price_text(price_text)
+
+                if price_value > 0:
+                    product_url = self.get_kabum_product_url(container)
+                    candidates.append({
+                        "name": product_name,
+                        "price": price_value,
+                        "price_text": price_text,
+                        "url": product_url,
+                    })
+                else:
+                    print(f"[KABUM DEBUG] Preco nao encontrado para: {product_name[:60]}")
+
+            except Exception:
+                continue
+
+        return candidates
+
+    def get_kabum_product_url(self, container):
+        """Extrai a URL direta do produto Kabum a partir do card."""
+        try:
+            # Se o container já é o próprio <a> (fallback de links diretos)
+            if container.tag_name.lower() == "a":
+                href = container.get_attribute("href")
+                if href and "kabum.com.br" in href:
+                    return href
+            # Caso o container seja um card wrapper com link filho
+            link = container.find_element(By.CSS_SELECTOR, "a")
+            href = link.get_attribute("href")
+            if href and "kabum.com.br" in href:
+                return href
+        except:
+            pass
+        return None
+
+    # -------------------------------------------------------------------------
+    # AMAZON helpers
+    # -------------------------------------------------------------------------
+
+    def extract_amazon_results_js(self):
+        """
+        [PERF] Extrai todos os resultados da busca Amazon em um único execute_script.
+
+        Replica no browser a mesma ordem de seletores do caminho WebElement (container,
+        nome, link, preço inteiro+fração e seletores de fallback de preço). Retorna
+        {"selector", "total", "items"}, com items = [{asin, name, price_text,
+        price_fallbacks, link, sponsored}], ou None se o script falhar.
+        """
+        try:
+            data = self.driver.execute_script("""
+                var containerSelectors = arguments[0];
+                var nameSelectors = arguments[1];
+                var priceFallbackSelectors = arguments[2];
+                var limit = arguments[3];
+
+                function text(el) {
+                    return el ? (el.innerText || el.textContent || '').trim() : '';
+                }
+
+                var elements = [];
+                var usedSelector = null;
+                for (var s = 0; s < containerSelectors.length; s++) {
+                    var found = document.querySelectorAll(containerSelectors[s]);
+                    if (!found.length) continue;
+                    // Ignorar elementos sem data-asin quando possível (evita containers vazios)
+                    var real = Array.prototype.filter.call(found, function(e) {
+                        return e.getAttribute('data-asin');
+                    });
+                    elements = real.length ? real : Array.prototype.slice.call(found);
+                    usedSelector = containerSelectors[s];
+                    break;
+                }
+
+                var items = [];
+                for (var i = 0; i < elements.length && i < limit; i++) {
+                    var product = elements[i];
+
+                    var name = '';
+                    var link = null;
+                    for (var n = 0; n < nameSelectors.length; n++) {
+                        var nameEl = product.querySelector(nameSelectors[n]);
+                        if (!nameEl) continue;
+                        name = text(nameEl);
+                        if (!name) continue;
+                        var a = nameEl.tagName === 'A' ? nameEl : nameEl.closest('a');
+                        if (!a) a = product.querySelector('h2 a');
+                        link = a ? a.href : null;
+                        break;
+                    }
+                    if (!name) continue;
+
+                    // Preço principal: inteiro + fração. O inteiro costuma vir com o
+                    // separador decimal grudado ("1.497,"), que é removido aqui.
+                    var priceText = '';
+                    var whole = product.querySelector('.a-price-whole');
+                    if (whole) {
+                        var wholeText = text(whole).replace(/[\\s.,]+$/, '');
+                        var fraction = '00';
+                        var fractionEl = product.querySelector('.a-price-fraction');
+                        if (fractionEl) {
+                            fraction = text(fractionEl);
+                        } else {
+                            var decimalEl = product.querySelector('.a-price-decimal');
+                            if (decimalEl && text(decimalEl) === ',') {
+                                var sibling = decimalEl.nextElementSibling;
+                                var siblingText = text(sibling);
+                                fraction = /^\\d+$/.test(siblingText) ? siblingText : '00';
+                            } else if (decimalEl) {
+                                fraction = text(decimalEl);
+                            }
+                        }
+                        priceText = wholeText + ',' + fraction;
+                    }
+
+                    // Fallbacks na ordem original; .a-offscreen só tem textContent (fica
+                    // fora da tela, innerText pode vir vazio).
+                    var priceFallbacks = [];
+                    for (var p = 0; p < priceFallbackSelectors.length; p++) {
+                        var priceEls = product.querySelectorAll(priceFallbackSelectors[p]);
+                        for (var k = 0; k < priceEls.length; k++) {
+                            var t = text(priceEls[k]) || (priceEls[k].textContent || '').trim();
+                            if (t) priceFallbacks.push(t);
+                        }
+                    }
+
+                    var sponsored = !!product.querySelector(
+                        '.puis-sponsored-label-text, .s-sponsored-label-info-icon, ' +
+                        '[aria-label="Patrocinado"], [aria-label="Sponsored"]'
+                    ) || /\\bPatrocinad[oa]\\b|\\bSponsored\\b/.test(text(product).slice(0, 300));
+
+                    items.push({
+                        asin: product.getAttribute('data-asin') || null,
+                        name: name,
+                        price_text: priceText,
+                        price_fallbacks: priceFallbacks,
+                        link: link,
+                        sponsored: sponsored
+                    });
+                }
+                return {selector: usedSelector, total: elements.length, items: items};
+            """, AMAZON_PRODUCT_SELECTORS, AMAZON_NAME_SELECTORS, AMAZON_PRICE_FALLBACK_SELECTORS, 60)
+        except Exception as e:
+            print(f"[AMAZON] Extracao JS falhou, usando caminho WebElement: {e}")
+            return None
+
+        if not isinstance(data, dict):
+            return None
+        data["items"] = data.get("items") or []
+        data["total"] = data.get("total") or 0
+        return data
+
+    def build_amazon_candidates(self, items):
+        """Converte os registros do extrator JS em candidatos {name, price, price_text, link, ...}."""
+        candidates = []
+        sponsored_count = 0
+        for item in items:
+            product_name = (item.get("name") or "").strip()
+            if not product_name:
+                continue
+
+            price_text = (item.get("price_text") or "").strip()
+            price_value = self.clean_price_text(price_text)
+            if price_value == 0:
+                for fallback_text in item.get("price_fallbacks") or []:
+                    fallback_value = self.clean_price_text(fallback_text)
+                    if fallback_value > 0:
+                        price_text, price_value = fallback_text, fallback_value
+                        break
+
+            if price_value > 0:
+                if item.get("sponsored"):
+                    sponsored_count += 1
+                candidates.append({
+                    "name": product_name,
+                    "price": price_value,
+                    "price_text": price_text,
+                    "link": item.get("link"),
+                    "asin": item.get("asin"),
+                    "sponsored": bool(item.get("sponsored")),
+                })
+
+        print(f"[AMAZON] Candidatos com preco: {len(candidates)} ({sponsored_count} patrocinados)")
+        return candidates
+
+    def find_amazon_product_elements(self):
+        """Localiza os cards de resultado da Amazon como WebElements (caminho antigo)."""
+        for selector in AMAZON_PRODUCT_SELECTORS:
+            try:
+                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                # Ignorar elementos sem data-asin quando possível (evita containers vazios)
+                if elements:
+                    real = [e for e in elements if e.get_attribute("data-asin")]
+                    product_elements = real if real else elements
+                    print(f"[AMAZON] Seletor usado: {selector} ({len(product_elements)} elementos)")
+                    return product_elements
+            except:
+                continue
+        return []
+
+    def extract_amazon_candidates_legacy(self, product_elements):
+        """
+        Caminho WebElement original (um round trip por seletor/atributo). Mantido só como
+        último recurso para quando o extrator JS falha.
+        """
+        all_candidates = []
+
+        for product in product_elements[:60]:
+            try:
+                product_name = ""
+                product_link = None
+
+                for selector in AMAZON_NAME_SELECTORS:
+                    try:
+                        name_element = product.find_element(By.CSS_SELECTOR, selector)
+                        product_name = name_element.text
+                        if product_name:
+                            try:
+                                if name_element.tag_name == "a":
+                                    product_link = name_element.get_attribute("href")
+                                else:
+                                    parent_a = name_element.find_element(By.XPATH, "./ancestor::a")
+                                    product_link = parent_a.get_attribute("href")
+                            except:
+                                try:
+                                    link_el = product.find_element(By.CSS_SELECTOR, "h2 a")
+                                    product_link = link_el.get_attribute("href")
+                                except:
+                                    pass
+                            break
+                    except:
+                        continue
+
+                if not product_name:
+                    continue
+
+                price_value = 0
+                price_text = ""
 
-            # Clique humanizado via ActionChains
-            actions = ActionChains(self.driver)
-            actions.move_to_element(checkbox)
-            actions.pause(random.uniform(0.1, 0.3))
-            actions.click()
-            actions.perform()
+                try:
+                    price_whole = product.find_element(By.CSS_SELECTOR, ".a-price-whole").text.strip()
+                    try:
+                        price_decimal = product.find_element(By.CSS_SELECTOR, ".a-price-fraction").text.strip()
+                    except:
+                        try:
+                            price_decimal_elem = product.find_element(By.CSS_SELECTOR, ".a-price-decimal")
+                            if price_decimal_elem.text.strip() == ",":
+                                price_html = product.get_attribute("innerHTML")
+                                decimal_match = re.search(
+                                    r'<span class="a-price-decimal">,</span>\s*<span[^>]*>(\d+)</span>',
+                                    price_html
+                                )
+                                price_decimal = decimal_match.group(1) if decimal_match else "00"
+                            else:
+                                price_decimal = price_decimal_elem.text.strip()
+                        except:
+                            price_decimal = "00"
 
-            print("[KABUM] Filtro 'KaBuM!' aplicado")
-            return "applied"
+                    price_text = f"{price_whole},{price_decimal}"
+                    price_value = self.clean_price_text(price_text)
+                except:
+                    for selector in AMAZON_PRICE_FALLBACK_SELECTORS:
+                        try:
+                            price_elements = product.find_elements(By.CSS_SELECTOR, selector)
+                            for element in price_elements:
+                                candidate_text = element.text.strip()
+                                candidate_value = self.clean_price_text(candidate_text)
+                                if candidate_value > 0:
+                                    price_text = candidate_text
+                                    price_value = candidate_value
+                                    break
+                            if price_value > 0:
+                                break
+                        except:
+                            continue
 
-        except Exception as e:
-            print(f"[KABUM] Falha ao aplicar filtro: {e}")
-            return "error"
+                if price_value > 0:
+                    all_candidates.append({
+                        "name": product_name,
+                        "price": price_value,
+                        "price_text": price_text,
+                        "link": product_link,
+                    })
 
-    def get_kabum_product_url(self, container):
-        """Extrai a URL direta do produto Kabum a partir do card."""
-        try:
-            # Se o container já é o próprio <a> (fallback de links diretos)
-            if container.tag_name.lower() == "a":
-                href = container.get_attribute("href")
-                if href and "kabum.com.br" in href:
-                    return href
-            # Caso o container seja um card wrapper com link filho
-            link = container.find_element(By.CSS_SELECTOR, "a")
-            href = link.get_attribute("href")
-            if href and "kabum.com.br" in href:
-                return href
-        except:
-            pass
-        return None
+            except Exception:
+                continue
 
-    # -------------------------------------------------------------------------
-    # AMAZON helpers
-    # -------------------------------------------------------------------------
+        return all_candidates
 
-    def check_amazon_shipped_by_amazon(self):
+    def check_amazon_shipped_by_amazon(self, deadline=None):
         """
         Verifica na página do produto Amazon se é vendido e enviado pela Amazon.
         Retorna True  → Amazon vende e envia
@@ -812,31 +3023,13 @@ class PriceScraper:
                 None  → Não foi possível determinar
         """
         try:
-            self.wait_for_page_load(timeout=15)
-            self.human_delay(2, 3)
-
-            amazon_indicators = [
-                "amazon.com.br",
-                "vendido pela amazon",
-                "enviado pela amazon",
-                "vendido e enviado por amazon",
-            ]
-            third_party_indicators = [
-                "loja parceira",
-                "vendedor parceiro",
-            ]
+            self.wait_for_page_load(timeout=15, deadline=deadline)
+            self.human_delay(2, 3, deadline=deadline)
 
-            info_selectors = [
-                "#merchant-info",
-                "#tabular-buybox",
-                "#buybox",
-                "#buyBoxAccordion",
-                "#shipsFromSoldBy_feature_div",
-                "#price_feature_div",
-                ".a-section.a-spacing-small.a-padding-small",
-            ]
+            amazon_indicators = AMAZON_SELLER_INDICATORS
+            third_party_indicators = AMAZON_THIRD_PARTY_INDICATORS
 
-            for selector in info_selectors:
+            for selector in AMAZON_SELLER_INFO_SELECTORS:
                 try:
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     for element in elements:
@@ -868,11 +3061,378 @@ class PriceScraper:
             print(f"[AMAZON] Falha ao verificar vendedor: {e}")
             return None
 
+    # -------------------------------------------------------------------------
+    # MATCHING / RESULTADO (compartilhados entre lojas e entre os caminhos HTTP/Selenium)
+    # -------------------------------------------------------------------------
+
+    def match_candidates(self, component, candidates, search_term):
+        """
+        2ª passagem: separa candidatos {name, price, ...} em (válidos, rejeitados) pelo
+        matching determinístico. Não chama LLM — isso fica em llm_fallback.
+
+        [PERF] Com MATCH_STREAM_TOP_K > 0 os candidatos são avaliados do mais barato para o
+        mais caro e a avaliação para no K-ésimo aceito: válidos saem já ordenados por preço
+        e os rejeitados contêm só o que foi avaliado (a página inteira quando nenhum passou,
+        que é o único caso em que llm_fallback olha para eles).
+        """
+        modelo = component.get('model')
+
+        valid_products = []
+        rejected_candidates = []
+        plan = self.build_match_plan(component) if modelo else None
+
+        search_words = search_term.lower().split()
+
+        streaming = MATCH_STREAM_TOP_K > 0
+        if streaming:
+            candidates = sorted(candidates, key=lambda x: x["price"])
+        rejection_counts = {}
+        evaluated = 0
+
+        # [PERF] Decisões já tomadas em runs anteriores para este componente: uma consulta
+        # por busca (preload) e uma gravação em lote no final.
+        cache = get_match_decision_cache() if plan else None
+        cache_keys, cached, new_decisions = {}, {}, {}
+        if cache:
+            fingerprint = component_fingerprint(component)
+            cache_keys = {c["name"]: match_decision_key(fingerprint, c["name"]) for c in candidates if c["name"]}
+            # Preload sem contabilizar: com streaming parte da página nunca é avaliada, e
+            # hits/misses devem refletir só as chaves consultadas no loop abaixo.
+            cached = cache.get_many(cache_keys.values(), count=False)
+        consulted = set()
+
+        for c in candidates:
+            if streaming and len(valid_products) >= MATCH_STREAM_TOP_K:
+                break
+            evaluated += 1
+            product_name = c["name"]
+            # [PERF] Registra a keyword de exclusão que derrubou o candidato (ou None), para o
+            # filtro do fallback LLM não precisar varrer o vocabulário de novo.
+            c["excluded_by"] = None
+            if modelo:
+                key = cache_keys.get(product_name)
+                entry = cached.get(key) if key else None
+                decision = (entry["accepted"], entry["code"], entry["detail"]) if entry else None
+                if key:
+                    consulted.add(key)
+                accepted, code, detail = self.evaluate_product_match(
+                    product_name, plan, log_rejections=not streaming, decision=decision
+                )
+                if key and entry is None:
+                    new_decisions[key] = {
+                        "accepted": accepted, "code": code, "detail": detail,
+                        "title": product_name, "model": modelo, "brand": component.get('brand'),
+                        "name": component.get('name'), "category": component.get('category'),
+                    }
+                if code == "exclusion":
+                    c["excluded_by"] = MatchPlan.exclusion_keyword(detail)
+            else:
+                product_name_lower = product_name.lower()
+                c["excluded_by"] = EXCLUSION_MATCHER.find(product_name_lower)
+                accepted = (all(word in product_name_lower for word in search_words)
+                            and not c["excluded_by"])
+                code = "exclusion" if c["excluded_by"] else "words"
+            if accepted:
+                valid_products.append(c)
+            else:
+                rejected_candidates.append(c)
+                rejection_counts[code] = rejection_counts.get(code, 0) + 1
+
+        if cache:
+            hits = sum(1 for key in consulted if key in cached)
+            cache.record(hits, len(consulted) - hits)
+        if new_decisions:
+            cache.put_many(new_decisions)
+
+        if streaming and candidates:
+            summary = ", ".join(
+                f"{code}={n}" for code, n in sorted(rejection_counts.items(), key=lambda kv: -kv[1])
+            ) or "-"
+            print(f"  [MATCH] Avaliados {evaluated}/{len(candidates)} | "
+                  f"Aceitos: {len(valid_products)} | Rejeicoes: {summary}")
+
+        return valid_products, rejected_candidates
+
+    def llm_fallback(self, store_tag, component, rejected_candidates, meta, deadline=None):
+        """
+        Fallback Gemini: só roda quando o matching normal falhou completamente. Manda os 3
+        rejeitados mais baratos ao LLM numa única chamada (ask_gemini_batch) e retorna
+        [o mais barato confirmado] (ou lista vazia).
+        Produtos excluídos por keyword (kit, laptop, etc.) nunca vão ao Gemini.
+        deadline: prazo do componente — limita a espera do rate limiter e o POST ao Groq.
+        """
+        produto = component['name']
+        modelo = component.get('model')
+
+        selection = meta.pop("llm_selection", None)  # já calculada por defer_llm_fallback
+        local_confirmed, batch = selection or self.select_llm_candidates(component, rejected_candidates, meta)
+        if not batch and not local_confirmed:
+            return []
+
+        confirmed = list(local_confirmed)
+        if batch:
+            meta["llm_used"] = True
+            print(f"[{store_tag}] Matching normal: 0 resultados. Tentando LLM em {len(batch)} candidatos (1 chamada)...")
+            verdicts = self.ask_gemini_batch([
+                {"product_name": c["name"], "component_name": produto, "model": modelo} for c in batch
+            ], deadline)
+            confirmed.extend(c for c, verdict in zip(batch, verdicts) if verdict is True)
+            if len(confirmed) > len(local_confirmed):
+                meta["llm_confirmed"] = True
+        # Mesmo critério de antes: o mais barato confirmado
+        if confirmed:
+            return [min(confirmed, key=lambda x: x["price"])]
+        return []
+
+    def select_llm_candidates(self, component, rejected_candidates, meta=None):
+        """
+        Escolhe o que vai ao LLM entre os rejeitados (nunca os excluídos por keyword).
+        Retorna (confirmados_localmente, perguntar_ao_llm):
+          - sem ranker: ([], os 3 mais baratos) — comportamento original;
+          - [PERF] com MatchRanker: p >= RANKER_ACCEPT_P é aceito localmente, p <= RANKER_REJECT_P
+            é descartado localmente (só se o ranker tem veredictos do LLM suficientes), e os
+            3 ambíguos MAIS PROVÁVEIS vão ao LLM — não os mais baratos, que costumam ser
+            acessórios.
+        """
+        if not rejected_candidates or not component.get('model'):
+            return [], []
+        gemini_candidates = [
+            c for c in rejected_candidates
+            if not c.get("excluded_by")
+        ]
+        gemini_candidates.sort(key=lambda x: x["price"])
+
+        ranker = get_match_ranker()
+        if not ranker or not gemini_candidates:
+            return [], gemini_candidates[:3]
+
+        produto = component['name']
+        modelo = component.get('model')
+        scored = [(ranker.score(c["name"], produto, modelo), c) for c in gemini_candidates]
+        local_confirmed, ambiguous, local_rejected = [], [], 0
+        for p, c in scored:
+            c["ranker_p"] = round(p, 3)
+            if ranker.can_settle and p >= RANKER_ACCEPT_P:
+                local_confirmed.append(c)
+            elif ranker.can_settle and p <= RANKER_REJECT_P:
+                local_rejected += 1
+            else:
+                ambiguous.append((p, c))
+        ambiguous.sort(key=lambda pc: -pc[0])
+        to_ask = [c for _p, c in ambiguous[:3]]
+
+        print(f"  [RANKER] {len(gemini_candidates)} candidatos | aceitos local: {len(local_confirmed)} | "
+              f"descartados local: {local_rejected} | ao LLM: {len(to_ask)}")
+        if meta is not None:
+            meta["ranker_local_accepts"] = len(local_confirmed)
+            meta["ranker_local_rejects"] = local_rejected
+        return local_confirmed, to_ask
+
+    def defer_llm_fallback(self, store_tag, component, rejected_candidates, meta, fallback_url):
+        """
+        [PERF] Versão assíncrona de llm_fallback: em vez de esperar o Groq com o Chrome
+        parado, guarda os candidatos em meta["llm_pending"] para o LLMFallbackResolver.
+        Retorna True se deferiu (a busca deve devolver status "pending_llm").
+        """
+        if not self.llm_resolver or not GROQ_API_KEY:
+            return False
+        local_confirmed, batch = self.select_llm_candidates(component, rejected_candidates, meta)
+        if not batch:
+            # Nada ambíguo: llm_fallback resolve na hora, sem chamada ao Groq
+            meta["llm_selection"] = (local_confirmed, batch)
+            return False
+
+        meta["llm_used"] = True
+        meta["llm_pending"] = {"candidates": batch, "fallback_url": fallback_url,
+                               "local_confirmed": local_confirmed}
+        print(f"[{store_tag}] Matching normal: 0 resultados. {len(batch)} candidatos enviados ao LLM em segundo plano")
+        return True
+
+    def print_top_prices(self, store_tag, valid_products):
+        """Loga o Top 3 de preços (valid_products já ordenado por preço)."""
+        print(f"[{store_tag}] Top 3 precos encontrados:")
+        for i, p in enumerate(valid_products[:3], 1):
+            print(f"  {i}. R$ {p['price']:.2f} - {p['name'][:60]}...")
+
+    def build_kabum_result(self, valid_products, fallback_url):
+        """Seleciona o mais barato dos válidos e monta o result da Kabum."""
+        valid_products.sort(key=lambda x: x["price"])
+        cheapest = valid_products[0]
+        self.print_top_prices("KABUM", valid_products)
+
+        direct_url = cheapest.get("url") or fallback_url
+
+        result = {
+            "site": "Kabum",
+            "produto": cheapest["name"],
+            "preco": cheapest["price"],
+            "preco_texto": cheapest["price_text"],
+            # Filtro KaBuM! foi aplicado — tudo que passou é vendido e entregue pela Kabum
+            "shipped_by_store": True,
+            "url": direct_url,
+            "status": "sucesso"
+        }
+
+        print(f"[KABUM] SELECIONADO: {cheapest['name']} - R$ {cheapest['price']:.2f}")
+        print(f"[KABUM] URL: {direct_url}")
+        return result
+
+    def build_amazon_result(self, cheapest, direct_url, shipped_by_store):
+        """Monta o result da Amazon para o candidato selecionado."""
+        result = {
+            "site": "Amazon",
+            "produto": cheapest["name"],
+            "preco": cheapest["price"],
+            "preco_texto": cheapest["price_text"],
+            "shipped_by_store": shipped_by_store,
+            "url": direct_url,
+            "status": "sucesso"
+        }
+
+        print(f"[AMAZON] SELECIONADO: {cheapest['name']} - R$ {cheapest['price']:.2f}")
+        print(f"[AMAZON] URL: {direct_url}")
+        return result
+
+    def verify_amazon_product_page(self, link, deadline=None):
+        """
+        Abre a página do produto no Chrome para pegar a URL direta e verificar o vendedor.
+        Retorna (direct_url, shipped_by_store).
+        """
+        shipped_by_store = None
+        direct_url = link or self.driver.current_url
+
+        if not link:
+            print("[AMAZON] Link do produto nao encontrado, usando URL da busca")
+            return direct_url, shipped_by_store
+
+        if deadline and deadline.remaining() < MIN_VERIFY_BUDGET_S:
+            # Etapa opcional: sem tempo, o preço vale mesmo com vendedor indefinido
+            print(f"[DEADLINE] {deadline.remaining():.0f}s restantes — vendedor nao verificado")
+            return link, shipped_by_store
+
+        try:
+            print("[AMAZON] Abrindo pagina do produto para verificar vendedor...")
+            self.navigate(link, deadline)
+            self.wait_for_page_load(deadline=deadline)
+            self.human_delay(2, 4, deadline=deadline)
+
+            direct_url = self.driver.current_url
+            shipped_by_store = self.check_amazon_shipped_by_amazon(deadline)
+            print(f"[AMAZON] Vendedor: {AMAZON_SELLER_STATUS_LABELS[shipped_by_store]}")
+
+        except Exception as e:
+            print(f"[AMAZON] Falha ao verificar pagina do produto: {e}")
+
+        return direct_url, shipped_by_store
+
+    # -------------------------------------------------------------------------
+    # HTTP FAST PATH
+    # -------------------------------------------------------------------------
+    # [PERF] Antes de abrir o Chrome, tenta a página de busca via requests (sessão com
+    # pool de conexões) + lxml. O caminho HTTP só "ganha" quando confirma um match pelo
+    # matching determinístico; captcha, resposta HTTP ruim, markup ausente, página vazia
+    # ou zero matches escalam pro Selenium (que tem scroll, filtro KaBuM! e LLM). Assim
+    # um "not_found" nunca é decidido pelo caminho HTTP. meta["fetch_path"] registra qual
+    # caminho serviu a busca e meta["http_escalation"] o motivo da escalada.
+
+    def build_http_session(self):
+        """Sessão requests com pool de conexões keep-alive e retry só para 5xx/erros de conexão."""
+        session = requests.Session()
+        retry = Retry(
+            total=2,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 504),
+            allowed_methods=frozenset(["GET"]),
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+        })
+        return session
+
+    def http_get(self, url, deadline=None):
+        """GET com o mesmo user-agent do Chrome. Retorna (response, None) ou (None, motivo)."""
+        timeout = clamp_wait(deadline, HTTP_FETCH_TIMEOUT_S)
+        if timeout <= 0:
+            return None, "deadline_exceeded"
+        try:
+            response = self.http.get(url, headers={"User-Agent": self.user_agent}, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"[HTTP] Falha em {url[:80]}: {e}")
+            return None, "http_exception"
+        if response.status_code != 200:
+            return None, f"http_{response.status_code}"
+        return response, None
+
+    def search_kabum_http(self, component, search_term, meta, deadline=None):
+        """Busca Kabum via HTTP (__NEXT_DATA__). Retorna o result ou None (escala pro Selenium)."""
+        response, reason = self.http_get(kabum_search_url(search_term), deadline)
+        candidates = None
+        if response is not None:
+            candidates, reason = parse_kabum_search_html(response.content)
+
+        if candidates:
+            valid_products, rejected_candidates = self.match_candidates(component, candidates, search_term)
+            print(f"[KABUM HTTP] Candidatos KaBuM!: {len(candidates)} | Validos: {len(valid_products)}")
+            if valid_products:
+                meta["fetch_path"] = "http"
+                return self.build_kabum_result(valid_products, response.url)
+            reason = "no_match"
+
+        print(f"[KABUM HTTP] Escalando para Selenium ({reason})")
+        meta["http_escalation"] = reason
+        return None
+
+    def search_amazon_http(self, component, search_term, meta, deadline=None):
+        """Busca Amazon via HTTP. Retorna o result ou None (escala pro Selenium)."""
+        response, reason = self.http_get(amazon_search_url(search_term), deadline)
+        candidates = None
+        if response is not None:
+            items, reason = parse_amazon_search_html(response.content)
+            if items:
+                candidates = self.build_amazon_candidates(items)
+                if not candidates:
+                    reason = "empty"
+
+        if candidates:
+            valid_products, rejected_candidates = self.match_candidates(component, candidates, search_term)
+            print(f"[AMAZON HTTP] Candidatos: {len(candidates)} | Validos: {len(valid_products)}")
+            if valid_products:
+                meta["fetch_path"] = "http"
+                valid_products.sort(key=lambda x: x["price"])
+                cheapest = valid_products[0]
+                self.print_top_prices("AMAZON", valid_products)
+
+                link = cheapest.get("link")
+                shipped_by_store = None
+                direct_url = link or response.url
+                page_reason = None
+                if link:
+                    page, page_reason = self.http_get(link, deadline)
+                    if page is not None:
+                        shipped_by_store, page_reason = parse_amazon_seller_html(page.content)
+                        direct_url = page.url
+                if link and page_reason:
+                    # Página do produto bloqueada no HTTP — verifica vendedor pelo Chrome
+                    direct_url, shipped_by_store = self.verify_amazon_product_page(link, deadline)
+                else:
+                    print(f"[AMAZON HTTP] Vendedor: {AMAZON_SELLER_STATUS_LABELS[shipped_by_store]}")
+
+                return self.build_amazon_result(cheapest, direct_url, shipped_by_store)
+            reason = "no_match"
+
+        print(f"[AMAZON HTTP] Escalando para Selenium ({reason})")
+        meta["http_escalation"] = reason
+        return None
+
     # -------------------------------------------------------------------------
     # MAIN SEARCH METHODS
     # -------------------------------------------------------------------------
 
-    def search_kabum(self, component):
+    def search_kabum(self, component, deadline=None):
         """
         Busca produto na Kabum.
         Aplica filtro 'KaBuM!' (só aceita itens vendidos pela própria Kabum).
@@ -889,6 +3449,10 @@ class PriceScraper:
                            preço salvo — só reflete que essa tentativa específica falhou.
         meta é um dict com detalhes técnicos (error_type, uso do fallback LLM) usados
         só para as métricas de saúde da run, sem afetar a lógica de matching em si.
+
+        deadline (Deadline, opcional) limita todas as esperas ao tempo restante do
+        componente; se ele acabar antes de abrir a página, o status é "error" com
+        error_type "deadline_exceeded".
         """
         produto = component['name']
         marca = component.get('brand')
@@ -900,7 +3464,7 @@ class PriceScraper:
         if modelo:
             print(f"[KABUM] Modelo para validacao: {modelo}")
 
-        meta = {"error_type": None, "llm_used": False, "llm_confirmed": False}
+        meta = {"error_type": None, "llm_used": False, "llm_confirmed": False, "fetch_path": "selenium"}
 
         try:
             search_term = f"{marca} {produto}" if marca and marca.lower() not in produto.lower() else produto
@@ -910,28 +3474,42 @@ class PriceScraper:
             print(f"[KABUM DEBUG] brand: '{marca}'")
             print(f"[KABUM DEBUG] search_term final: '{search_term}'")
 
+            # [PERF] Caminho rápido HTTP+lxml; só volta pro Chrome se ele não confirmar um match
+            if self.http:
+                http_result = self.search_kabum_http(component, search_term, meta, deadline)
+                if http_result:
+                    return "found", http_result, meta
+
+            if deadline and deadline.expired():
+                print("[KABUM] Prazo do componente esgotado antes da busca no Chrome")
+                meta["error_type"] = "deadline_exceeded"
+                return "error", None, meta
+
             # Navegar diretamente pela URL de busca (evita inconsistência do autocomplete)
-            search_url = f"https://www.kabum.com.br/busca/{search_term.replace(' ', '-')}"
-            self.driver.get(search_url)
+            search_url = kabum_search_url(search_term)
+            self.navigate(search_url, deadline)
 
-            if not self.wait_for_page_load():
+            loaded = self.wait_for_page_load(deadline=deadline)
+            if not loaded and not (deadline and deadline.expired()):
+                # Refresh só quando ainda há prazo — com ele esgotado, a espera já falhou por isso
                 self.driver.refresh()
-                if not self.wait_for_page_load():
-                    print("ERRO: Kabum nao carregou")
-                    meta["error_type"] = "page_load"
-                    return "error", None, meta
+                loaded = self.wait_for_page_load(deadline=deadline)
+            if not loaded:
+                print("ERRO: Kabum nao carregou")
+                meta["error_type"] = "deadline_exceeded" if deadline and deadline.expired() else "page_load"
+                return "error", None, meta
 
             # DEBUG: verificar URL final
             print(f"[KABUM DEBUG] URL apos busca: {self.driver.current_url}")
 
-            self.human_delay(3, 5)
+            self.human_delay(3, 5, deadline=deadline)
 
             # Scroll inicial para garantir que filtros e produtos carregaram
             print("[KABUM] Scroll inicial...")
-            self.progressive_scroll(max_scrolls=3)
+            self.progressive_scroll(max_scrolls=3, deadline=deadline)
 
             # Aplicar filtro KaBuM! — sem filtro, não aceitamos nenhum item
-            filter_status = self.click_kabum_filter()
+            filter_status = self.click_kabum_filter(deadline)
             if filter_status == "error":
                 meta["error_type"] = "filter_error"
                 return "error", None, meta
@@ -940,12 +3518,12 @@ class PriceScraper:
                 return "not_found", None, meta
 
             # Aguardar recarregamento após filtro
-            self.human_delay(3, 5)
-            self.wait_for_page_load()
+            self.human_delay(3, 5, deadline=deadline)
+            self.wait_for_page_load(deadline=deadline)
 
             # Esperar explicitamente pelos cards ou pela mensagem de vazio
             try:
-                WebDriverWait(self.driver, 15).until(
+                WebDriverWait(self.driver, clamp_wait(deadline, 15)).until(
                     lambda d: (
                         d.find_elements(By.CSS_SELECTOR, ".productCard, [data-testid='product-card'], [class*='productCard'], [class*='ProductCard'], a[href*='/produto/']")
                         or d.find_elements(By.CSS_SELECTOR, "[data-testid='empty-result'], .sc-empty-result, .emptyResult")
@@ -968,27 +3546,17 @@ class PriceScraper:
 
             # Scroll completo após filtro
             print("[KABUM] Scroll apos filtro...")
-            self.progressive_scroll(max_scrolls=12)  # Aumentado de 8 para 12
+            self.progressive_scroll(max_scrolls=12, deadline=deadline)  # Aumentado de 8 para 12
 
             # Buscar containers de produtos
-            product_container_selectors = [
-                ".productCard",
-                "[data-testid='product-card']",
-                "[class*='productCard']",
-                "[class*='ProductCard']",
-                "[class*='product-card']",
-                "article",
-                "[class*='CardProduct']",
-                "[class*='ItemProduct']",
-                "[class*='ProductItem']",
-            ]
-
             product_containers = []
-            for selector in product_container_selectors:
+            container_selector = None
+            for selector in KABUM_PRODUCT_CONTAINER_SELECTORS:
                 try:
                     containers = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     if containers:
                         product_containers = containers
+                        container_selector = selector
                         print(f"[KABUM] Seletor usado: {selector}")
                         break
                 except:
@@ -1099,171 +3667,49 @@ class PriceScraper:
                 else:
                     print(f"[KABUM DEBUG] Preco nao encontrado para: {product_name[:60]}")
 
-            # Caminho B: containers WebElement (seletores primários funcionaram)
-            for container in product_containers:
-                try:
-                    name_selectors = [
-                        ".nameCard",
-                        "span.nameCard",
-                        "[data-testid='product-name']",
-                        "[class*='nameCard']",
-                        "[class*='productName']",
-                        "[class*='ProductName']",
-                        ".productName",
-                        "a[href*='/produto/'] span",
-                        "a[href*='/produto/']",
-                        "h2 span",
-                        "h3 span",
-                    ]
-
-                    name_element = None
-                    for selector in name_selectors:
-                        try:
-                            name_element = container.find_element(By.CSS_SELECTOR, selector)
-                            if name_element and name_element.text.strip():
-                                break
-                        except:
-                            continue
-
-                    if not name_element:
-                        raw_text = container.text.strip().split('\n')[0]
-                        if raw_text:
-                            product_name = raw_text
-                        else:
-                            continue
-                    else:
-                        product_name = name_element.text.strip()
-
-                    if not product_name:
-                        continue
-
-                    price_selectors = [
-                        ".priceCard",
-                        "span.priceCard",
-                        "[data-testid='price']",
-                        "[class*='priceCard']",
-                        "[class*='finalPrice']",
-                        "[class*='bestPrice']",
-                        "[class*='Price']",
-                        ".finalPrice",
-                        ".price",
-                        ".priceMain",
-                        ".bestPrice",
-                    ]
-
-                    price_element = None
-                    for selector in price_selectors:
-                        try:
-                            price_element = container.find_element(By.CSS_SELECTOR, selector)
-                            if price_element:
-                                break
-                        except:
-                            continue
-
-                    price_text = ""
-                    price_value = 0
-
-                    if price_element:
-                        price_text = price_element.text.strip()
-                        price_value = self.clean_price_text(price_text)
-
-                    # Fallback: extrair preço do texto bruto do container via regex
-                    if price_value == 0:
-                        raw_text = container.text
-                        price_match = re.search(r'R\$\s*[\d\.]+,\d{2}', raw_text)
-                        if price_match:
-                            price_text = price_match.group(0)
-                            price_value = self.clean_price_text(price_text)
-
-                    if price_value > 0:
-                        product_url = self.get_kabum_product_url(container)
-                        all_candidates.append({
-                            "name": product_name,
-                            "price": price_value,
-                            "price_text": price_text,
-                            "url": product_url,
-                        })
-                    else:
-                        print(f"[KABUM DEBUG] Preco nao encontrado para: {product_name[:60]}")
-
-                except Exception:
-                    continue
+            # Caminho B: seletores primários funcionaram.
+            # [PERF] Nome, preço e URL de todos os cards saem de UMA chamada execute_script
+            # (extract_kabum_cards_js), com a mesma ordem de prioridade dos seletores. O
+            # caminho WebElement card a card só roda se o script falhar.
+            if product_containers:
+                self.clamp_script_timeout(deadline)
+                card_data = self.extract_kabum_cards_js(container_selector)
+                if card_data is not None:
+                    all_candidates.extend(self.build_kabum_candidates(card_data))
+                else:
+                    all_candidates.extend(self.extract_kabum_candidates_legacy(product_containers))
 
             # 2ª passagem: filtrar por matching — sem Gemini
-            valid_products = []
-            rejected_candidates = []
-
-            for c in all_candidates:
-                product_name = c["name"]
-                if modelo:
-                    if self.is_exact_product_match(product_name, modelo, marca, search_name=produto,
-                                                    category=categoria, specifications=especificacoes):
-                        valid_products.append(c)
-                    else:
-                        rejected_candidates.append(c)
-                else:
-                    search_words = search_term.lower().split()
-                    product_name_lower = product_name.lower()
-                    if (all(word in product_name_lower for word in search_words)
-                            and not any(kw in product_name_lower for kw in EXCLUSION_KEYWORDS)):
-                        valid_products.append(c)
-                    else:
-                        rejected_candidates.append(c)
+            valid_products, rejected_candidates = self.match_candidates(component, all_candidates, search_term)
+            # Com streaming a avaliação para no K-ésimo aceito: o resto da página não entra
+            # nas contagens abaixo, que então são parciais.
+            not_evaluated = len(all_candidates) - len(valid_products) - len(rejected_candidates)
 
             # Fallback Gemini: só se matching normal falhou completamente
-            # Produtos excluídos por keyword (kit, laptop, etc.) nunca vão ao Gemini
-            if not valid_products and rejected_candidates and modelo:
-                gemini_candidates = [
-                    c for c in rejected_candidates
-                    if not any(kw in c["name"].lower() for kw in EXCLUSION_KEYWORDS)
-                ]
-                gemini_candidates.sort(key=lambda x: x["price"])
-                if gemini_candidates:
-                    meta["llm_used"] = True
-                    print(f"[KABUM] Matching normal: 0 resultados. Tentando LLM nos {min(3, len(gemini_candidates))} candidatos mais baratos...")
-                    for c in gemini_candidates[:3]:
-                        if self.ask_gemini_is_match(c["name"], produto, modelo):
-                            valid_products.append(c)
-                            meta["llm_confirmed"] = True
-                            break
+            if not valid_products:
+                if self.defer_llm_fallback("KABUM", component, rejected_candidates, meta,
+                                           self.driver.current_url):
+                    return "pending_llm", None, meta
+                valid_products = self.llm_fallback("KABUM", component, rejected_candidates, meta, deadline)
 
-            print(f"[KABUM] Produtos validos: {len(valid_products)} | Rejeitados: {len(rejected_candidates)}")
+            print(f"[KABUM] Produtos validos: {len(valid_products)} | Rejeitados: {len(rejected_candidates)}"
+                  + (f" | Nao avaliados: {not_evaluated} (contagens parciais)" if not_evaluated else ""))
 
             if not valid_products:
                 print("[KABUM] Produto nao encontrado")
                 return "not_found", None, meta
 
-            valid_products.sort(key=lambda x: x["price"])
-            cheapest = valid_products[0]
-
-            print(f"[KABUM] Top 3 precos encontrados:")
-            for i, p in enumerate(valid_products[:3], 1):
-                print(f"  {i}. R$ {p['price']:.2f} - {p['name'][:60]}...")
-
-            direct_url = cheapest.get("url") or self.driver.current_url
-
-            result = {
-                "site": "Kabum",
-                "produto": cheapest["name"],
-                "preco": cheapest["price"],
-                "preco_texto": cheapest["price_text"],
-                # Filtro KaBuM! foi aplicado — tudo que passou é vendido e entregue pela Kabum
-                "shipped_by_store": True,
-                "url": direct_url,
-                "status": "sucesso"
-            }
-
-            print(f"[KABUM] SELECIONADO: {cheapest['name']} - R$ {cheapest['price']:.2f}")
-            print(f"[KABUM] URL: {direct_url}")
-
-            return "found", result, meta
+            return "found", self.build_kabum_result(valid_products, self.driver.current_url), meta
 
         except Exception as e:
             print(f"ERRO CRITICO: Kabum - {e}")
-            meta["error_type"] = "exception"
+            meta["error_type"] = "deadline_exceeded" if deadline and deadline.expired() else "exception"
             return "error", None, meta
 
-    def search_amazon(self, component):
+        finally:
+            meta["network"] = self.collect_network_report("KABUM")
+
+    def search_amazon(self, component, deadline=None):
         """
         Busca produto na Amazon.
         Entra na página do mais barato para pegar URL direta e verificar vendedor.
@@ -1286,7 +3732,7 @@ class PriceScraper:
         if modelo:
             print(f"[AMAZON] Modelo para validacao: {modelo}")
 
-        meta = {"error_type": None, "llm_used": False, "llm_confirmed": False}
+        meta = {"error_type": None, "llm_used": False, "llm_confirmed": False, "fetch_path": "selenium"}
 
         try:
             search_term = f"{marca} {produto}" if marca and marca.lower() not in produto.lower() else produto
@@ -1296,26 +3742,40 @@ class PriceScraper:
             print(f"[AMAZON DEBUG] brand: '{marca}'")
             print(f"[AMAZON DEBUG] search_term final: '{search_term}'")
 
-            search_url = f"https://www.amazon.com.br/s?k={search_term.replace(' ', '+')}&i=computers"
+            # [PERF] Caminho rápido HTTP+lxml; só volta pro Chrome se ele não confirmar um match
+            if self.http:
+                http_result = self.search_amazon_http(component, search_term, meta, deadline)
+                if http_result:
+                    return "found", http_result, meta
+
+            if deadline and deadline.expired():
+                print("[AMAZON] Prazo do componente esgotado antes da busca no Chrome")
+                meta["error_type"] = "deadline_exceeded"
+                return "error", None, meta
+
+            search_url = amazon_search_url(search_term)
 
             # DEBUG: verificar URL construída
             print(f"[AMAZON DEBUG] URL: {search_url}")
 
-            self.driver.get(search_url)
+            self.navigate(search_url, deadline)
 
-            if not self.wait_for_page_load():
+            loaded = self.wait_for_page_load(deadline=deadline)
+            if not loaded and not (deadline and deadline.expired()):
+                # Refresh só quando ainda há prazo — com ele esgotado, a espera já falhou por isso
                 self.driver.refresh()
-                if not self.wait_for_page_load():
-                    print("ERRO: Amazon nao carregou")
-                    meta["error_type"] = "page_load"
-                    return "error", None, meta
+                loaded = self.wait_for_page_load(deadline=deadline)
+            if not loaded:
+                print("ERRO: Amazon nao carregou")
+                meta["error_type"] = "deadline_exceeded" if deadline and deadline.expired() else "page_load"
+                return "error", None, meta
 
-            self.close_popups()
-            self.human_delay(4, 7)
-            self.wait_for_page_load()
+            self.close_popups(deadline)
+            self.human_delay(4, 7, deadline=deadline)
+            self.wait_for_page_load(deadline=deadline)
 
             print("[AMAZON] Fazendo scroll progressivo...")
-            self.progressive_scroll(max_scrolls=10)
+            self.progressive_scroll(max_scrolls=10, deadline=deadline)
 
             # Detectar CAPTCHA antes de tentar encontrar produtos
             page_title = self.driver.title.lower()
@@ -1325,29 +3785,22 @@ class PriceScraper:
                 return "error", None, meta
             print(f"[AMAZON] Titulo da pagina: {self.driver.title}")
 
-            product_selectors = [
-                "[data-component-type='s-search-result']",
-                "[data-asin]",
-                ".s-result-item[data-asin]",
-                ".s-result-item",
-                ".s-card-container",
-                ".sg-col-inner"
-            ]
-
-            product_elements = []
-            for selector in product_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    # Ignorar elementos sem data-asin quando possível (evita containers vazios)
-                    if elements:
-                        real = [e for e in elements if e.get_attribute("data-asin")]
-                        product_elements = real if real else elements
-                        print(f"[AMAZON] Seletor usado: {selector} ({len(product_elements)} elementos)")
-                        break
-                except:
-                    continue
+            # [PERF] Extração da página inteira em UMA chamada execute_script (mesma ideia
+            # do fallback JS da Kabum). Antes, cada um dos até 60 cards custava dezenas de
+            # round trips WebDriver (4 seletores de nome, XPath do link, preço inteiro/
+            # fração, innerHTML...). O caminho WebElement antigo só roda se o script falhar.
+            self.clamp_script_timeout(deadline)
+            extraction = self.extract_amazon_results_js()
+
+            if extraction is not None:
+                total_on_page = extraction["total"]
+                if extraction["selector"]:
+                    print(f"[AMAZON] Seletor usado: {extraction['selector']} ({total_on_page} elementos)")
+            else:
+                product_elements = self.find_amazon_product_elements()
+                total_on_page = len(product_elements)
 
-            if not product_elements:
+            if not total_on_page:
                 print(f"[AMAZON] Titulo da pagina: {self.driver.title}")
                 print("ERRO: Nenhum produto encontrado na Amazon")
                 # Nenhum candidato bruto foi listado — provável instabilidade de página/
@@ -1356,147 +3809,29 @@ class PriceScraper:
                 meta["error_type"] = "no_candidates"
                 return "error", None, meta
 
-            print(f"[AMAZON] Total de produtos na pagina: {len(product_elements)}")
+            print(f"[AMAZON] Total de produtos na pagina: {total_on_page}")
 
             # 1ª passagem: coletar todos os candidatos com nome e preço
-            all_candidates = []
-
-            for product in product_elements[:60]:
-                try:
-                    name_selectors = [
-                        "h2 a span",
-                        ".a-size-medium.a-color-base.a-text-normal",
-                        "h2 .a-text-normal",
-                        ".a-size-base-plus.a-color-base.a-text-normal"
-                    ]
-
-                    product_name = ""
-                    product_link = None
-
-                    for selector in name_selectors:
-                        try:
-                            name_element = product.find_element(By.CSS_SELECTOR, selector)
-                            product_name = name_element.text
-                            if product_name:
-                                try:
-                                    if name_element.tag_name == "a":
-                                        product_link = name_element.get_attribute("href")
-                                    else:
-                                        parent_a = name_element.find_element(By.XPATH, "./ancestor::a")
-                                        product_link = parent_a.get_attribute("href")
-                                except:
-                                    try:
-                                        link_el = product.find_element(By.CSS_SELECTOR, "h2 a")
-                                        product_link = link_el.get_attribute("href")
-                                    except:
-                                        pass
-                                break
-                        except:
-                            continue
-
-                    if not product_name:
-                        continue
-
-                    price_value = 0
-                    price_text = ""
-
-                    try:
-                        price_whole = product.find_element(By.CSS_SELECTOR, ".a-price-whole").text.strip()
-                        try:
-                            price_decimal = product.find_element(By.CSS_SELECTOR, ".a-price-fraction").text.strip()
-                        except:
-                            try:
-                                price_decimal_elem = product.find_element(By.CSS_SELECTOR, ".a-price-decimal")
-                                if price_decimal_elem.text.strip() == ",":
-                                    price_html = product.get_attribute("innerHTML")
-                                    decimal_match = re.search(
-                                        r'<span class="a-price-decimal">,</span>\s*<span[^>]*>(\d+)</span>',
-                                        price_html
-                                    )
-                                    price_decimal = decimal_match.group(1) if decimal_match else "00"
-                                else:
-                                    price_decimal = price_decimal_elem.text.strip()
-                            except:
-                                price_decimal = "00"
-
-                        price_text = f"{price_whole},{price_decimal}"
-                        price_value = self.clean_price_text(price_text)
-                    except:
-                        price_selectors_fallback = [
-                            ".a-price[data-a-size='xl'] .a-offscreen",
-                            ".a-price .a-offscreen",
-                            ".a-price-whole",
-                            "[data-a-size='xl'] .a-price-whole",
-                            ".a-price .a-price-whole",
-                            ".a-price[data-a-size='l']",
-                            ".a-price[data-a-size='m']",
-                        ]
-
-                        for selector in price_selectors_fallback:
-                            try:
-                                price_elements = product.find_elements(By.CSS_SELECTOR, selector)
-                                for element in price_elements:
-                                    candidate_text = element.text.strip()
-                                    candidate_value = self.clean_price_text(candidate_text)
-                                    if candidate_value > 0:
-                                        price_text = candidate_text
-                                        price_value = candidate_value
-                                        break
-                                if price_value > 0:
-                                    break
-                            except:
-                                continue
-
-                    if price_value > 0:
-                        all_candidates.append({
-                            "name": product_name,
-                            "price": price_value,
-                            "price_text": price_text,
-                            "link": product_link,
-                        })
-
-                except Exception:
-                    continue
+            if extraction is not None:
+                all_candidates = self.build_amazon_candidates(extraction["items"])
+            else:
+                all_candidates = self.extract_amazon_candidates_legacy(product_elements)
 
             # 2ª passagem: filtrar por matching — sem Gemini
-            valid_products = []
-            rejected_candidates = []
-
-            for c in all_candidates:
-                product_name = c["name"]
-                if modelo:
-                    if self.is_exact_product_match(product_name, modelo, marca, search_name=produto,
-                                                    category=categoria, specifications=especificacoes):
-                        valid_products.append(c)
-                    else:
-                        rejected_candidates.append(c)
-                else:
-                    search_words = search_term.lower().split()
-                    product_name_lower = product_name.lower()
-                    if (all(word in product_name_lower for word in search_words)
-                            and not any(kw in product_name_lower for kw in EXCLUSION_KEYWORDS)):
-                        valid_products.append(c)
-                    else:
-                        rejected_candidates.append(c)
+            valid_products, rejected_candidates = self.match_candidates(component, all_candidates, search_term)
+            # Com streaming a avaliação para no K-ésimo aceito: o resto da página não entra
+            # nas contagens abaixo, que então são parciais.
+            not_evaluated = len(all_candidates) - len(valid_products) - len(rejected_candidates)
 
             # Fallback Gemini: só se matching normal falhou completamente
-            # Produtos excluídos por keyword (kit, laptop, etc.) nunca vão ao Gemini
-            if not valid_products and rejected_candidates and modelo:
-                gemini_candidates = [
-                    c for c in rejected_candidates
-                    if not any(kw in c["name"].lower() for kw in EXCLUSION_KEYWORDS)
-                ]
-                gemini_candidates.sort(key=lambda x: x["price"])
-                if gemini_candidates:
-                    meta["llm_used"] = True
-                    print(f"[AMAZON] Matching normal: 0 resultados. Tentando LLM nos {min(3, len(gemini_candidates))} candidatos mais baratos...")
-                    for c in gemini_candidates[:3]:
-                        if self.ask_gemini_is_match(c["name"], produto, modelo):
-                            valid_products.append(c)
-                            meta["llm_confirmed"] = True
-                            break
+            if not valid_products:
+                if self.defer_llm_fallback("AMAZON", component, rejected_candidates, meta,
+                                           self.driver.current_url):
+                    return "pending_llm", None, meta
+                valid_products = self.llm_fallback("AMAZON", component, rejected_candidates, meta, deadline)
 
-            print(f"[AMAZON] Produtos validos: {len(valid_products)} | Rejeitados: {len(rejected_candidates)}")
+            print(f"[AMAZON] Produtos validos: {len(valid_products)} | Rejeitados: {len(rejected_candidates)}"
+                  + (f" | Nao avaliados: {not_evaluated} (contagens parciais)" if not_evaluated else ""))
 
             if not valid_products:
                 print("[AMAZON] Produto nao encontrado")
@@ -1504,64 +3839,30 @@ class PriceScraper:
 
             valid_products.sort(key=lambda x: x["price"])
             cheapest = valid_products[0]
-
-            print(f"[AMAZON] Top 3 precos encontrados:")
-            for i, p in enumerate(valid_products[:3], 1):
-                print(f"  {i}. R$ {p['price']:.2f} - {p['name'][:60]}...")
+            self.print_top_prices("AMAZON", valid_products)
 
             # Entrar na página do produto para pegar URL direta e verificar vendedor
-            shipped_by_store = None
-            direct_url = cheapest.get("link") or self.driver.current_url
-
-            if cheapest.get("link"):
-                try:
-                    print("[AMAZON] Abrindo pagina do produto para verificar vendedor...")
-                    self.driver.get(cheapest["link"])
-                    self.wait_for_page_load()
-                    self.human_delay(2, 4)
-
-                    direct_url = self.driver.current_url
-                    shipped_by_store = self.check_amazon_shipped_by_amazon()
-
-                    status_map = {
-                        True: "Vendido e enviado pela Amazon",
-                        False: "Vendedor/envio externo",
-                        None: "Nao foi possivel determinar"
-                    }
-                    print(f"[AMAZON] Vendedor: {status_map[shipped_by_store]}")
-
-                except Exception as e:
-                    print(f"[AMAZON] Falha ao verificar pagina do produto: {e}")
-            else:
-                print("[AMAZON] Link do produto nao encontrado, usando URL da busca")
-
-            result = {
-                "site": "Amazon",
-                "produto": cheapest["name"],
-                "preco": cheapest["price"],
-                "preco_texto": cheapest["price_text"],
-                "shipped_by_store": shipped_by_store,
-                "url": direct_url,
-                "status": "sucesso"
-            }
+            direct_url, shipped_by_store = self.verify_amazon_product_page(cheapest.get("link"), deadline)
 
-            print(f"[AMAZON] SELECIONADO: {cheapest['name']} - R$ {cheapest['price']:.2f}")
-            print(f"[AMAZON] URL: {direct_url}")
-
-            return "found", result, meta
+            return "found", self.build_amazon_result(cheapest, direct_url, shipped_by_store), meta
 
         except Exception as e:
             print(f"ERRO CRITICO: Amazon - {e}")
-            meta["error_type"] = "exception"
+            meta["error_type"] = "deadline_exceeded" if deadline and deadline.expired() else "exception"
             return "error", None, meta
 
-    def scrape_component(self, component):
+        finally:
+            meta["network"] = self.collect_network_report("AMAZON")
+
+    def scrape_component(self, component, deadline=None):
         """
         Busca preços de um componente em ambos os sites.
 
         [MONITORING/FIX] Retorna um dict com o status/dados/meta de cada site, sempre
         presentes (nunca um dict vazio ou None), para que update_component_prices possa
         decidir com precisão o que fazer em cada caso (found/not_found/error).
+
+        deadline: prazo compartilhado pelas duas buscas (ver Deadline).
         """
         component_id = component['id']
         component_name = component['name']
@@ -1570,11 +3871,21 @@ class PriceScraper:
         print(f"Processando: {component_name} (ID: {component_id})")
         print(f"{'=' * 60}")
 
-        kabum_status, kabum_data, kabum_meta = self.search_kabum(component)
+        if self.amazon_peer and self.amazon_peer.driver:
+            # [PERF] Lojas independentes em sessões independentes: roda as duas buscas ao
+            # mesmo tempo e junta os resultados quando ambas terminarem. O delay entre
+            # lojas não faz sentido aqui (cada Chrome só fala com um site).
+            with ThreadPoolExecutor(max_workers=2) as ex:
+                kabum_future = ex.submit(self.search_kabum, component, deadline)
+                amazon_future = ex.submit(self.amazon_peer.search_amazon, component, deadline)
+                kabum_status, kabum_data, kabum_meta = kabum_future.result()
+                amazon_status, amazon_data, amazon_meta = amazon_future.result()
+        else:
+            kabum_status, kabum_data, kabum_meta = self.search_kabum(component, deadline)
 
-        self.human_delay(5, 8)
+            self.human_delay(5, 8, deadline=deadline)
 
-        amazon_status, amazon_data, amazon_meta = self.search_amazon(component)
+            amazon_status, amazon_data, amazon_meta = self.search_amazon(component, deadline)
 
         results = {
             "kabum": {"status": kabum_status, "data": kabum_data, "meta": kabum_meta},
@@ -1587,6 +3898,8 @@ class PriceScraper:
             print(f"Kabum: R$ {kabum_data['preco']:.2f}")
         elif kabum_status == "not_found":
             print("Kabum: Nao encontrado")
+        elif kabum_status == "pending_llm":
+            print("Kabum: Aguardando LLM (resolvido em segundo plano)")
         else:
             print(f"Kabum: Erro tecnico ({kabum_meta.get('error_type')}) — preco anterior mantido")
 
@@ -1596,6 +3909,8 @@ class PriceScraper:
             print(f"Amazon: R$ {amazon_data['preco']:.2f} {shipped_label}")
         elif amazon_status == "not_found":
             print("Amazon: Nao encontrado")
+        elif amazon_status == "pending_llm":
+            print("Amazon: Aguardando LLM (resolvido em segundo plano)")
         else:
             print(f"Amazon: Erro tecnico ({amazon_meta.get('error_type')}) — preco anterior mantido")
 
@@ -1613,10 +3928,171 @@ class PriceScraper:
 
         print(f"{'=' * 60}\n")
 
-        return results
+        return results
+
+    def chromedriver_pid(self):
+        """PID do chromedriver desta sessão (o Chrome e seus renderers são filhos dele)."""
+        try:
+            return self.driver.service.process.pid
+        except AttributeError:
+            return None
+
+    def kill_browser(self):
+        """
+        [PERF] Mata a árvore chromedriver + Chrome desta sessão (e do peer da Amazon).
+        Qualquer comando WebDriver em andamento falha na hora com erro de conexão, então a
+        thread travada nele se desenrola sozinha em vez de ficar presa até o timeout HTTP.
+        """
+        killed = 0
+        if self.amazon_peer:
+            killed += self.amazon_peer.kill_browser()
+        pid = self.chromedriver_pid()
+        if pid:
+            killed += kill_process_tree(pid)
+        return killed
+
+    def restart_driver(self, include_peer=True, graceful=True):
+        """
+        Descarta o Chrome atual e sobe um novo na mesma instância. graceful=True tenta um
+        quit() (limitado a DRIVER_QUIT_TIMEOUT_S) antes de matar a árvore; com a sessão já
+        morta ou travada (sonda falhou, watchdog), graceful=False mata direto.
+        """
+        if include_peer and self.amazon_peer and not self.peer_disabled:
+            self.amazon_peer.restart_driver(graceful=graceful)
+        if self.driver:
+            pid = self.chromedriver_pid()
+            if graceful:
+                self._quit_driver(DRIVER_QUIT_TIMEOUT_S)
+            if pid:
+                kill_process_tree(pid)  # o que o quit não levou (Chrome travado/órfãos)
+            self.driver = None
+        return self.setup_driver()
+
+    def _quit_driver(self, timeout):
+        """driver.quit() numa thread daemon; desiste depois de timeout (a árvore é morta em seguida)."""
+        driver = self.driver
+
+        def run():
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+        thread = threading.Thread(target=run, name=f"quit-W{self.worker_id}", daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            print(f"[W{self.worker_id}] quit() do Chrome nao respondeu em {timeout}s — matando a arvore")
+
+    def session_alive(self):
+        """Sonda barata da sessão: um script trivial passa pelo chromedriver e pelo renderer."""
+        if not self.driver:
+            return False
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception as e:
+            # Não só WebDriverException: com o chromedriver morto, o RemoteConnection deixa
+            # escapar erros do urllib3 (MaxRetryError, ProtocolError) sem embrulhar.
+            print(f"[W{self.worker_id}] Sessao do Chrome morta: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+            return False
+
+    def _resurrect(self):
+        """Recria o driver desta sessão com backoff exponencial. Retorna (ok, espera_s)."""
+        waited = 0.0
+        for attempt in range(1, SESSION_RESURRECT_ATTEMPTS + 1):
+            if self.restart_driver(include_peer=False, graceful=False) and self.session_alive():
+                return True, waited
+            if attempt < SESSION_RESURRECT_ATTEMPTS:
+                delay = SESSION_RESURRECT_BACKOFF_S * 2 ** (attempt - 1)
+                print(f"[W{self.worker_id}] Falha ao recriar o Chrome (tentativa {attempt}/{SESSION_RESURRECT_ATTEMPTS}) — "
+                      f"nova tentativa em {delay}s")
+                time.sleep(delay)
+                waited += delay
+        return False, waited
+
+    def ensure_session(self):
+        """
+        [PERF] Chamado pelo worker antes de cada componente: sonda esta sessão e o peer
+        da Amazon e recria a que estiver morta. Peer irrecuperável só desliga a busca
+        paralela até o fim da run (scrape_component volta ao sequencial e o peer não é mais
+        sondado nem recriado); sessão principal irrecuperável devolve alive=False.
+        Retorna (alive, recuperações, ressurreições que falharam, segundos de backoff).
+        """
+        recoveries, failures, backoff_s = 0, 0, 0.0
+        peer = None if self.peer_disabled else self.amazon_peer
+        for session in (self, peer):
+            if not session or session.session_alive():
+                continue
+            label = "peer Amazon" if session.is_peer else "Chrome"
+            print(f"[W{self.worker_id}] Recriando {label}...")
+            ok, waited = session._resurrect()
+            backoff_s += waited
+            if ok:
+                recoveries += 1
+                print(f"[W{self.worker_id}] {label} recuperado")
+            else:
+                failures += 1
+                print(f"[W{self.worker_id}] {label} nao recuperado apos {SESSION_RESURRECT_ATTEMPTS} tentativas")
+                if session is peer:
+                    self._disable_peer()
+        return bool(self.driver) and self.session_alive(), recoveries, failures, backoff_s
+
+    def _disable_peer(self):
+        """Desliga o peer da Amazon até o fim da run (o objeto fica, pelos contadores)."""
+        self.peer_disabled = True
+        self.amazon_peer.kill_browser()
+        self.amazon_peer.driver = None
+        print(f"[W{self.worker_id}] Peer Amazon desativado — busca por loja sequencial ate o fim da run")
+
+    def _recycle_reason(self):
+        """Mede a memória do Chrome desta sessão e diz se algum limite foi cruzado."""
+        pid = self.driver and self.chromedriver_pid()
+        if not pid:
+            return None
+        memory_mb = process_tree_memory_mb(pid)
+        self.memory_peak_mb = max(self.memory_peak_mb, memory_mb)
+        if DRIVER_MAX_MEMORY_MB and memory_mb >= DRIVER_MAX_MEMORY_MB:
+            return f"memoria {memory_mb:.0f}MB >= {DRIVER_MAX_MEMORY_MB}MB"
+        if DRIVER_MAX_NAVIGATIONS and self.navigations >= DRIVER_MAX_NAVIGATIONS:
+            return f"{self.navigations} navegacoes"
+        return None
+
+    def govern_memory(self):
+        """
+        [PERF] Governador de memória: chamado pelo worker entre componentes (nunca no meio
+        de uma busca). Recicla esta sessão e/ou o peer da Amazon que tenha passado de
+        DRIVER_MAX_MEMORY_MB ou DRIVER_MAX_NAVIGATIONS. Retorna (recicladas, falhas) — só
+        conta como reciclagem o restart que subiu um Chrome novo.
+        """
+        recycled = failed = 0
+        for session in (self, self.amazon_peer):
+            if not session:
+                continue
+            reason = session._recycle_reason()
+            if not reason:
+                continue
+            label = "peer Amazon" if session.is_peer else "Chrome"
+            print(f"[W{self.worker_id}] Reciclando {label} ({reason})")
+            if session.restart_driver(include_peer=False):
+                session.driver_recycles += 1
+                recycled += 1
+            else:
+                # Sem driver agora: ensure_session tenta recriar antes do próximo componente
+                print(f"[W{self.worker_id}] Falha ao reciclar {label}")
+                failed += 1
+        return recycled, failed
+
+    @property
+    def memory_peak_total_mb(self):
+        """Maior pico de memória entre esta sessão e o peer da Amazon."""
+        return max(self.memory_peak_mb, self.amazon_peer.memory_peak_mb if self.amazon_peer else 0.0)
 
     def close(self):
-        """Fecha o driver"""
+        """Fecha o driver (e a sessão dedicada da Amazon, se houver) e a sessão HTTP"""
+        if self.amazon_peer:
+            self.amazon_peer.close()
+        if self.http:
+            self.http.close()
         if self.driver:
             try:
                 self.driver.quit()
@@ -1631,25 +4107,31 @@ class PriceScraper:
 # resolver linhas em scraper_alerts. Nunca deletam nem descontinuam nada sozinhos; só
 # sinalizam para revisão manual no painel admin.
 
+def _alert_expires_at(expires_days):
+    if not expires_days:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + expires_days * 86400))
+
+
 def create_alert(component_id, alert_type, site, details, expires_days=ALERT_DEFAULT_EXPIRY_DAYS):
     """Cria um novo alerta pontual (preço, mismatch entre lojas, etc)."""
     if alert_type not in ALLOWED_ALERT_TYPES:
         print(f"[ALERT] Tipo invalido ignorado: {alert_type}")
         return None
+    payload = {
+        "component_id": component_id,
+        "type": alert_type,
+        "site": site,
+        "details": details,
+        "expires_at": _alert_expires_at(expires_days),
+    }
+    alert_index = get_alert_index()
+    if alert_index:
+        # [PERF] Inserção vai no próximo lote do AlertIndex
+        alert_index.queue_insert(payload)
+        print(f"[ALERT] Criado: {alert_type} | site={site} | component={component_id}")
+        return None
     try:
-        expires_at = None
-        if expires_days:
-            expires_at = time.strftime(
-                "%Y-%m-%dT%H:%M:%SZ",
-                time.gmtime(time.time() + expires_days * 86400)
-            )
-        payload = {
-            "component_id": component_id,
-            "type": alert_type,
-            "site": site,
-            "details": details,
-            "expires_at": expires_at,
-        }
         response = supabase.table("scraper_alerts").insert(payload).execute()
         print(f"[ALERT] Criado: {alert_type} | site={site} | component={component_id}")
         return response.data[0] if response.data else None
@@ -1688,18 +4170,16 @@ def upsert_streak_alert(component_id, alert_type, site, details, expires_days=AL
     um aberto para o mesmo (component_id, type, site), só atualiza os detalhes — evita
     spam de alertas duplicados a cada run enquanto a condição persistir.
     """
+    alert_index = get_alert_index()
+    if alert_index:
+        return alert_index.upsert_streak(component_id, alert_type, site, details, expires_days)
+
     existing = get_open_alert(component_id, alert_type, site)
     if existing:
         try:
-            expires_at = None
-            if expires_days:
-                expires_at = time.strftime(
-                    "%Y-%m-%dT%H:%M:%SZ",
-                    time.gmtime(time.time() + expires_days * 86400)
-                )
             supabase.table("scraper_alerts").update({
                 "details": details,
-                "expires_at": expires_at,
+                "expires_at": _alert_expires_at(expires_days),
             }).eq("id", existing["id"]).execute()
         except Exception as e:
             print(f"[ALERT] Falha ao atualizar alerta existente: {e}")
@@ -1711,6 +4191,11 @@ def upsert_streak_alert(component_id, alert_type, site, details, expires_days=AL
 
 def resolve_streak_alert_if_open(component_id, alert_type, site):
     """Marca como resolvido um alerta de streak quando a condição que o gerou já passou."""
+    alert_index = get_alert_index()
+    if alert_index:
+        alert_index.resolve(component_id, alert_type, site)
+        return
+
     existing = get_open_alert(component_id, alert_type, site)
     if existing:
         try:
@@ -1724,6 +4209,207 @@ def resolve_streak_alert_if_open(component_id, alert_type, site):
             print(f"[ALERT] Falha ao resolver alerta: {e}")
 
 
+# [PERF] Índice de alertas abertos: carrega de uma vez os alertas de streak não resolvidos
+# no início da run e passa a responder get_open_alert em memória (antes eram 3+ consultas
+# PostgREST por componente, quase sempre sem nada aberto). Criações, atualizações de
+# detalhes e resoluções viram lotes gravados a cada ALERT_FLUSH_EVERY operações e no fim.
+ALERT_INDEX = _env_flag("ALERT_INDEX")
+ALERT_FLUSH_EVERY = max(1, _env_int("ALERT_FLUSH_EVERY", 50))
+STREAK_ALERT_TYPES = ("not_found_streak", "possible_discontinued")
+_ALERT_PAGE_SIZE = 1000
+_ALERT_ID_CHUNK = 200
+ALERT_BULK_UPDATE_RPC = "bulk_update_alert_details"  # ver supabase/migrations
+
+
+class AlertIndex:
+    """
+    Espelho em memória dos alertas de streak abertos, chaveado por (component_id, type, site),
+    com as escritas pendentes:
+      - inserts (streak novo e alertas pontuais) -> um insert com lista;
+      - detalhes de streak já aberto -> um UPDATE em lote pela RPC ALERT_BULK_UPDATE_RPC
+        (linha a linha se a função não existir no banco);
+      - resoluções -> um update com in_("id", [...]).
+    Streak criado e resolvido antes do flush simplesmente não é gravado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = {}              # chave -> id do alerta aberto no banco
+        self._pending_streaks = {}   # chave -> payload de streak novo ainda não inserido
+        self._pending_points = []    # payloads de alertas pontuais
+        self._detail_updates = {}    # id -> {"details", "expires_at"}
+        self._resolves = set()
+        self._ops = 0
+        self.loaded = 0
+        self.inserted = 0
+        self.updated = 0
+        self.resolved = 0
+        self.bulk_update = True
+
+    def load(self):
+        """Carrega os alertas de streak abertos (paginado). Levanta exceção se falhar."""
+        start = 0
+        while True:
+            response = (
+                supabase.table("scraper_alerts")
+                .select("id,component_id,type,site")
+                .eq("resolved", False)
+                .in_("type", list(STREAK_ALERT_TYPES))
+                .order("id")
+                .range(start, start + _ALERT_PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = response.data or []
+            for row in rows:
+                # Como get_open_alert (limit 1): se houver duplicados, vale o primeiro
+                self._open.setdefault((row["component_id"], row["type"], row["site"]), row["id"])
+            self.loaded += len(rows)
+            if len(rows) < _ALERT_PAGE_SIZE:
+                break
+            start += _ALERT_PAGE_SIZE
+        print(f"[ALERT] Indice carregado: {len(self._open)} alertas de streak abertos")
+        return self
+
+    def get_open_id(self, component_id, alert_type, site):
+        with self._lock:
+            return self._open.get((component_id, alert_type, site))
+
+    def queue_insert(self, payload):
+        with self._lock:
+            self._pending_points.append(payload)
+            self._ops += 1
+        self._maybe_flush()
+
+    def upsert_streak(self, component_id, alert_type, site, details, expires_days):
+        key = (component_id, alert_type, site)
+        expires_at = _alert_expires_at(expires_days)
+        with self._lock:
+            alert_id = self._open.get(key)
+            if alert_id is not None:
+                self._detail_updates[alert_id] = {"details": details, "expires_at": expires_at}
+            elif key in self._pending_streaks:
+                self._pending_streaks[key].update(details=details, expires_at=expires_at)
+            else:
+                self._pending_streaks[key] = {
+                    "component_id": component_id, "type": alert_type, "site": site,
+                    "details": details, "expires_at": expires_at,
+                }
+                print(f"[ALERT] Criado: {alert_type} | site={site} | component={component_id}")
+            self._ops += 1
+        self._maybe_flush()
+        return alert_id
+
+    def resolve(self, component_id, alert_type, site):
+        key = (component_id, alert_type, site)
+        with self._lock:
+            alert_id = self._open.pop(key, None)
+            cancelled = self._pending_streaks.pop(key, None)
+            if alert_id is None and cancelled is None:
+                return
+            if alert_id is not None:
+                self._detail_updates.pop(alert_id, None)
+                self._resolves.add(alert_id)
+                self._ops += 1
+        print(f"[ALERT] Resolvido automaticamente: {alert_type} | site={site} | component={component_id}")
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        with self._lock:
+            due = self._ops >= ALERT_FLUSH_EVERY
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Grava os lotes pendentes. Falhas são logadas e as operações descartadas (alerta
+        é sinal de revisão, não dado de negócio — a próxima run recria o que faltar)."""
+        with self._lock:
+            streaks = self._pending_streaks
+            points = self._pending_points
+            updates = self._detail_updates
+            resolves = list(self._resolves)
+            self._pending_streaks, self._pending_points = {}, []
+            self._detail_updates, self._resolves = {}, set()
+            self._ops = 0
+
+        inserts = list(streaks.values()) + points
+        if inserts:
+            try:
+                response = supabase.table("scraper_alerts").insert(inserts).execute()
+                self.inserted += len(inserts)
+                with self._lock:
+                    for row in response.data or []:
+                        key = (row.get("component_id"), row.get("type"), row.get("site"))
+                        if key in streaks:
+                            self._open.setdefault(key, row["id"])
+            except Exception as e:
+                print(f"[ALERT] Falha ao inserir lote de {len(inserts)} alertas: {e}")
+
+        if updates:
+            self._write_detail_updates(updates)
+
+        for i in range(0, len(resolves), _ALERT_ID_CHUNK):
+            chunk = resolves[i:i + _ALERT_ID_CHUNK]
+            try:
+                supabase.table("scraper_alerts").update({
+                    "resolved": True,
+                    "resolved_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                }).in_("id", chunk).execute()
+                self.resolved += len(chunk)
+            except Exception as e:
+                print(f"[ALERT] Falha ao resolver lote de {len(chunk)} alertas: {e}")
+
+        if inserts or updates or resolves:
+            print(f"[ALERT] Lote gravado: {len(inserts)} novos | {len(updates)} atualizados | {len(resolves)} resolvidos")
+
+    def _write_detail_updates(self, updates):
+        rows = [{"id": alert_id, **fields} for alert_id, fields in updates.items()]
+        if self.bulk_update:
+            try:
+                supabase.rpc(ALERT_BULK_UPDATE_RPC, {"items": rows}).execute()
+                self.updated += len(rows)
+                return
+            except Exception as e:
+                print(f"[ALERT] UPDATE em lote falhou ({e}) — atualizando linha a linha")
+                if _is_permanent_db_error(e):
+                    self.bulk_update = False
+        for row in rows:
+            try:
+                supabase.table("scraper_alerts").update({
+                    "details": row["details"], "expires_at": row["expires_at"],
+                }).eq("id", row["id"]).execute()
+                self.updated += 1
+            except Exception as e:
+                print(f"[ALERT] Falha ao atualizar alerta existente: {e}")
+
+    def summary(self):
+        return {
+            "alertas_abertos_carregados": self.loaded,
+            "alertas_inseridos": self.inserted,
+            "alertas_atualizados": self.updated,
+            "alertas_resolvidos": self.resolved,
+        }
+
+
+_alert_index = None
+_alert_index_lock = threading.Lock()
+
+
+def get_alert_index():
+    """AlertIndex da run (carregado na primeira chamada), ou None se desativado/falhou."""
+    global _alert_index
+    if not ALERT_INDEX:
+        return None
+    with _alert_index_lock:
+        if _alert_index is None:
+            try:
+                _alert_index = AlertIndex().load()
+            except Exception as e:
+                # Sem índice, os helpers voltam a consultar o banco chamada a chamada
+                print(f"[ALERT] Falha ao carregar indice de alertas — usando consultas diretas: {e}")
+                _alert_index = False
+        return _alert_index or None
+
+
 def record_run_health(stats):
     """
     [MONITORING] Registra um snapshot de saúde da run atual. Sempre grava (mesmo em runs
@@ -1759,8 +4445,69 @@ def record_run_health(stats):
         "llm_fallback_attempts": stats["llm_fallback_attempts"],
         "llm_fallback_confirm_rate_pct": llm_confirm_rate,
         "duracao_minutos": round(stats["elapsed_minutes"], 1),
+        "workers": stats.get("workers", 1),
+        "buscas_prazo_esgotado": stats.get("deadline_exceeded_count", 0),
+        "chrome_reciclagens": stats.get("driver_recycles", 0),
+        "chrome_reciclagens_falhas": stats.get("driver_recycle_failures", 0),
+        "chrome_memoria_pico_mb": round(stats.get("chrome_memory_peak_mb", 0.0)),
+        "chrome_sessoes_recuperadas": stats.get("session_recoveries", 0),
+        "chrome_sessoes_perdidas": stats.get("session_recovery_failures", 0),
+        "chrome_recuperacao_espera_s": round(stats.get("session_recovery_backoff_s", 0.0), 1),
     }
 
+    if HTTP_FIRST_FETCH:
+        details["buscas_via_http"] = stats["fetch_http_count"]
+        details["buscas_escaladas_selenium"] = stats["http_escalation_count"]
+
+    match_cache = opened_local_cache("match")
+    if match_cache:
+        details["cache_matching_hits"] = match_cache.hits
+        details["cache_matching_consultas"] = match_cache.hits + match_cache.misses
+
+    if _component_write_buffer:
+        details.update(_component_write_buffer.summary())
+
+    if _alert_index:
+        details.update(_alert_index.summary())
+
+    if _db_writer:
+        details.update(_db_writer.summary())
+
+    if _result_journal:
+        details.update(_result_journal.summary())
+
+    if _match_ranker:
+        details["ranker_aceitos_local"] = stats.get("ranker_local_accepts", 0)
+        details["ranker_descartados_local"] = stats.get("ranker_local_rejects", 0)
+
+    limiter = _groq_rate_limiter
+    if limiter and (limiter.requests_made or limiter.skipped):
+        details["llm_requests_groq"] = limiter.requests_made
+        details["llm_requests_puladas_rate_limit"] = limiter.skipped
+        details["llm_espera_rate_limit_s"] = round(limiter.wait_seconds, 1)
+        details["llm_rpd_usadas_hoje"] = limiter.daily_requests
+
+    llm_cache = opened_local_cache("llm")
+    if llm_cache:
+        llm_lookups = llm_cache.hits + llm_cache.misses
+        details["cache_llm_hits"] = llm_cache.hits
+        details["cache_llm_consultas"] = llm_lookups
+        details["cache_llm_hit_rate_pct"] = (
+            round(llm_cache.hits / llm_lookups * 100, 1) if llm_lookups else None
+        )
+
+    if stats.get("net_pages"):
+        details["rede_perfil_bloqueio"] = NETWORK_BLOCKING_PROFILE
+        details["rede_requests_bloqueadas"] = stats["net_blocked_requests"]
+        details["rede_requests_total"] = stats["net_requests"]
+        details["rede_economia_estimada_mb"] = round(stats["net_bytes_saved_est"] / 1_048_576, 1)
+        details["rede_transferido_mb"] = round(stats["net_bytes_loaded"] / 1_048_576, 1)
+
+    if CHROME_PROFILE_DIR:
+        details["perfil_chrome_partidas_quentes"] = stats.get("profile_warm_starts", 0)
+        details["perfil_chrome_partidas_frias"] = stats.get("profile_cold_starts", 0)
+        details["rede_respostas_cache_disco"] = stats.get("net_cache_hits", 0)
+
     try:
         expires_at = time.strftime(
             "%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + RUN_HEALTH_EXPIRY_DAYS * 86400)
@@ -1784,7 +4531,7 @@ def record_run_health(stats):
 # DATABASE
 # ---------------------------------------------------------------------------
 
-def update_component_prices(component, results):
+def update_component_prices(component, results, observed_at=None):
     """
     Atualiza preços do componente no Supabase, com base no status found/not_found/error
     retornado por cada site nesta run, e dispara os alertas de monitoramento cabíveis.
@@ -1797,12 +4544,14 @@ def update_component_prices(component, results):
                        continua igual ao de hoje) e incrementa o streak de misses.
       - "error"     -> NÃO mexe em nada do preço/url/found/misses daquele site. A run
                        falhou tecnicamente, não o produto sumiu.
+
+    observed_at: horário da coleta, quando diferente de agora (replay do journal).
     """
     component_id = component['id']
     previous = component.get('best_price') or {}
     prev_kabum = previous.get('kabum') or {}
     prev_amazon = previous.get('amazon') or {}
-    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    timestamp = observed_at or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
     if not results:
         # Defensivo: nunca deveria acontecer (main() sempre monta um results bem-formado),
@@ -1921,12 +4670,26 @@ def update_component_prices(component, results):
             "shipped_by_store": new_best_price[best_site]["shipped_by_store"],
         }
 
+    # [PERF] Com DB_WRITE_BUFFER, o best_price vai para o buffer e é gravado em lote
+    write_buffer = get_component_write_buffer()
+    if write_buffer:
+        write_buffer.add(component_id, new_best_price)
+        return True
+
+    return write_component_best_price(component_id, new_best_price)
+
+
+def write_component_best_price(component_id, new_best_price):
+    """UPDATE de uma linha de components (caminho original, sem buffer)."""
     try:
         response = supabase.table("components").update({
             "best_price": new_best_price
         }).eq("id", component_id).execute()
 
         if response.data:
+            journal = get_result_journal()
+            if journal:
+                journal.ack([component_id])
             return True
         else:
             print(f"ERRO: Falha ao atualizar componente {component_id} no banco")
@@ -1937,12 +4700,614 @@ def update_component_prices(component, results):
         return False
 
 
+# [PERF] Buffer de escrita de components: em vez de um UPDATE por componente dentro do
+# loop de scraping, junta os best_price e grava com um UPDATE em lote (função
+# bulk_update_component_prices, em supabase/migrations) a cada DB_WRITE_BATCH_SIZE
+# componentes ou DB_WRITE_FLUSH_S segundos.
+DB_WRITE_BUFFER = _env_flag("DB_WRITE_BUFFER")
+DB_WRITE_BATCH_SIZE = max(1, _env_int("DB_WRITE_BATCH_SIZE", 10))
+DB_WRITE_FLUSH_S = _env_int("DB_WRITE_FLUSH_S", 60)
+DB_WRITE_MAX_RETRIES = 3
+DB_BULK_UPDATE_RPC = "bulk_update_component_prices"
+
+
+def _is_permanent_db_error(error):
+    """Erros que retry não resolve (constraint, permissão/RLS, requisição inválida)."""
+    code = getattr(error, "code", None) or ""
+    return isinstance(error, APIError) and (code.startswith(("23", "42", "PGRST")))
+
+
+class ComponentWriteBuffer:
+    """
+    Acumula {id: best_price} e grava em lote pela RPC DB_BULK_UPDATE_RPC — um único
+    UPDATE ... FROM jsonb_populate_recordset no banco, só na coluna best_price. (Um upsert
+    com linhas parciais viraria INSERT ... ON CONFLICT e falharia por NOT NULL/RLS.)
+    Lote com falha transitória é re-tentado com backoff; se a RPC falhar de vez (função
+    não criada, permissão), o lote cai para UPDATEs linha a linha e o resto da run segue
+    nesse modo. Thread-safe: workers e o resolver do LLM chamam add(); flushes são
+    serializados.
+    """
+
+    def __init__(self, batch_size=DB_WRITE_BATCH_SIZE, flush_interval_s=DB_WRITE_FLUSH_S,
+                 max_retries=DB_WRITE_MAX_RETRIES):
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_retries = max_retries
+        self.bulk_enabled = True
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.latencies_ms = []
+        self._rows = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def add(self, component_id, best_price):
+        with self._lock:
+            self._rows[component_id] = best_price
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        """Grava se o lote encheu ou se passou DB_WRITE_FLUSH_S desde o último flush."""
+        with self._lock:
+            due = self._rows and (
+                len(self._rows) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval_s
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Grava tudo que está pendente. Retorna False se alguma linha ficou sem gravar."""
+        with self._flush_lock:
+            with self._lock:
+                rows = [{"id": cid, "best_price": bp} for cid, bp in self._rows.items()]
+                self._rows = {}
+                self._last_flush = time.monotonic()
+            if not rows:
+                return True
+            if self.bulk_enabled and self._update_batch(rows):
+                return True
+            return self._update_rows(rows)
+
+    def _update_batch(self, rows):
+        for attempt in range(1, self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                response = supabase.rpc(DB_BULK_UPDATE_RPC, {"items": rows}).execute()
+            except Exception as e:
+                print(f"[DB] Falha no UPDATE em lote ({len(rows)} linhas, tentativa {attempt}/{self.max_retries}): {e}")
+                if _is_permanent_db_error(e):
+                    print(f"[DB] RPC {DB_BULK_UPDATE_RPC} indisponivel — seguindo com UPDATE por linha")
+                    self.bulk_enabled = False
+                    return False
+                if attempt < self.max_retries:
+                    time.sleep(2 ** attempt)
+                continue
+            latency_ms = (time.perf_counter() - started) * 1000
+            if isinstance(response.data, int) and response.data < len(rows):
+                # ids que não existem mais na tabela — nada a regravar
+                print(f"[DB] UPDATE em lote: {response.data}/{len(rows)} componentes encontrados")
+            journal = get_result_journal()
+            if journal:
+                journal.ack([row["id"] for row in rows])
+            self.flushes += 1
+            self.rows_written += len(rows)
+            self.latencies_ms.append(latency_ms)
+            print(f"[DB] Flush: {len(rows)} componentes em {latency_ms:.0f}ms")
+            return True
+        return False
+
+    def _update_rows(self, rows):
+        started = time.perf_counter()
+        ok = True
+        for row in rows:
+            if write_component_best_price(row["id"], row["best_price"]):
+                self.rows_written += 1
+            else:
+                self.rows_failed += 1
+                ok = False
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.latencies_ms.append(latency_ms)
+        print(f"[DB] Flush (por linha): {len(rows)} componentes em {latency_ms:.0f}ms")
+        return ok
+
+    def summary(self):
+        latencies = self.latencies_ms
+        return {
+            "db_flushes": self.flushes,
+            "db_linhas_gravadas": self.rows_written,
+            "db_linhas_falhadas": self.rows_failed,
+            "db_flush_latencia_media_ms": round(sum(latencies) / len(latencies)) if latencies else None,
+            "db_flush_latencia_max_ms": round(max(latencies)) if latencies else None,
+            "db_update_em_lote": self.bulk_enabled,
+        }
+
+
+_component_write_buffer = None
+_component_write_buffer_lock = threading.Lock()
+
+
+def get_component_write_buffer():
+    """ComponentWriteBuffer único do processo, ou None se DB_WRITE_BUFFER está desligado."""
+    global _component_write_buffer
+    if not DB_WRITE_BUFFER:
+        return None
+    with _component_write_buffer_lock:
+        if _component_write_buffer is None:
+            _component_write_buffer = ComponentWriteBuffer()
+        return _component_write_buffer
+
+
+# [PERF] Journal de resultados: cada results com trabalho de browser (algum site found ou
+# not_found) é anexado a um JSONL em SCRAPER_CACHE_DIR antes de ir ao banco, e recebe um
+# "ack" quando o best_price é de fato gravado. Se a run morrer (cancelamento no limite de
+# 6h, Supabase fora), a próxima run regrava as entradas sem ack antes de começar, em vez
+# de jogar fora o scraping já feito.
+RESULT_JOURNAL = _env_flag("RESULT_JOURNAL")
+RESULT_JOURNAL_FILE = "results_journal.jsonl"
+RESULT_JOURNAL_MAX_AGE_DAYS = _env_int("RESULT_JOURNAL_MAX_AGE_DAYS", 7)
+_JOURNAL_ID_CHUNK = 200
+
+
+class ResultJournal:
+    """
+    JSONL append-only com dois tipos de linha:
+      {"op": "result", "seq": n, "ts": "...Z", "component": {...}, "results": {...}}
+      {"op": "ack", "seqs": [n, ...]}
+    O ack é por componente: quando o best_price de um id é gravado, todas as entradas
+    pendentes daquele id são confirmadas. Linha truncada no fim (processo morto no meio
+    da escrita) é ignorada na leitura.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.appended = 0
+        self.acked = 0
+        self.replayed = 0
+        self.superseded = 0
+        self._lock = threading.Lock()
+        self._pending = {}  # component_id -> [seq, ...]
+        self._dropped = set()  # seqs descartados no replay (superados/antigos)
+        self._seq = 0
+        self._file = None
+
+    def _read_entries(self):
+        """Entradas "result" sem ack, em ordem. Atualiza o contador de seq."""
+        entries, acked = {}, set()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("op") == "result":
+                        entries[record["seq"]] = record
+                        self._seq = max(self._seq, record["seq"])
+                    elif record.get("op") == "ack":
+                        acked.update(record.get("seqs") or [])
+        except FileNotFoundError:
+            return []
+        return [entries[seq] for seq in sorted(entries) if seq not in acked]
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def _write(self, record):
+        f = self._open()
+        f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        f.flush()
+
+    def append(self, component, results):
+        """
+        Registra o results antes da gravação; retorna True se anexou. Falha de disco não
+        derruba a busca (a entrada só fica de fora). Sites ainda em "pending_llm"
+        (anexados pelo LLMFallbackResolver) voltam no replay como erro técnico: o preço
+        daquele site fica como estava.
+        """
+        if not any((results.get(site) or {}).get("status") in ("found", "not_found") for site in ("kabum", "amazon")):
+            return False  # só erro técnico/pendente: não há trabalho a preservar
+        with self._lock:
+            self._seq += 1
+            record = {
+                "op": "result",
+                "seq": self._seq,
+                "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "component": {k: v for k, v in component.items() if k != "best_price"},
+                "results": results,
+            }
+            try:
+                self._write(record)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"[JOURNAL] Falha ao anexar resultado de {component.get('id')}: {e}")
+                return False
+            self._pending.setdefault(component["id"], []).append(self._seq)
+            self.appended += 1
+            return True
+
+    def ack(self, component_ids):
+        with self._lock:
+            seqs = [seq for cid in component_ids for seq in self._pending.pop(cid, [])]
+            if not seqs:
+                return
+            try:
+                self._write({"op": "ack", "seqs": seqs})
+                self.acked += len(seqs)
+            except OSError as e:
+                print(f"[JOURNAL] Falha ao registrar ack: {e}")
+
+    def replay(self):
+        """
+        Regrava as entradas sem ack de runs anteriores. Relê o best_price atual de cada
+        componente e pula a entrada se a linha já foi atualizada depois da coleta
+        (updated_at >= ts da entrada) ou se ela passou de RESULT_JOURNAL_MAX_AGE_DAYS.
+        """
+        with self._lock:
+            entries = self._read_entries()
+        if not entries:
+            return
+        cutoff = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - RESULT_JOURNAL_MAX_AGE_DAYS * 86400))
+        latest = {}
+        for entry in entries:
+            previous = latest.get(entry["component"]["id"])
+            if previous:
+                self._dropped.add(previous["seq"])  # a mais recente de cada componente vence
+            if entry["ts"] >= cutoff:
+                latest[entry["component"]["id"]] = entry
+            else:
+                self._dropped.add(entry["seq"])
+        print(f"[JOURNAL] {len(entries)} resultados sem ack de runs anteriores ({len(latest)} componentes)")
+
+        ids = list(latest)
+        current = {}
+        for i in range(0, len(ids), _JOURNAL_ID_CHUNK):
+            response = (
+                supabase.table("components")
+                .select("id,best_price")
+                .in_("id", ids[i:i + _JOURNAL_ID_CHUNK])
+                .execute()
+            )
+            for row in response.data or []:
+                current[row["id"]] = row.get("best_price") or {}
+
+        for cid, entry in latest.items():
+            best_price = current.get(cid)
+            if best_price is None or (best_price.get("updated_at") or "") >= entry["ts"]:
+                self._dropped.add(entry["seq"])
+                self.superseded += 1
+                continue
+            with self._lock:
+                self._pending.setdefault(cid, []).append(entry["seq"])
+            component = dict(entry["component"], best_price=best_price)
+            with _db_write_lock:
+                update_component_prices(component, entry["results"], observed_at=entry["ts"])
+            self.replayed += 1
+
+        write_buffer = get_component_write_buffer()
+        if write_buffer:
+            write_buffer.flush()
+        print(f"[JOURNAL] Replay: {self.replayed} regravados | {self.superseded} ja superados/descartados")
+
+    def compact(self):
+        """Reescreve o journal só com as entradas ainda sem ack e não descartadas (atômico)."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            kept = [e for e in self._read_entries() if e["seq"] not in self._dropped]
+            try:
+                directory = os.path.dirname(self.path) or "."
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix=".results_journal.", dir=directory)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    for entry in kept:
+                        f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[JOURNAL] Falha ao compactar {self.path}: {e}")
+                return
+        if kept:
+            print(f"[JOURNAL] {len(kept)} resultados continuam sem ack para a proxima run")
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def summary(self):
+        return {
+            "journal_anexados": self.appended,
+            "journal_acks": self.acked,
+            "journal_regravados": self.replayed,
+            "journal_superados": self.superseded,
+        }
+
+
+_result_journal = None
+_result_journal_lock = threading.Lock()
+
+
+def get_result_journal():
+    """ResultJournal único do processo, ou None se RESULT_JOURNAL está desligado."""
+    global _result_journal
+    if not RESULT_JOURNAL:
+        return None
+    with _result_journal_lock:
+        if _result_journal is None:
+            _result_journal = ResultJournal(os.path.join(SCRAPER_CACHE_DIR, RESULT_JOURNAL_FILE))
+        return _result_journal
+
+
 # ---------------------------------------------------------------------------
 # ENTRY POINT
 # ---------------------------------------------------------------------------
 
 MAX_RUNTIME_MINUTES = 300  # Para dentro de 5h, deixando 1h de margem pro timeout de 6h do GitHub Actions
 PER_COMPONENT_TIMEOUT_S = 300  # Watchdog: aborta se um único componente passar de 5min
+WATCHDOG_KILL_GRACE_S = 30     # Tempo para a busca abortada se desenrolar depois de matar o Chrome
+# Prazo interno (Deadline) acaba antes do watchdog: o componente atrasado encurta as esperas
+# e devolve o que conseguiu; o watchdog fica só para travas de verdade.
+COMPONENT_DEADLINE_MARGIN_S = 30
+# Drenagem final (resolver LLM + DB writer) divide um único prazo que termina em
+# MAX_RUNTIME_MINUTES; este é só o piso quando os workers já pararam em cima do limite.
+SHUTDOWN_DRAIN_MIN_S = 60
+
+# [PERF] Pool de workers: N PriceScrapers independentes (cada um com seu Chrome) puxando
+# componentes de uma fila compartilhada. Com 1 worker, o comportamento é o mesmo de antes
+# (sequencial). Configurável por deploy — o runner do GitHub Actions (2 vCPU / 7GB) aguenta
+# 2-3 Chromes headless com folga; mais que isso tende a aumentar captcha na Amazon.
+SCRAPER_WORKERS = max(1, _env_int("SCRAPER_WORKERS", 1))
+
+# Trava que serializa as escritas de update_component_prices entre os workers (alertas de
+# streak fazem leitura+escrita em scraper_alerts e não podem intercalar entre threads).
+_db_write_lock = threading.Lock()
+
+# [PERF] Write-behind: com DB_WRITE_BEHIND=1 toda gravação de componente (preços + alertas)
+# sai do loop do Chrome e vai para uma thread escritora única, via fila limitada. Uma thread
+# só = ordem FIFO preservada (inclusive por componente); fila cheia = o worker espera
+# (backpressure) em vez de acumular memória sem limite.
+DB_WRITE_BEHIND = _env_flag("DB_WRITE_BEHIND")
+DB_WRITE_QUEUE_MAX = max(1, _env_int("DB_WRITE_QUEUE_MAX", 100))
+
+
+class DBWriter:
+    """
+    Thread escritora: consome (componente, results) em ordem e roda update_component_prices.
+    Quando ociosa, aproveita para o flush por tempo do ComponentWriteBuffer. Falha numa
+    gravação é logada e não derruba a thread.
+    """
+
+    _IDLE_POLL_S = 5
+
+    def __init__(self, max_pending=DB_WRITE_QUEUE_MAX):
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.blocked_s = 0.0
+        self._stats_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, component, results):
+        """Enfileira a gravação. Bloqueia só se a fila estiver cheia."""
+        started = time.monotonic()
+        self._queue.put((component, results))
+        waited = time.monotonic() - started
+        if waited >= 1:
+            print(f"[DB WRITER] Fila cheia — worker esperou {waited:.1f}s")
+        with self._stats_lock:
+            self.blocked_s += waited
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def drain(self, timeout):
+        """Grava o que falta e encerra a thread. Retorna False se estourou o timeout."""
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        if self._thread.is_alive():
+            print(f"[DB WRITER] Timeout de {timeout:.0f}s ao drenar — ~{self._queue.qsize()} componentes sem gravar")
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                job = self._queue.get(timeout=self._IDLE_POLL_S)
+            except queue.Empty:
+                self._flush_buffer_if_due()
+                continue
+            if job is None:
+                return
+            component, results = job
+            try:
+                with _db_write_lock:
+                    update_component_prices(component, results)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"[DB WRITER] Falha ao gravar componente {component.get('id')}: {e}")
+            self._flush_buffer_if_due()
+
+    @staticmethod
+    def _flush_buffer_if_due():
+        write_buffer = get_component_write_buffer()
+        if write_buffer:
+            try:
+                write_buffer.maybe_flush()
+            except Exception as e:
+                print(f"[DB WRITER] Falha no flush do buffer: {e}")
+
+    def summary(self):
+        return {
+            "db_writer_enfileirados": self.enqueued,
+            "db_writer_gravados": self.written,
+            "db_writer_falhas": self.failed,
+            "db_writer_fila_max": self.max_depth,
+            "db_writer_espera_s": round(self.blocked_s, 1),
+        }
+
+
+_db_writer = None
+
+
+def persist_component_results(component, results, journaled=False):
+    """
+    Grava o componente: pela thread escritora quando ativa, senão direto (sob _db_write_lock).
+    journaled=True quando o results já foi anexado ao journal antes (LLMFallbackResolver).
+    """
+    journal = get_result_journal()
+    if journal and not journaled:
+        journal.append(component, results)
+    if _db_writer:
+        _db_writer.submit(component, results)
+        return
+    with _db_write_lock:
+        update_component_prices(component, results)
+
+
+# [PERF] Fila de componentes paginada: com COMPONENT_PAGE_SIZE > 0 o catálogo não é mais
+# carregado inteiro com select("*") antes do primeiro scrape — uma thread alimentadora
+# busca páginas só com as colunas usadas e os workers começam assim que a primeira chega.
+COMPONENT_PAGE_SIZE = max(0, _env_int("COMPONENT_PAGE_SIZE", 0))
+# specifications vai inteiro: além da VRAM, entra no fingerprint dos caches de matching.
+# De best_price só kabum/amazon/updated_at importam (best é recalculado na gravação).
+COMPONENT_COLUMNS = (
+    "id", "name", "model", "brand", "category", "specifications",
+    "bp_kabum:best_price->kabum", "bp_amazon:best_price->amazon",
+    "bp_updated_at:best_price->>updated_at",
+)
+_UPDATED_AT_COL = "best_price->>updated_at"
+
+
+class ComponentFeed:
+    """
+    Fila (índice, componente) na ordem de prioridade do main (nunca atualizados primeiro,
+    depois os mais antigos), consumida pelos workers com next() — None = acabou.
+
+    Sem page_size, recebe a lista já carregada. Com page_size, pagina por keyset (nunca
+    por offset: os componentes gravados durante a run mudam de posição na ordenação):
+      1. updated_at nulo, por id;
+      2. updated_at < início da run, por (updated_at, id) — o que foi gravado nesta run
+         fica de fora, como no snapshot antigo.
+    A fila é limitada a duas páginas, então a memória não cresce com o catálogo.
+    """
+
+    def __init__(self, components=None, page_size=COMPONENT_PAGE_SIZE):
+        self.page_size = page_size
+        self.pages = 0
+        self.error = None
+        self._snapshot_ts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self._stop = threading.Event()
+        if components is not None:
+            self.total = len(components)
+            self._queue = queue.Queue()
+            for i, component in enumerate(components, 1):
+                self._queue.put((i, component))
+            self._queue.put(None)
+            self._thread = None
+        else:
+            self.total = self._count()
+            self._queue = queue.Queue(maxsize=2 * page_size)
+            self._thread = threading.Thread(target=self._feed, name="component-feed", daemon=True)
+
+    def start(self):
+        if self._thread:
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def next(self):
+        item = self._queue.get()
+        if item is None:
+            self._queue.put(None)  # repassa o fim para os outros workers
+        return item
+
+    def has_more(self):
+        return not (self._queue.qsize() == 0 and (self._thread is None or not self._thread.is_alive()))
+
+    def _count(self):
+        response = (
+            supabase.table("components")
+            .select("id", count="exact", head=True)
+            .or_(f'{_UPDATED_AT_COL}.is.null,{_UPDATED_AT_COL}.lt."{self._snapshot_ts}"')
+            .execute()
+        )
+        return response.count or 0
+
+    @staticmethod
+    def _rebuild(row):
+        """Devolve a linha no formato de select("*") que o resto do scraper espera."""
+        kabum, amazon, updated_at = row.pop("bp_kabum", None), row.pop("bp_amazon", None), row.pop("bp_updated_at", None)
+        row["best_price"] = (
+            {"kabum": kabum, "amazon": amazon, "updated_at": updated_at}
+            if kabum or amazon or updated_at else None
+        )
+        return row
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch_page(self, cursor):
+        query = supabase.table("components").select(*COMPONENT_COLUMNS)
+        if cursor[0] == "null":
+            query = query.is_(_UPDATED_AT_COL, "null").order("id")
+            if cursor[1] is not None:
+                query = query.gt("id", cursor[1])
+        else:
+            query = query.lt(_UPDATED_AT_COL, self._snapshot_ts).order(_UPDATED_AT_COL).order("id")
+            if cursor[1] is not None:
+                last_ts, last_id = cursor[1]
+                query = query.or_(
+                    f'{_UPDATED_AT_COL}.gt."{last_ts}",'
+                    f'and({_UPDATED_AT_COL}.eq."{last_ts}",id.gt.{last_id})'
+                )
+        return query.limit(self.page_size).execute().data or []
+
+    def _feed(self):
+        i = 0
+        try:
+            for group in ("null", "dated"):
+                cursor = (group, None)
+                while not self._stop.is_set():
+                    rows = self._fetch_page(cursor)
+                    self.pages += 1
+                    for row in rows:
+                        last = (row.get("bp_updated_at"), row["id"])
+                        i += 1
+                        if not self._put((i, self._rebuild(row))):
+                            return
+                    if len(rows) < self.page_size:
+                        break
+                    cursor = (group, last[1] if group == "null" else last)
+        except Exception as e:
+            self.error = e
+            print(f"ERRO: Falha ao paginar componentes (pagina {self.pages + 1}) - {e}")
+        finally:
+            self._put(None)
 
 
 def _build_error_results(error_type):
@@ -1974,20 +5339,366 @@ def _accumulate_stats(stats, results):
         stats["amazon_captcha_count"] += 1
 
     for meta in (kabum_meta, amazon_meta):
+        if meta.get("error_type") == "deadline_exceeded":
+            stats["deadline_exceeded_count"] += 1
+        if meta.get("fetch_path") == "http":
+            stats["fetch_http_count"] += 1
+        if meta.get("http_escalation"):
+            stats["http_escalation_count"] += 1
+        network = meta.get("network")
+        if network:
+            stats["net_pages"] += 1
+            stats["net_requests"] += network["requests"]
+            stats["net_blocked_requests"] += network["blocked_requests"]
+            stats["net_bytes_loaded"] += network["bytes_loaded"]
+            stats["net_bytes_saved_est"] += network["bytes_saved_est"]
+            stats["net_cache_hits"] += network.get("cache_hits", 0)
+        stats["ranker_local_accepts"] += meta.get("ranker_local_accepts", 0)
+        stats["ranker_local_rejects"] += meta.get("ranker_local_rejects", 0)
         if meta.get("llm_used"):
             stats["llm_fallback_attempts"] += 1
             if meta.get("llm_confirmed"):
                 stats["llm_fallback_confirmed"] += 1
 
 
+def _has_pending_llm(results):
+    return any((results.get(site) or {}).get("status") == "pending_llm" for site in ("kabum", "amazon"))
+
+
+class LLMFallbackResolver:
+    """
+    [PERF] Thread que resolve os fallbacks LLM deferidos pelas buscas (status "pending_llm").
+    Junta sites pendentes de vários componentes num único ask_gemini_batch (até
+    LLM_RESOLVER_BATCH_MAX pares, esperando até LLM_RESOLVER_MAX_WAIT_S pelo lote), finaliza
+    cada site como found/not_found com o mesmo critério do caminho síncrono (o mais barato
+    confirmado) e então grava o componente por update_component_prices — o componente só
+    vai ao banco quando todos os seus sites estão finalizados.
+
+    Usa do host (um PriceScraper sem Chrome, exclusivo do resolver — o watchdog pode
+    substituir as instâncias dos workers) só ask_gemini_batch e os montadores de result.
+    A checagem de vendedor da Amazon, que no caminho síncrono abre a página no Chrome,
+    aqui é feita via HTTP (sem conclusão -> shipped_by_store None).
+    """
+
+    def __init__(self, host, stats, stats_lock):
+        self.host = host
+        self.stats = stats
+        self.stats_lock = stats_lock
+        self.http = host.build_http_session()
+        self.resolved_components = 0
+        self._journaled = set()  # id() dos results anexados ao journal no submit
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="llm-resolver", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, component, results):
+        """
+        Enfileira um componente com pelo menos um site em "pending_llm". O results vai ao
+        journal já aqui (o site decidido pelo Chrome não se perde se a run for cancelada ou
+        a drenagem estourar); o ack vem quando o resolver grava o componente.
+        """
+        journal = get_result_journal()
+        if journal and journal.append(component, results):
+            self._journaled.add(id(results))
+        self._queue.put((component, results))
+
+    def drain(self, timeout):
+        """Resolve o que falta e encerra a thread. Retorna False se estourou o timeout."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"[LLM RESOLVER] Timeout de {timeout:.0f}s ao drenar — ~{self._queue.qsize()} componentes sem gravar")
+            return False
+        return True
+
+    @staticmethod
+    def _pending_sites(results):
+        return [site for site in ("kabum", "amazon") if results[site]["status"] == "pending_llm"]
+
+    def _pair_count(self, jobs):
+        return sum(
+            len(results[site]["meta"]["llm_pending"]["candidates"])
+            for _component, results in jobs
+            for site in self._pending_sites(results)
+        )
+
+    def _run(self):
+        stop = False
+        while not stop:
+            job = self._queue.get()
+            if job is None:
+                break
+            jobs = [job]
+            deadline = time.time() + LLM_RESOLVER_MAX_WAIT_S
+            while self._pair_count(jobs) < LLM_RESOLVER_BATCH_MAX:
+                try:
+                    job = self._queue.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                jobs.append(job)
+            committed = set()  # id() dos results já entregues a _commit neste lote
+            try:
+                self._resolve(jobs, committed)
+            except Exception as e:
+                # Nunca deixa a thread morrer: sites pendentes viram erro técnico (preço mantido).
+                # Só os jobs ainda não gravados — os já commitados não vão ao banco de novo.
+                print(f"[LLM RESOLVER] Erro inesperado: {e}")
+                for component, results in jobs:
+                    if id(results) in committed:
+                        continue
+                    self._fail_pending(results)
+                    try:
+                        self._commit(component, results, committed)
+                    except Exception as commit_error:
+                        print(f"[LLM RESOLVER] Falha ao gravar componente {component.get('id')}: {commit_error}")
+
+    def _fail_pending(self, results):
+        for site in self._pending_sites(results):
+            results[site]["status"] = "error"
+            results[site]["meta"]["error_type"] = "llm_resolver_exception"
+
+    def _resolve(self, jobs, committed):
+        entries = []  # (component, results, site, candidato)
+        for component, results in jobs:
+            for site in self._pending_sites(results):
+                for c in results[site]["meta"]["llm_pending"]["candidates"]:
+                    entries.append((component, results, site, c))
+
+        verdicts = []
+        for i in range(0, len(entries), LLM_RESOLVER_BATCH_MAX):
+            chunk = entries[i:i + LLM_RESOLVER_BATCH_MAX]
+            print(f"[LLM RESOLVER] Verificando {len(chunk)} candidatos de "
+                  f"{len({id(e[1]) for e in chunk})} componente(s) em 1 chamada")
+            verdicts.extend(self.host.ask_gemini_batch([
+                {"product_name": c["name"], "component_name": component['name'], "model": component.get('model')}
+                for component, _results, _site, c in chunk
+            ]))
+
+        confirmed = {}
+        for (component, results, site, c), verdict in zip(entries, verdicts):
+            if verdict is True:
+                confirmed.setdefault((id(results), site), []).append(c)
+
+        for component, results in jobs:
+            try:
+                for site in self._pending_sites(results):
+                    self._finalize_site(component, results, site, confirmed.get((id(results), site), []))
+            except Exception as e:
+                # Falha de um componente não contamina os outros do lote
+                print(f"[LLM RESOLVER] Erro ao finalizar componente {component.get('id')}: {e}")
+                self._fail_pending(results)
+            self._commit(component, results, committed)
+
+    def _finalize_site(self, component, results, site, llm_confirmed):
+        entry = results[site]
+        meta = entry["meta"]
+        pending = meta.pop("llm_pending")
+        tag = site.upper()
+        # Mesmo critério do caminho síncrono: o mais barato confirmado (LLM ou ranker)
+        confirmed = llm_confirmed + pending.get("local_confirmed", [])
+        if not confirmed:
+            print(f"[{tag}] {component['name']}: LLM nao confirmou — Produto nao encontrado")
+            entry["status"], entry["data"] = "not_found", None
+            return
+
+        cheapest = min(confirmed, key=lambda x: x["price"])
+        if llm_confirmed:
+            meta["llm_confirmed"] = True
+        if site == "kabum":
+            data = self.host.build_kabum_result([cheapest], pending["fallback_url"])
+        else:
+            direct_url, shipped_by_store = self._verify_amazon_seller(cheapest.get("link"), pending["fallback_url"])
+            data = self.host.build_amazon_result(cheapest, direct_url, shipped_by_store)
+        entry["status"], entry["data"] = "found", data
+
+    def _verify_amazon_seller(self, link, fallback_url):
+        """Equivalente HTTP de verify_amazon_product_page. Retorna (direct_url, shipped_by_store)."""
+        if not link:
+            return fallback_url, None
+        try:
+            page = self.http.get(link, headers={"User-Agent": self.host.user_agent}, timeout=HTTP_FETCH_TIMEOUT_S)
+        except requests.RequestException as e:
+            print(f"[LLM RESOLVER] Falha ao abrir pagina da Amazon: {e}")
+            return link, None
+        if page.status_code != 200:
+            return link, None
+        shipped_by_store, _reason = parse_amazon_seller_html(page.content)
+        print(f"[AMAZON] Vendedor: {AMAZON_SELLER_STATUS_LABELS[shipped_by_store]}")
+        return page.url, shipped_by_store
+
+    def _commit(self, component, results, committed):
+        # Marcado antes de gravar: se a gravação levantar, o componente não é re-commitado
+        # (stats já somados; o journal cobre o que não chegou ao banco)
+        committed.add(id(results))
+        with self.stats_lock:
+            _accumulate_stats(self.stats, results)
+        journaled = id(results) in self._journaled
+        self._journaled.discard(id(results))
+        persist_component_results(component, results, journaled=journaled)
+        self.resolved_components += 1
+
+
+def _retire_scraper(scraper, stats, stats_lock):
+    """
+    Fecha a instância que o watchdog substituiu e leva os contadores dela para stats (o
+    main só agrega as instâncias que ainda estão em scrapers). driver_recycles já entra
+    em stats a cada componente, via govern_memory — não é somado de novo aqui.
+    """
+    with stats_lock:
+        for session in (scraper, scraper.amazon_peer):
+            if session:
+                stats["profile_warm_starts"] += session.profile_warm_starts
+                stats["profile_cold_starts"] += session.profile_cold_starts
+        stats["chrome_memory_peak_mb"] = max(stats["chrome_memory_peak_mb"], scraper.memory_peak_total_mb)
+    try:
+        scraper.close()
+    except Exception as e:
+        print(f"[WATCHDOG] Falha ao fechar o worker substituido W{scraper.worker_id}: {e}")
+
+
+def _scrape_with_watchdog(scrapers, slot, component, stats, stats_lock):
+    """
+    Roda scrape_component de scrapers[slot] com o watchdog de PER_COMPONENT_TIMEOUT_S.
+
+    [PERF] Antes era um ThreadPoolExecutor em with: no timeout, o __exit__ fazia
+    shutdown(wait=True) e o worker ficava preso no Selenium travado do mesmo jeito — e a
+    thread órfã continuava dirigindo o Chrome. Agora a busca roda numa thread daemon; no
+    timeout a árvore chromedriver/Chrome é morta (o comando WebDriver pendente falha na
+    hora), a thread órfã tem WATCHDOG_KILL_GRACE_S para se desenrolar e o Chrome é
+    recriado. Se ela não sair a tempo, a instância inteira é trocada por uma nova em
+    scrapers[slot] e a antiga é fechada (_retire_scraper), com os contadores em stats.
+    """
+    scraper = scrapers[slot]
+    outcome = {}
+
+    def run():
+        try:
+            outcome["results"] = scraper.scrape_component(
+                component, Deadline(PER_COMPONENT_TIMEOUT_S - COMPONENT_DEADLINE_MARGIN_S)
+            )
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, name=f"scrape-W{scraper.worker_id}", daemon=True)
+    thread.start()
+    thread.join(PER_COMPONENT_TIMEOUT_S)
+
+    if not thread.is_alive():
+        if "error" in outcome:
+            print(f"[WATCHDOG] Erro inesperado em scrape_component: {outcome['error']}")
+            return _build_error_results("unexpected_exception")
+        return outcome["results"]
+
+    killed = scraper.kill_browser()
+    print(f"[WATCHDOG] Componente {component.get('id')} excedeu {PER_COMPONENT_TIMEOUT_S}s — "
+          f"{killed} processos do Chrome encerrados")
+    thread.join(WATCHDOG_KILL_GRACE_S)
+    if thread.is_alive():
+        print(f"[WATCHDOG] Busca nao encerrou em {WATCHDOG_KILL_GRACE_S}s — substituindo o worker W{scraper.worker_id}")
+        replacement = PriceScraper(worker_id=scraper.worker_id)
+        replacement.llm_resolver = scraper.llm_resolver
+        if replacement.amazon_peer:
+            replacement.amazon_peer.llm_resolver = scraper.llm_resolver
+        scrapers[slot] = replacement
+        _retire_scraper(scraper, stats, stats_lock)
+    elif not scraper.restart_driver(graceful=False):
+        print(f"[WATCHDOG] Falha ao recriar o Chrome do worker W{scraper.worker_id}")
+    return _build_error_results("watchdog_timeout")
+
+
+def _scrape_worker(scrapers, slot, feed, start_time, stats, stats_lock):
+    """
+    [PERF] Loop de um worker do pool: puxa (índice, componente) da fila compartilhada até
+    esvaziar ou até o limite de runtime. Stats são agregados sob stats_lock e a escrita no
+    banco é serializada por _db_write_lock (ou entregue à thread escritora, com
+    DB_WRITE_BEHIND) — o scraping em si roda em paralelo. O worker usa scrapers[slot],
+    que o watchdog pode trocar por uma instância nova.
+    """
+    tag = f"[W{scrapers[slot].worker_id}]"
+
+    while True:
+        scraper = scrapers[slot]
+        alive, recoveries, failures, backoff_s = scraper.ensure_session()
+        with stats_lock:
+            stats["session_recoveries"] += recoveries
+            stats["session_recovery_failures"] += failures
+            stats["session_recovery_backoff_s"] += backoff_s
+        if not alive:
+            print(f"\n{tag} Chrome indisponivel. Encerrando worker.")
+            return
+
+        elapsed = (time.time() - start_time) / 60
+        remaining = MAX_RUNTIME_MINUTES - elapsed
+
+        if remaining < 5:
+            with stats_lock:
+                stats["cut_short_by_time_limit"] = True
+            print(f"\n{tag} ⏰ Limite de tempo atingido ({elapsed:.0f}min). Encerrando worker.")
+            return
+
+        item = feed.next()
+        if item is None:
+            return
+        i, component = item
+
+        print(f"\n{tag} [{i}/{feed.total}] | Tempo decorrido: {elapsed:.0f}min | Restante: {remaining:.0f}min")
+
+        results = _scrape_with_watchdog(scrapers, slot, component, stats, stats_lock)
+        scraper = scrapers[slot]
+
+        if scraper.llm_resolver and _has_pending_llm(results):
+            # [PERF] Stats e escrita ficam com o resolver, depois dos veredictos do LLM
+            with stats_lock:
+                stats["total_attempted"] += 1
+            scraper.llm_resolver.submit(component, results)
+        else:
+            with stats_lock:
+                stats["total_attempted"] += 1
+                _accumulate_stats(stats, results)
+
+            # Sempre atualiza — found/not_found/error tratados corretamente por site
+            persist_component_results(component, results)
+
+        write_buffer = get_component_write_buffer()
+        if write_buffer and not _db_writer:
+            # Garante o flush por tempo mesmo quando os componentes demoram a sair
+            # (com a thread escritora, o flush é dela)
+            write_buffer.maybe_flush()
+
+        # [PERF] Entre componentes: mede a memória do Chrome e recicla se passou do limite
+        recycled, recycle_failures = scraper.govern_memory()
+        with stats_lock:
+            stats["driver_recycles"] += recycled
+            stats["driver_recycle_failures"] += recycle_failures
+            stats["chrome_memory_peak_mb"] = max(stats["chrome_memory_peak_mb"], scraper.memory_peak_total_mb)
+
+        if feed.has_more():
+            delay = random.uniform(8, 15)
+            print(f"{tag} Aguardando {delay:.1f}s...\n")
+            time.sleep(delay)
+
+
 def main():
+    global _db_writer
     print("=" * 60)
     print("Price Scraper - Kabum & Amazon")
     print("=" * 60)
 
-    scraper = PriceScraper()
+    scrapers = []
+    for worker_id in range(SCRAPER_WORKERS):
+        scraper = PriceScraper(worker_id=worker_id)
+        if scraper.driver:
+            scrapers.append(scraper)
+        else:
+            print(f"[W{worker_id}] Driver nao inicializado — worker descartado")
 
-    if not scraper.driver:
+    if not scrapers:
         print("ERRO CRITICO: Driver nao inicializado")
         print("Verifique instalacao do Chrome/ChromeDriver")
         return
@@ -2006,60 +5717,100 @@ def main():
         "deferred_count": 0,
         "cut_short_by_time_limit": False,
         "elapsed_minutes": 0,
+        "workers": len(scrapers),
+        "net_pages": 0,
+        "net_requests": 0,
+        "net_blocked_requests": 0,
+        "net_bytes_loaded": 0,
+        "net_bytes_saved_est": 0,
+        "net_cache_hits": 0,
+        "profile_warm_starts": 0,
+        "profile_cold_starts": 0,
+        "fetch_http_count": 0,
+        "http_escalation_count": 0,
+        "ranker_local_accepts": 0,
+        "ranker_local_rejects": 0,
+        "deadline_exceeded_count": 0,
+        "driver_recycles": 0,
+        "driver_recycle_failures": 0,
+        "chrome_memory_peak_mb": 0.0,
+        "session_recoveries": 0,
+        "session_recovery_failures": 0,
+        "session_recovery_backoff_s": 0.0,
     }
+    stats_lock = threading.Lock()
 
-    try:
-        # Ordena pelos mais antigos primeiro — nunca atualizados (null) têm prioridade máxima
-        response = (
-            supabase.table("components")
-            .select("*")
-            .order("best_price->>updated_at", desc=False, nullsfirst=True)
-            .execute()
-        )
-        components = response.data
-
-        if not components:
-            print("Nenhum componente encontrado no banco")
-            return
-
-        print(f"\nTotal de componentes: {len(components)}\n")
+    # Carrega o índice de alertas antes dos workers (uma leitura só para a run inteira)
+    get_alert_index()
+    # Treina o ranker aqui, e não no primeiro fallback: o treino (segundos, sob lock)
+    # travaria os outros workers e sairia do prazo do componente que o disparou.
+    get_match_ranker()
 
-        for i, component in enumerate(components, 1):
-            elapsed = (time.time() - start_time) / 60
-            remaining = MAX_RUNTIME_MINUTES - elapsed
+    journal = get_result_journal()
+    if journal:
+        # Antes de buscar a fila: componentes regravados saem do topo da prioridade
+        try:
+            journal.replay()
+        except Exception as e:
+            print(f"[JOURNAL] Falha no replay (entradas mantidas para a proxima run): {e}")
+        journal.compact()
 
-            if remaining < 5:
-                stats["cut_short_by_time_limit"] = True
-                stats["deferred_count"] = len(components) - (i - 1)
-                print(f"\n⏰ Limite de tempo atingido ({elapsed:.0f}min). Processados {i - 1}/{len(components)} componentes.")
-                print("Os componentes restantes serao priorizados na proxima execucao.")
-                break
+    if DB_WRITE_BEHIND:
+        _db_writer = DBWriter().start()
 
-            print(f"\n[{i}/{len(components)}] | Tempo decorrido: {elapsed:.0f}min | Restante: {remaining:.0f}min")
+    llm_resolver = None
+    if ASYNC_LLM_FALLBACK and GROQ_API_KEY:
+        resolver_host = PriceScraper(worker_id=SCRAPER_WORKERS, with_browser=False)
+        llm_resolver = LLMFallbackResolver(resolver_host, stats, stats_lock).start()
+        for scraper in scrapers:
+            scraper.llm_resolver = llm_resolver
+            if scraper.amazon_peer:
+                scraper.amazon_peer.llm_resolver = llm_resolver
 
-            try:
-                with ThreadPoolExecutor(max_workers=1) as ex:
-                    results = ex.submit(scraper.scrape_component, component).result(
-                        timeout=PER_COMPONENT_TIMEOUT_S
-                    )
-            except FutTimeout:
-                print(f"[WATCHDOG] Componente {component.get('id')} excedeu {PER_COMPONENT_TIMEOUT_S}s — pulando")
-                results = _build_error_results("watchdog_timeout")
-            except Exception as e:
-                print(f"[WATCHDOG] Erro inesperado em scrape_component: {e}")
-                results = _build_error_results("unexpected_exception")
+    try:
+        if COMPONENT_PAGE_SIZE:
+            feed = ComponentFeed()
+        else:
+            # Ordena pelos mais antigos primeiro — nunca atualizados (null) têm prioridade máxima
+            response = (
+                supabase.table("components")
+                .select("*")
+                .order("best_price->>updated_at", desc=False, nullsfirst=True)
+                .execute()
+            )
+            feed = ComponentFeed(components=response.data or [])
 
-            stats["total_attempted"] += 1
-            _accumulate_stats(stats, results)
+        if not feed.total:
+            print("Nenhum componente encontrado no banco")
+            return
 
-            # Sempre atualiza — found/not_found/error tratados corretamente por site
-            update_component_prices(component, results)
+        print(f"\nTotal de componentes: {feed.total} | Workers: {len(scrapers)}\n")
 
-            if i < len(components):
-                delay = random.uniform(8, 15)
-                print(f"Aguardando {delay:.1f}s...\n")
-                time.sleep(delay)
+        # A fila preserva a ordem de prioridade: cada worker sempre pega o mais antigo pendente
+        feed.start()
 
+        threads = []
+        for slot, scraper in enumerate(scrapers):
+            t = threading.Thread(
+                target=_scrape_worker,
+                args=(scrapers, slot, feed, start_time, stats, stats_lock),
+                name=f"scraper-worker-{scraper.worker_id}",
+                daemon=True,
+            )
+            t.start()
+            threads.append(t)
+            if len(scrapers) > 1:
+                # Escalona a partida dos workers pra não disparar N buscas no mesmo segundo
+                time.sleep(random.uniform(3, 6))
+
+        for t in threads:
+            t.join()
+        feed.stop()
+
+        if stats["cut_short_by_time_limit"]:
+            stats["deferred_count"] = feed.total - stats["total_attempted"]
+            print(f"\n⏰ Limite de tempo atingido. Processados {stats['total_attempted']}/{feed.total} componentes.")
+            print("Os componentes restantes serao priorizados na proxima execucao.")
         else:
             print("\n" + "=" * 60)
             print("Scraping concluido")
@@ -2069,10 +5820,39 @@ def main():
         print(f"ERRO CRITICO: Falha ao buscar componentes - {e}")
 
     finally:
+        # Um prazo só para as duas drenagens, medido contra MAX_RUNTIME_MINUTES — o que o
+        # resolver gastar sai do que sobra para o writer. O que não couber fica no journal.
+        shutdown = Deadline(max(SHUTDOWN_DRAIN_MIN_S, MAX_RUNTIME_MINUTES * 60 - (time.time() - start_time)))
+        if llm_resolver:
+            # Resolve os fallbacks LLM pendentes antes do run_health (que conta confirmações)
+            print(f"\n[LLM RESOLVER] Drenando pendentes (limite {shutdown.remaining():.0f}s)...")
+            llm_resolver.drain(shutdown.remaining())
+        if _db_writer:
+            # Depois do resolver, que ainda enfileira gravações ao finalizar os pendentes
+            print(f"\n[DB WRITER] Drenando fila de gravacao (limite {shutdown.remaining():.0f}s)...")
+            _db_writer.drain(shutdown.remaining())
+        write_buffer = get_component_write_buffer()
+        if write_buffer:
+            print("[DB] Flush final do buffer de escrita...")
+            write_buffer.flush()
+        alert_index = get_alert_index()
+        if alert_index:
+            alert_index.flush()
+        if journal:
+            journal.compact()
         stats["elapsed_minutes"] = (time.time() - start_time) / 60
+        for scraper in scrapers:
+            for session in (scraper, scraper.amazon_peer):
+                if session:
+                    stats["profile_warm_starts"] += session.profile_warm_starts
+                    stats["profile_cold_starts"] += session.profile_cold_starts
         if stats["total_attempted"] > 0:
             record_run_health(stats)
-        scraper.close()
+        for scraper in scrapers:
+            scraper.close()
+        if llm_resolver:
+            llm_resolver.host.close()
+        close_local_caches()
 
 
 if __name__ == "__main__":
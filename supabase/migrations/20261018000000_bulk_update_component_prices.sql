@@ -0,0 +1,21 @@
+-- UPDATE em lote de components.best_price para o DB_WRITE_BUFFER do scraper.
+--
+-- Recebe um array JSON [{"id": ..., "best_price": {...}}, ...] e faz um único UPDATE.
+-- jsonb_populate_recordset usa o próprio tipo da linha de components, então o id chega
+-- com o tipo da coluna (o índice da PK é usado) e só best_price é tocado. É um UPDATE de
+-- verdade: não exige permissão de INSERT nem esbarra em colunas NOT NULL, e roda com as
+-- permissões/RLS de quem chama (SECURITY INVOKER). Retorna quantas linhas foram gravadas.
+create or replace function public.bulk_update_component_prices(items jsonb)
+returns integer
+language sql
+security invoker
+as $$
+  with updated as (
+    update public.components as c
+       set best_price = r.best_price
+      from jsonb_populate_recordset(null::public.components, items) as r
+     where c.id = r.id
+    returning 1
+  )
+  select count(*)::integer from updated;
+$$;
@@ -0,0 +1,21 @@
+-- UPDATE em lote de details/expires_at dos alertas de streak abertos (ALERT_INDEX).
+--
+-- Mesmo formato de bulk_update_component_prices: array JSON
+-- [{"id": ..., "details": {...}, "expires_at": "..."}, ...] aplicado num único UPDATE
+-- sobre scraper_alerts, com os tipos das colunas da própria tabela. Não insere nada e
+-- roda com as permissões/RLS de quem chama. Retorna quantas linhas foram gravadas.
+create or replace function public.bulk_update_alert_details(items jsonb)
+returns integer
+language sql
+security invoker
+as $$
+  with updated as (
+    update public.scraper_alerts as a
+       set details = r.details,
+           expires_at = r.expires_at
+      from jsonb_populate_recordset(null::public.scraper_alerts, items) as r
+     where a.id = r.id
+    returning 1
+  )
+  select count(*)::integer from updated;
+$$;
@@ -0,0 +1,37 @@
+"""
+Fixtures compartilhadas. O scraper é um script (selenium-scraper.py, com hífen), então é
+carregado via importlib. Credenciais fictícias bastam: create_client não conecta na
+criação, e nenhum teste fala com o Supabase nem abre o Chrome.
+"""
+import importlib.util
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+
+
+def _load_scraper():
+    spec = importlib.util.spec_from_file_location("selenium_scraper", os.path.join(ROOT, "selenium-scraper.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def sm():
+    """Módulo selenium-scraper.py carregado uma vez para a sessão de testes."""
+    return _load_scraper()
+
+
+@pytest.fixture
+def scraper(sm):
+    """PriceScraper sem Chrome (só os helpers puros: matching, parsers, montadores)."""
+    instance = sm.PriceScraper.__new__(sm.PriceScraper)
+    instance.http = None
+    instance.driver = None
+    return instance
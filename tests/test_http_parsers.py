@@ -0,0 +1,83 @@
+"""Parsers do caminho HTTP (lxml): busca Kabum (__NEXT_DATA__), busca e vendedor Amazon."""
+import json
+
+
+def _kabum_page(items):
+    next_data = {"props": {"pageProps": {"data": json.dumps({"catalogServer": {"data": items}})}}}
+    return (
+        "<html><head><title>busca</title></head><body>"
+        f"<script id='__NEXT_DATA__' type='application/json'>{json.dumps(next_data)}</script>"
+        "</body></html>"
+    ).encode()
+
+
+AMAZON_SEARCH = """<html><head><title>Amazon.com.br : rtx</title></head><body>
+<div data-component-type="s-search-result" data-asin="B01"><div>
+  <a class="a-link-normal" href="/dp/B01?ref=x"><h2 class="a-size-base-plus a-color-base a-text-normal"><span>Placa RTX 4060 Gaming</span></h2></a>
+  <span class="a-price" data-a-size="xl"><span class="a-offscreen">R$&nbsp;1.999,90</span>
+    <span aria-hidden="true"><span class="a-price-whole">1.999<span class="a-price-decimal">,</span></span><span class="a-price-fraction">90</span></span></span>
+  <span class="a-price a-text-price"><span class="a-offscreen">R$ 2.500,00</span></span>
+</div></div>
+<div data-component-type="s-search-result" data-asin="B02">
+  <span class="puis-sponsored-label-text">Patrocinado</span><h2><a href="/dp/B02"><span>Kit RTX</span></a></h2>
+</div>
+<div data-component-type="s-search-result" data-asin=""><h2>sem asin</h2></div>
+</body></html>""".encode()
+
+
+def test_kabum_keeps_only_available_kabum_items(sm):
+    page = _kabum_page([
+        {"code": 1, "name": "Placa de Vídeo RTX 4060  Ventus", "friendlyName": "placa-rtx-4060",
+         "price": 2100.0, "priceWithDiscount": 1899.9, "sellerName": "KaBuM!", "available": True},
+        {"code": 2, "name": "RTX 4060 Marketplace", "price": 1500.0, "sellerName": "Loja X", "available": True},
+        {"code": 3, "name": "RTX 4060 sem estoque", "price": 1000.0, "sellerName": "KaBuM!", "available": False},
+    ])
+    candidates, reason = sm.parse_kabum_search_html(page)
+    assert reason is None
+    assert candidates == [{
+        "name": "Placa de Vídeo RTX 4060 Ventus",
+        "price": 1899.9,
+        "price_text": sm._format_brl(1899.9),
+        "url": "https://www.kabum.com.br/produto/1/placa-rtx-4060",
+    }]
+
+
+def test_kabum_without_next_data_or_seller_escalates(sm):
+    assert sm.parse_kabum_search_html(b"<html><body>oi</body></html>") == (None, "missing_markup")
+    no_seller = _kabum_page([{"code": 1, "name": "RTX 4060", "price": 2000.0}])
+    assert sm.parse_kabum_search_html(no_seller) == (None, "missing_markup")
+
+
+def test_kabum_only_marketplace_is_empty(sm):
+    page = _kabum_page([{"code": 2, "name": "RTX 4060", "price": 1500.0, "sellerName": "Loja X"}])
+    assert sm.parse_kabum_search_html(page) == (None, "empty")
+
+
+def test_amazon_search_items(sm):
+    items, reason = sm.parse_amazon_search_html(AMAZON_SEARCH)
+    assert reason is None
+    assert [item["asin"] for item in items] == ["B01", "B02"]
+
+    first = items[0]
+    assert first["name"] == "Placa RTX 4060 Gaming"
+    assert first["link"] == "https://www.amazon.com.br/dp/B01?ref=x"
+    assert first["price_text"] == "1.999,90"
+    assert len(first["price_fallbacks"]) == 1  # o preço riscado (a-text-price) fica de fora
+    assert first["sponsored"] is False
+
+    assert items[1]["sponsored"] is True
+    assert items[1]["price_text"] == ""
+
+
+def test_amazon_captcha_and_missing_markup(sm):
+    captcha = b"<html><head><title>Robot Check</title></head><body></body></html>"
+    assert sm.parse_amazon_search_html(captcha) == (None, "captcha")
+    assert sm.parse_amazon_search_html(b"<html><head><title>x</title></head><body></body></html>") == (None, "missing_markup")
+
+
+def test_amazon_seller(sm):
+    sold_by_amazon = b"<html><body><div id='merchant-info'>Enviado de e vendido por Amazon.com.br</div></body></html>"
+    third_party = (b"<html><body><div id='merchant-info'>Vendido por loja parceira X</div>"
+                   b"<script>amazon.com.br</script></body></html>")
+    assert sm.parse_amazon_seller_html(sold_by_amazon) == (True, None)
+    assert sm.parse_amazon_seller_html(third_party)[0] is False
@@ -0,0 +1,39 @@
+"""
+KeywordMatcher: pertinência exata, busca por substring e a prioridade de find() — que
+precisa seguir a ordem da lista (não a ordem da regex) para o motivo logado não mudar.
+"""
+
+
+def test_contains_is_exact_token(sm):
+    matcher = sm.KeywordMatcher(["kit", "cooler"])
+    assert "kit" in matcher
+    assert "kits" not in matcher
+
+
+def test_search_substring_and_empty(sm):
+    matcher = sm.KeywordMatcher(["kit", "cooler"])
+    assert matcher.search("water cooler 240mm")
+    assert not matcher.search("processador ryzen 5")
+    assert not matcher.search("")
+    assert not sm.KeywordMatcher([]).search("kit")
+
+
+def test_find_follows_list_priority(sm):
+    # "cooler" vem antes na lista, mesmo "kit" aparecendo antes no texto e sendo mais curto
+    matcher = sm.KeywordMatcher(["cooler", "kit", "water cooler"])
+    assert matcher.find("kit water cooler rgb") == "cooler"
+    assert matcher.find("kit upgrade") == "kit"
+    assert matcher.find("fonte 650w") is None
+
+
+def test_duplicates_keep_first_position(sm):
+    matcher = sm.KeywordMatcher(["b", "a", "b"])
+    assert matcher.keywords == ("b", "a")
+
+
+def test_exclusion_keyword_round_trip(sm):
+    keyword = sm.EXCLUSION_MATCHER.keywords[0]
+    detail = sm.MatchPlan.EXCLUSION_DETAIL.format(keyword)
+    assert sm.MatchPlan.exclusion_keyword(detail) == keyword
+    assert sm.MatchPlan.exclusion_keyword("token 'rtx'") is None
+    assert sm.MatchPlan.exclusion_keyword(None) is None
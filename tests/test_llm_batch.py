@@ -0,0 +1,20 @@
+"""parse_llm_batch_answers: leitura da resposta em lote do fallback LLM ("N: SIM/NÃO")."""
+
+
+def test_numbered_answers_in_any_separator(sm):
+    content = "1: SIM\n2. NÃO\n 3) NAO\n4 - SIM"
+    assert sm.parse_llm_batch_answers(content) == {1: "SIM", 2: "NÃO", 3: "NAO", 4: "SIM"}
+
+
+def test_ignores_noise_and_partial_words(sm):
+    content = "ANALISE:\n1: SIMPLES\n2: SIM, É O MESMO MODELO\nRESPOSTA 3: SIM\n5: TALVEZ"
+    assert sm.parse_llm_batch_answers(content) == {2: "SIM"}
+
+
+def test_empty_or_missing_content(sm):
+    assert sm.parse_llm_batch_answers("") == {}
+    assert sm.parse_llm_batch_answers(None) == {}
+
+
+def test_last_answer_wins_for_repeated_number(sm):
+    assert sm.parse_llm_batch_answers("1: NÃO\n1: SIM") == {1: "SIM"}
@@ -0,0 +1,58 @@
+"""LLMFallbackResolver: falha num componente do lote não regrava nem recomputa os outros."""
+import threading
+from unittest import mock
+
+
+def _pending_results():
+    return {
+        "kabum": {"status": "pending_llm", "data": None, "meta": {
+            "llm_pending": {"candidates": [{"name": "RX 7600", "price": 1.0}], "fallback_url": "u"},
+        }},
+        "amazon": {"status": "not_found", "data": None, "meta": {}},
+    }
+
+
+def _resolver(sm, monkeypatch, persisted, host):
+    monkeypatch.setattr(sm, "persist_component_results",
+                        lambda component, results, journaled=False: persisted.append(component["id"]))
+    monkeypatch.setattr(sm, "get_result_journal", lambda: None)
+    host.build_http_session.return_value = None
+    stats = {key: 0 for key in ("kabum_error_count", "amazon_error_count", "amazon_captcha_count",
+                                 "llm_fallback_attempts", "llm_fallback_confirmed",
+                                 "deadline_exceeded_count", "fetch_http_count", "http_escalation_count",
+                                 "ranker_local_accepts", "ranker_local_rejects")}
+    return sm.LLMFallbackResolver(host, stats, threading.Lock())
+
+
+def test_failure_in_one_job_commits_each_component_once(sm, monkeypatch, capsys):
+    persisted = []
+    host = mock.Mock()
+    host.ask_gemini_batch.side_effect = lambda items, deadline=None: [True] * len(items)
+    host.build_kabum_result.side_effect = [{"preco": 1.0}, RuntimeError("boom")]
+    resolver = _resolver(sm, monkeypatch, persisted, host)
+    first, second = _pending_results(), _pending_results()
+    resolver.submit({"id": 1, "name": "a"}, first)
+    resolver.submit({"id": 2, "name": "b"}, second)
+    resolver.start()
+    assert resolver.drain(5)
+
+    assert persisted == [1, 2]
+    assert resolver.resolved_components == 2
+    assert first["kabum"]["status"] == "found"
+    assert second["kabum"]["status"] == "error"
+    assert second["kabum"]["meta"]["error_type"] == "llm_resolver_exception"
+
+
+def test_batch_failure_marks_every_job_as_error_once(sm, monkeypatch, capsys):
+    persisted = []
+    host = mock.Mock()
+    host.ask_gemini_batch.side_effect = RuntimeError("groq fora")
+    resolver = _resolver(sm, monkeypatch, persisted, host)
+    jobs = [_pending_results(), _pending_results()]
+    for cid, results in enumerate(jobs, 1):
+        resolver.submit({"id": cid, "name": str(cid)}, results)
+    resolver.start()
+    assert resolver.drain(5)
+
+    assert persisted == [1, 2]
+    assert all(r["kabum"]["meta"]["error_type"] == "llm_resolver_exception" for r in jobs)
@@ -0,0 +1,66 @@
+"""LocalCache: ida e volta em SQLite, versionamento, expiração, corte por tamanho e contagem."""
+import time
+
+
+def _cache(sm, tmp_path, **kwargs):
+    kwargs.setdefault("version", 1)
+    return sm.LocalCache(str(tmp_path / "cache.sqlite3"), "ns", **kwargs)
+
+
+def test_round_trip_pending_and_flushed(sm, tmp_path):
+    cache = _cache(sm, tmp_path)
+    cache.put("a", {"x": 1})
+    assert cache.get("a") == {"x": 1}          # ainda no buffer
+    cache.flush()
+    assert cache.get_many(["a", "b"]) == {"a": {"x": 1}}
+    assert (cache.hits, cache.misses, cache.writes) == (2, 1, 1)
+    cache.close()
+
+
+def test_version_bump_invalidates(sm, tmp_path):
+    cache = _cache(sm, tmp_path)
+    cache.put("a", 1)
+    cache.close()
+    assert _cache(sm, tmp_path).get("a") == 1
+    assert _cache(sm, tmp_path, version=2).get("a") is None
+
+
+def test_expired_and_excess_entries_are_evicted(sm, tmp_path):
+    cache = _cache(sm, tmp_path)
+    cache.put_many({"old": 1})
+    cache.flush()
+    cache._conn.execute("UPDATE cache_entries SET created_at = ? WHERE key = 'old'", (time.time() - 100,))
+    cache._conn.commit()
+    cache.put_many({"k1": 1, "k2": 2, "k3": 3})
+    cache.close()
+
+    reopened = _cache(sm, tmp_path, max_age_s=50, max_entries=2)
+    assert set(reopened.get_many(["old", "k1", "k2", "k3"])) <= {"k1", "k2", "k3"}
+    assert len(reopened.iter_values()) == 2
+
+
+def test_uncounted_preload_and_record(sm, tmp_path):
+    cache = _cache(sm, tmp_path)
+    cache.put("a", 1)
+    assert cache.get_many(["a", "b"], count=False) == {"a": 1}
+    assert (cache.hits, cache.misses) == (0, 0)
+    cache.record(1, 0)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_match_candidates_counts_only_evaluated(sm, scraper, tmp_path, monkeypatch):
+    cache = _cache(sm, tmp_path)
+    monkeypatch.setattr(sm, "get_match_decision_cache", lambda: cache)
+    monkeypatch.setattr(sm, "MATCH_STREAM_TOP_K", 1)
+    component = {"model": "RX 7600", "brand": "AMD", "name": "Placa de Video RX 7600", "category": "gpu"}
+    candidates = [
+        {"name": f"Placa de Video AMD Radeon RX 7600 8GB modelo {i}", "price": 1000.0 + i}
+        for i in range(5)
+    ]
+
+    with monkeypatch.context() as m:
+        m.setattr("builtins.print", lambda *a, **k: None)
+        valid, rejected = scraper.match_candidates(component, candidates, "RX 7600")
+
+    assert len(valid) == 1 and not rejected
+    assert (cache.hits, cache.misses) == (0, 1)
@@ -0,0 +1,82 @@
+"""
+Regressão do MatchPlan: o corpus em data/match_corpus.json foi gerado com o
+is_exact_product_match de antes do plano pré-compilado. O caminho atual precisa
+devolver a mesma decisão e o mesmo log de rejeição para cada (componente, título).
+"""
+import contextlib
+import io
+import json
+import os
+import time
+
+import pytest
+
+from conftest import DATA_DIR
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    with open(os.path.join(DATA_DIR, "match_corpus.json"), encoding="utf-8") as f:
+        return json.load(f)["cases"]
+
+
+def _groups(corpus):
+    """Casos agrupados por componente, na ordem do corpus."""
+    groups = {}
+    for case in corpus:
+        key = json.dumps(case["component"], sort_keys=True)
+        groups.setdefault(key, (case["component"], []))[1].append(case)
+    return list(groups.values())
+
+
+def _match(scraper, title, component, plan=None):
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        accepted = scraper.is_exact_product_match(
+            title, component["model"], component["brand"], search_name=component["name"],
+            category=component["category"], specifications=component["specifications"], plan=plan,
+        )
+    return bool(accepted), buf.getvalue().strip() or None
+
+
+def test_corpus_has_both_outcomes(corpus):
+    assert any(c["accepted"] for c in corpus)
+    assert any(not c["accepted"] for c in corpus)
+
+
+def test_plan_matches_legacy_decisions(scraper, corpus):
+    mismatches = []
+    for component, cases in _groups(corpus):
+        plan = scraper.build_match_plan(component)
+        for case in cases:
+            got = _match(scraper, case["title"], component, plan)
+            if got != (case["accepted"], case["reason"]):
+                mismatches.append((component["model"], case["title"], got, case["reason"]))
+    assert not mismatches, mismatches[:5]
+
+
+def test_evaluate_agrees_with_is_exact_product_match(scraper, corpus):
+    for component, cases in _groups(corpus):
+        plan = scraper.build_match_plan(component)
+        for case in cases:
+            with contextlib.redirect_stdout(io.StringIO()):
+                accepted, code, _detail = plan.evaluate(case["title"])
+            assert accepted == case["accepted"], (component["model"], case["title"], code)
+
+
+def test_prebuilt_plan_is_faster_than_per_call(scraper, corpus):
+    groups = _groups(corpus)
+
+    def run(prebuilt):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for component, cases in groups:
+                plan = scraper.build_match_plan(component) if prebuilt else None
+                for case in cases:
+                    _match(scraper, case["title"], component, plan)
+        return time.perf_counter() - started
+
+    run(True)  # aquece caches de regex
+    per_call = min(run(False) for _ in range(3))
+    prebuilt = min(run(True) for _ in range(3))
+    assert prebuilt * 2 < per_call, f"plano pre-compilado {prebuilt:.3f}s vs por chamada {per_call:.3f}s"
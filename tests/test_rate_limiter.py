@@ -0,0 +1,74 @@
+"""_TokenBucket e GroqRateLimiter com relógio controlado — sem sleeps reais."""
+import json
+
+import pytest
+
+
+@pytest.fixture
+def clock(sm, monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(sm.time, "monotonic", lambda: now["t"])
+    return now
+
+
+def test_bucket_refills_continuously_up_to_capacity(sm, clock):
+    bucket = sm._TokenBucket(10, 2)
+    bucket.consume(10)
+    assert bucket.wait_time(4) == pytest.approx(2.0)
+    clock["t"] += 1
+    assert bucket.wait_time(4) == pytest.approx(1.0)
+    clock["t"] += 100
+    assert bucket.wait_time(10) == 0.0
+    assert bucket.tokens == 10
+
+
+def test_bucket_oversized_request_waits_for_full_bucket(sm, clock):
+    bucket = sm._TokenBucket(10, 1)
+    bucket.consume(5)
+    assert bucket.wait_time(50) == pytest.approx(5.0)
+
+
+def test_bucket_can_go_negative_and_cap_never_raises(sm, clock):
+    bucket = sm._TokenBucket(10, 1)
+    bucket.consume(15)
+    assert bucket.wait_time(1) == pytest.approx(6.0)
+    bucket.cap(100)
+    assert bucket.tokens == -5
+    clock["t"] += 10
+    bucket.cap(2)
+    assert bucket.tokens == 2
+
+
+def test_parse_groq_duration(sm):
+    assert sm.parse_groq_duration("2m59.56s") == pytest.approx(179.56)
+    assert sm.parse_groq_duration("250ms") == pytest.approx(0.25)
+    assert sm.parse_groq_duration("1h2m") == 3720
+    assert sm.parse_groq_duration("7") == 7
+    assert sm.parse_groq_duration("soon") is None
+    assert sm.parse_groq_duration(None) is None
+
+
+def test_acquire_skips_instead_of_waiting_past_limit(sm, clock, tmp_path, capsys):
+    usage = tmp_path / "groq_usage.json"
+    limiter = sm.GroqRateLimiter(rpm=1, tpm=1000, rpd=10, usage_path=str(usage), max_wait_s=0)
+    assert limiter.acquire(100) is None
+    assert limiter.acquire(100) == "wait_limit"
+    assert (limiter.requests_made, limiter.skipped) == (1, 1)
+    assert json.loads(usage.read_text())["requests"] == 1
+
+
+def test_acquire_honours_daily_usage_from_previous_runs(sm, clock, tmp_path, capsys):
+    usage = tmp_path / "groq_usage.json"
+    usage.write_text(json.dumps({"date": sm.GroqRateLimiter._today(), "requests": 10, "tokens": 0}))
+    limiter = sm.GroqRateLimiter(rpd=10, usage_path=str(usage))
+    assert limiter.acquire(100) == "daily_cap"
+
+
+def test_acquire_wait_is_capped_by_caller_deadline(sm, clock, monkeypatch, capsys):
+    limiter = sm.GroqRateLimiter(rpm=1, tpm=1000, rpd=10, max_wait_s=120)
+    monkeypatch.setattr(sm.time, "sleep", lambda s: clock.__setitem__("t", clock["t"] + s))
+    assert limiter.acquire(100) is None
+    # próxima vaga do RPM em 60s: cabe nos 120s do limiter, não nos 10s do componente
+    assert limiter.acquire(100, max_wait_s=10) == "wait_limit"
+    assert limiter.acquire(100, max_wait_s=90) is None
+    assert limiter.wait_seconds == pytest.approx(60.0)
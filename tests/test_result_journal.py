@@ -0,0 +1,88 @@
+"""ResultJournal: append/ack/compact em disco e o replay contra um Supabase falso."""
+import json
+import time
+from unittest import mock
+
+import pytest
+
+
+def _results(kabum="found", amazon="error"):
+    return {
+        "kabum": {"status": kabum, "data": {"preco": 10.0} if kabum == "found" else None, "meta": {}},
+        "amazon": {"status": amazon, "data": None, "meta": {}},
+    }
+
+
+@pytest.fixture
+def journal(sm, tmp_path):
+    j = sm.ResultJournal(str(tmp_path / "journal.jsonl"))
+    yield j
+    j.close()
+
+
+def test_append_skips_results_without_browser_work(journal):
+    assert journal.append({"id": 1}, _results("error", "error")) is False
+    assert journal.append({"id": 1}, _results("pending_llm", "pending_llm")) is False
+    assert journal.append({"id": 1}, _results("not_found", "pending_llm")) is True
+    assert journal.appended == 1
+
+
+def test_ack_is_per_component_and_compact_keeps_pending(sm, journal, tmp_path):
+    journal.append({"id": 1, "best_price": {"big": True}}, _results())
+    journal.append({"id": 1}, _results("not_found"))
+    journal.append({"id": 2}, _results())
+    journal.ack([1])
+    assert journal.acked == 2
+    journal.compact()
+
+    reopened = sm.ResultJournal(journal.path)
+    entries = reopened._read_entries()
+    assert [e["component"]["id"] for e in entries] == [2]
+    assert "best_price" not in entries[0]["component"]
+
+
+def test_truncated_last_line_is_ignored(sm, journal):
+    journal.append({"id": 1}, _results())
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"op": "result", "seq": 2, "comp')
+    assert [e["seq"] for e in sm.ResultJournal(journal.path)._read_entries()] == [1]
+
+
+def test_replay_rewrites_latest_and_drops_superseded(sm, journal, monkeypatch, capsys):
+    journal.append({"id": 1}, _results("not_found"))
+    journal.append({"id": 1}, _results())           # mais recente do id 1 vence
+    journal.append({"id": 2}, _results())
+    journal.close()
+    entries = journal._read_entries()
+    newer = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 60))
+
+    fake = mock.Mock()
+    fake.table.return_value.select.return_value.in_.return_value.execute.return_value = mock.Mock(data=[
+        {"id": 1, "best_price": {"updated_at": None}},
+        {"id": 2, "best_price": {"updated_at": newer}},   # já gravado depois da coleta
+    ])
+    written = []
+    monkeypatch.setattr(sm, "supabase", fake)
+    monkeypatch.setattr(sm, "get_component_write_buffer", lambda: None)
+    monkeypatch.setattr(sm, "update_component_prices",
+                        lambda component, results, observed_at=None: written.append((component["id"], observed_at)))
+
+    replay = sm.ResultJournal(journal.path)
+    replay.replay()
+    assert written == [(1, entries[1]["ts"])]
+    assert (replay.replayed, replay.superseded) == (1, 1)
+
+    replay.ack([1])
+    replay.compact()
+    assert sm.ResultJournal(journal.path)._read_entries() == []
+    replay.close()
+
+
+def test_entries_are_plain_jsonl(journal):
+    journal.append({"id": 7}, _results())
+    journal.ack([7])
+    journal.close()
+    with open(journal.path, encoding="utf-8") as f:
+        ops = [json.loads(line)["op"] for line in f]
+    assert ops == ["result", "ack"]